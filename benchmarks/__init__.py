@@ -0,0 +1,32 @@
+"""Stand-alone performance benchmarks.
+
+Run a benchmark module from the repository root, e.g. `python -m benchmarks.field_index`.
+"""
+import django
+from django.conf import settings
+
+
+def setup(**settings_overrides):
+    """Configure a minimal django environment for the benchmarks."""
+    if settings.configured:
+        return
+
+    settings.configure(
+        **{
+            "DATABASES": {
+                "default": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": ":memory:",
+                }
+            },
+            "INSTALLED_APPS": (
+                "django.contrib.auth",
+                "django.contrib.contenttypes",
+                "django_reports",
+            ),
+            "SECRET_KEY": "not very secret in benchmarks",
+            "USE_TZ": True,
+            **settings_overrides,
+        }
+    )
+    django.setup()
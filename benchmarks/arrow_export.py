@@ -0,0 +1,67 @@
+"""Benchmark the columnar report export against the CSV export."""
+import io
+import time
+
+from benchmarks import setup
+
+setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+
+from django_reports.arrow import Format, write_report  # noqa: E402
+from django_reports.export import encode_csv  # noqa: E402
+from django_reports.models import Report  # noqa: E402
+from django_reports.runner import ReportRunner  # noqa: E402
+
+ROW_COUNT = 500_000
+
+
+def main():
+    call_command("migrate", verbosity=0)
+    user = get_user_model().objects.create(username="benchmark")
+
+    # Reports over the report table itself, so the benchmark needs no models of its own.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Report._meta.db_table} "
+            "(name, model_label, description, created_by_id, type, annotations, filters, "
+            "aggregations, options) "
+            "WITH RECURSIVE numbers(number) AS "
+            "(SELECT 0 UNION ALL SELECT number + 1 FROM numbers WHERE number < %s) "
+            "SELECT 'report ' || number, 'django_reports.Report', 'description ' || number, "
+            "%s, 'TB', '{}', '{}', '{}', '{}' FROM numbers",
+            [ROW_COUNT - 1, user.pk],
+        )
+
+    report = Report(
+        model_label="django_reports.Report",
+        type=Report.Type.TABLE,
+        aggregations={
+            "columns": [
+                {"path": "id"},
+                {"path": "name"},
+                {"path": "model_label"},
+                {"path": "type"},
+            ]
+        },
+    )
+
+    for name, export in (
+        ("csv", lambda runner: sum(map(len, encode_csv(runner.columns, runner)))),
+        ("arrow ipc", lambda runner: write_report(runner, io.BytesIO())),
+        (
+            "parquet",
+            lambda runner: write_report(runner, io.BytesIO(), format=Format.PARQUET),
+        ),
+    ):
+        started = time.perf_counter()
+        export(ReportRunner(report, chunk_size=10_000))
+        seconds = time.perf_counter() - started
+
+        print(f"{name}: {ROW_COUNT / seconds:,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
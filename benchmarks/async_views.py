@@ -0,0 +1,131 @@
+"""Benchmark concurrent report exports under uvicorn, with the sync and the async export view.
+
+Requires uvicorn. The database is a temporary SQLite file, shared by the server threads.
+"""
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks import setup
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "benchmark.sqlite3")
+
+setup(
+    DATABASES={
+        "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": DATABASE_PATH}
+    },
+    ROOT_URLCONF="django_reports.rest_framework.urls",
+    ALLOWED_HOSTS=["*"],
+)
+
+import uvicorn  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from django_reports.models import Report  # noqa: E402
+
+ROW_COUNT = 20_000
+CONCURRENCY = 20
+REQUEST_COUNT = 100
+
+
+def create_report():
+    call_command("migrate", verbosity=0)
+    user = get_user_model().objects.create(username="benchmark")
+
+    # The report lists the report table itself, so the benchmark needs no models of its own.
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Report._meta.db_table} "
+            "(name, model_label, description, created_by_id, type, annotations, filters, "
+            "aggregations, options, materialized, rollup_key) "
+            "WITH RECURSIVE numbers(number) AS "
+            "(SELECT 0 UNION ALL SELECT number + 1 FROM numbers WHERE number < %s) "
+            "SELECT 'report ' || number, 'django_reports.Report', 'description ' || number, "
+            "%s, 'TB', '{}', '{}', '{}', '{}', FALSE, '' FROM numbers",
+            [ROW_COUNT - 2, user.pk],
+        )
+
+    return Report.objects.create(
+        name="reports",
+        model_label="django_reports.Report",
+        type=Report.Type.TABLE,
+        aggregations={
+            "columns": [{"path": "id"}, {"path": "name"}, {"path": "description"}]
+        },
+        created_by=user,
+    )
+
+
+def start_server():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            get_asgi_application(), port=port, log_level="warning", lifespan="off"
+        )
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+
+    while not server.started:
+        time.sleep(0.01)
+
+    return server, port
+
+
+async def request(port, path):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    size = len(await reader.read())
+    writer.close()
+
+    return time.perf_counter() - started, size
+
+
+async def run_requests(port, path):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited_request():
+        async with semaphore:
+            return await request(port, path)
+
+    return await asyncio.gather(*(limited_request() for _ in range(REQUEST_COUNT)))
+
+
+def main():
+    report = create_report()
+    server, port = start_server()
+
+    try:
+        for name in ("report-export", "report-export-async"):
+            path = f"{reverse(name, kwargs={'pk': report.pk})}?format=csv"
+            started = time.perf_counter()
+            results = asyncio.run(run_requests(port, path))
+            seconds = time.perf_counter() - started
+            latencies = sorted(latency for latency, _ in results)
+
+            print(
+                f"{name}: {REQUEST_COUNT / seconds:.1f} requests/s, "
+                f"p50 {statistics.median(latencies) * 1e3:.0f} ms, "
+                f"max {latencies[-1] * 1e3:.0f} ms, "
+                f"{results[0][1] / 1e6:.1f} MB per response"
+            )
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
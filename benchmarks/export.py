@@ -0,0 +1,45 @@
+"""Benchmark the report export encoders in rows per second."""
+import time
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection  # noqa: E402
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.export import encode_csv, encode_ndjson  # noqa: E402
+
+ROW_COUNT = 500_000
+
+
+def main():
+    (model,) = build_schema(model_count=1, field_count=3, relation_count=0)
+    columns = [field.attname for field in model._meta.concrete_fields]
+
+    with connection.schema_editor() as schema_editor:
+        schema_editor.create_model(model)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {model._meta.db_table} ({', '.join(columns[1:])}) "
+            "WITH RECURSIVE numbers(number) AS "
+            "(SELECT 0 UNION ALL SELECT number + 1 FROM numbers WHERE number < %s) "
+            "SELECT 'a' || number, 'b' || number, 'c' || number FROM numbers",
+            [ROW_COUNT - 1],
+        )
+
+    for name, encoder in (("csv", encode_csv), ("ndjson", encode_ndjson)):
+        rows = model._default_manager.values_list(*columns).iterator(chunk_size=2000)
+
+        started = time.perf_counter()
+        size = sum(len(chunk) for chunk in encoder(columns, rows))
+        seconds = time.perf_counter() - started
+
+        print(
+            f"{name}: {ROW_COUNT / seconds:,.0f} rows/s, {size / seconds / 1e6:.1f} MB/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Benchmark `FieldTree.find` against the linear child scan it replaced."""
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.index.fields import build_model_field_tree  # noqa: E402
+
+
+def linear_find(field_tree, path):
+    """The original `FieldTree.find` implementation."""
+    current_node = field_tree.root
+
+    for target_node_key in path:
+        try:
+            current_node = next(
+                filter(lambda node: node.key == target_node_key, current_node.children)
+            )
+        except StopIteration:
+            return None
+
+    return current_node
+
+
+def main():
+    # 5 wide models chained by a single relation, giving 4 relation hops.
+    schema = build_schema(model_count=5, field_count=200, relation_count=1)
+    field_tree = build_model_field_tree(schema[0])
+    paths = [
+        "__".join(["relation_0"] * depth + [f"char_{field_number}"])
+        for depth in range(5)
+        for field_number in range(0, 200, 10)
+    ]
+    segment_paths = [path.split("__") for path in paths]
+    number = 200
+
+    timings = {
+        "linear scan": timeit.timeit(
+            lambda: [linear_find(field_tree, path) for path in segment_paths],
+            number=number,
+        ),
+        "find (segments)": timeit.timeit(
+            lambda: [field_tree.find(path) for path in segment_paths], number=number
+        ),
+        "find (lookup path)": timeit.timeit(
+            lambda: [field_tree.find(path) for path in paths], number=number
+        ),
+    }
+
+    for name, seconds in timings.items():
+        print(f"{name:>20}: {seconds / (number * len(paths)) * 1e6:8.2f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
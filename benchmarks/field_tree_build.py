@@ -0,0 +1,61 @@
+"""Benchmark eager and lazy field tree construction on a synthetic 50 model schema."""
+import time
+import tracemalloc
+
+from benchmarks import setup
+
+setup()
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.index.fields import build_model_field_tree  # noqa: E402
+
+
+def measure(build, paths=()):
+    """Return the build time, traced memory and lookup time of `build`."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    field_tree = build()
+    built = time.perf_counter()
+
+    for path in paths:
+        assert field_tree.find(path) is not None
+
+    finished = time.perf_counter()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return built - started, memory, finished - built
+
+
+def main():
+    schema = build_schema(model_count=50, field_count=20, relation_count=3)
+    # The paths a typical report touches.
+    paths = [
+        "char_0",
+        "relation_0__char_1",
+        "relation_1__relation_0__char_2",
+        "relation_2__relation_1__char_3",
+    ]
+
+    # Warm up django's model meta caches so they are not attributed to the first build.
+    for model in schema:
+        model._meta.get_fields()
+
+    for max_depth in (3, 4, 5):
+        for lazy in (False, True):
+            build_time, memory, lookup_time = measure(
+                lambda: build_model_field_tree(
+                    schema[0], lazy=lazy, max_depth=max_depth
+                ),
+                paths,
+            )
+            print(
+                f"max_depth={max_depth} {'lazy ' if lazy else 'eager'}: "
+                f"build {build_time * 1e3:9.2f} ms, "
+                f"lookups {lookup_time * 1e3:7.2f} ms, "
+                f"memory {memory / 1024:10.1f} KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Report the number of nodes and the memory held by eagerly built field trees."""
+import gc
+import tracemalloc
+
+from benchmarks import setup
+
+setup()
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.index.fields import (  # noqa: E402
+    FieldTreeNode,
+    build_model_field_tree,
+)
+
+
+def main():
+    # Many models with several relations each, so that every model is reachable through many
+    # different paths (like a `User` model referenced by `created_by`, `updated_by`, ...).
+    schema = build_schema(model_count=20, field_count=30, relation_count=5)
+
+    for model in schema:
+        model._meta.get_fields()
+
+    for max_depth in (2, 3, 4, 5):
+        gc.collect()
+        tracemalloc.start()
+        field_tree = build_model_field_tree(schema[0], max_depth=max_depth)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        node_count = sum(
+            isinstance(instance, FieldTreeNode) for instance in gc.get_objects()
+        )
+        print(
+            f"max_depth={max_depth}: {node_count:8d} nodes, "
+            f"{memory / 1024 / 1024:8.2f} MiB"
+        )
+        del field_tree
+
+
+if __name__ == "__main__":
+    main()
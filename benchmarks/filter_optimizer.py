@@ -0,0 +1,105 @@
+"""Benchmark query compilation and planning of optimized and unoptimized filters."""
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from django.db import connection, models  # noqa: E402
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.filter import optimize_filter_data, to_query  # noqa: E402
+from django_reports.index.fields import build_model_field_tree  # noqa: E402
+
+
+def leaf(path, value):
+    return {"path": path, "value": value}
+
+
+def ui_filter(value_count):
+    """A filter as built by a UI: nested single child groups, duplicates and OR'd exact leaves."""
+    return {
+        "connector": "AND",
+        "children": [
+            {
+                "connector": "AND",
+                "children": [
+                    {
+                        "connector": "OR",
+                        "children": [
+                            {
+                                "connector": "OR",
+                                "children": [leaf("char_0", str(value))],
+                            }
+                            for value in range(value_count)
+                        ]
+                        + [leaf("char_0", "0")],
+                    }
+                ],
+            },
+            {
+                "connector": "AND",
+                "negated": True,
+                "children": [
+                    {
+                        "connector": "OR",
+                        "children": [
+                            leaf("relation_0__char_1", str(value))
+                            for value in range(value_count)
+                        ],
+                    }
+                ],
+            },
+        ],
+    }
+
+
+def main():
+    schema = build_schema(model_count=2, field_count=5, relation_count=1)
+
+    with connection.schema_editor() as schema_editor:
+        for model in schema:
+            schema_editor.create_model(model)
+
+    queryset = schema[0].objects.all()
+    field_index = build_model_field_tree(schema[0])
+
+    for value_count in (10, 100, 400):
+        filter_data = ui_filter(value_count)
+        queries = {
+            "original": models.Q(to_query(filter_data)),
+            "optimized": models.Q(
+                to_query(optimize_filter_data(filter_data, field_index))
+            ),
+        }
+
+        for name, query in queries.items():
+            sql, params = queryset.filter(query).query.sql_with_params()
+            number = 50
+            compile_time = timeit.timeit(
+                lambda: queryset.filter(query).query.sql_with_params(), number=number
+            )
+
+            with connection.cursor() as cursor:
+                plan_time = timeit.timeit(
+                    lambda: cursor.execute(
+                        f"EXPLAIN QUERY PLAN {sql}", params
+                    ).fetchall(),
+                    number=number,
+                )
+
+            print(
+                f"{value_count:4d} values {name:>9}: "
+                f"compile {compile_time / number * 1e3:7.2f} ms, "
+                f"plan {plan_time / number * 1e3:7.2f} ms, "
+                f"{len(sql):6d} SQL characters"
+            )
+
+    optimize_time = timeit.timeit(
+        lambda: optimize_filter_data(ui_filter(400), field_index), number=50
+    )
+    print(f"optimize 400 values: {optimize_time / 50 * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
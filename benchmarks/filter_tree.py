@@ -0,0 +1,82 @@
+"""Benchmark the filter tree traversals on 100k node trees."""
+import time
+
+from benchmarks import setup
+
+setup()
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.filter import (  # noqa: E402
+    get_filter_key,
+    optimize_filter_data,
+    to_dict,
+    to_query,
+    validate_filter_data,
+)
+from django_reports.index.fields import build_model_field_tree  # noqa: E402
+
+NODE_COUNT = 100_000
+
+
+def leaf(path, value):
+    return {"path": path, "lookup_expression": "exact", "value": value}
+
+
+def wide_filter_data():
+    return {
+        "connector": "OR",
+        "children": [leaf("char_0", str(number)) for number in range(NODE_COUNT)],
+    }
+
+
+def deep_filter_data():
+    filter_node_data = leaf("char_1", "A")
+
+    for number in range(NODE_COUNT // 2):
+        filter_node_data = {
+            "connector": ("AND", "OR")[number % 2],
+            "negated": number % 3 == 0,
+            "children": [leaf("relation_0__char_0", str(number)), filter_node_data],
+        }
+
+    return filter_node_data
+
+
+def main():
+    schema = build_schema(model_count=2, field_count=2, relation_count=1)
+    field_index = build_model_field_tree(schema[0])
+
+    for name, filter_node_data in (
+        ("wide", wide_filter_data()),
+        ("deep", deep_filter_data()),
+    ):
+        timings = {}
+
+        for function_name, function in (
+            (
+                "validate_filter_data",
+                lambda: validate_filter_data(filter_node_data, field_index),
+            ),
+            ("get_filter_key", lambda: get_filter_key(filter_node_data)),
+            (
+                "optimize_filter_data",
+                lambda: optimize_filter_data(filter_node_data, field_index),
+            ),
+            ("to_query", lambda: to_query(filter_node_data)),
+            ("to_dict", lambda: to_dict(to_query(filter_node_data))),
+        ):
+            started = time.perf_counter()
+            function()
+            timings[function_name] = time.perf_counter() - started
+
+        print(
+            f"{name}: "
+            + ", ".join(
+                f"{function_name} {seconds * 1e3:.0f} ms"
+                for function_name, seconds in timings.items()
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Benchmark the overhead of the instrumentation on filter validation and compilation."""
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from benchmarks.schema import build_schema  # noqa: E402
+from django_reports.filter import to_query, validate_filter_data  # noqa: E402
+from django_reports.index.fields import build_model_field_tree  # noqa: E402
+from django_reports.instrumentation import stage_completed  # noqa: E402
+
+REPEAT = 20_000
+
+
+def receiver(sender, metrics, **kwargs):
+    pass
+
+
+def main():
+    schema = build_schema(model_count=2, field_count=2, relation_count=1)
+    field_index = build_model_field_tree(schema[0])
+    filter_node_data = {
+        "connector": "AND",
+        "children": [
+            {"path": "char_0", "lookup_expression": "exact", "value": "A"},
+            {"path": "relation_0__char_1", "lookup_expression": "exact", "value": "B"},
+        ],
+    }
+
+    for name in ("disabled", "enabled"):
+        if name == "enabled":
+            stage_completed.connect(receiver)
+
+        for function_name, function in (
+            (
+                "validate_filter_data",
+                lambda: validate_filter_data(filter_node_data, field_index),
+            ),
+            ("to_query", lambda: to_query(filter_node_data)),
+        ):
+            seconds = min(timeit.repeat(function, number=REPEAT, repeat=5))
+            print(f"{name}: {function_name} {seconds / REPEAT * 1e6:.2f} us per call")
+
+    stage_completed.disconnect(receiver)
+
+
+if __name__ == "__main__":
+    main()
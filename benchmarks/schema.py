@@ -0,0 +1,34 @@
+"""Synthetic model schemas used by the benchmarks."""
+from django.apps.registry import Apps
+from django.db import models
+
+
+def build_schema(model_count, field_count, relation_count, app_label="benchmarks"):
+    """Create `model_count` models in an isolated app registry.
+
+    Every model has `field_count` char fields and `relation_count` foreign keys to the models that
+    follow it, wrapping around at the end of the schema.
+    """
+    apps = Apps(installed_apps=())
+    schema = []
+
+    for model_number in range(model_count):
+        attributes = {
+            "__module__": __name__,
+            "Meta": type("Meta", (), {"app_label": app_label, "apps": apps}),
+        }
+
+        for field_number in range(field_count):
+            attributes[f"char_{field_number}"] = models.CharField(max_length=50)
+
+        for relation_number in range(relation_count):
+            related_model_number = (model_number + relation_number + 1) % model_count
+            attributes[f"relation_{relation_number}"] = models.ForeignKey(
+                f"{app_label}.Model{related_model_number}",
+                on_delete=models.CASCADE,
+                related_name="+",
+            )
+
+        schema.append(type(f"Model{model_number}", (models.Model,), attributes))
+
+    return schema
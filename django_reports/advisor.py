@@ -0,0 +1,234 @@
+"""Database index suggestions from the filters and columns of saved reports.
+
+The field paths of report filters and columns are resolved through the field index of the report
+model to the model fields they read. Every report adds its weight, the number of times it ran, to
+the score of the indexes that would serve it:
+
+* a single field index for every field the report filters on or groups by, and
+* a composite index per model of the fields the report filters on, equality lookups first, followed
+  on the report model by the fields the report groups by.
+
+Fields that are only matched by pattern lookups, e.g. `icontains`, are not suggested since B-tree
+indexes do not serve them. Suggestions served by the leading fields of an existing index, unique
+constraint or `db_index` field (django indexes foreign keys by default) are dropped. The leading
+fields must be in the order of the suggestion, except for its equality fields, which serve the
+query in any order.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple, Type
+
+from django.db import models
+from django.db.migrations import AddIndex, Migration
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.models.constants import LOOKUP_SEP
+
+from django_reports.filter import get_filter_lookups
+
+# Lookups that B-tree indexes do not serve.
+pattern_lookups = frozenset(
+    {
+        "contains",
+        "icontains",
+        "iexact",
+        "endswith",
+        "iendswith",
+        "istartswith",
+        "regex",
+        "iregex",
+    }
+)
+equality_lookups = frozenset({"exact", "in", "isnull"})
+
+
+class IndexSuggestion(NamedTuple):
+    """A suggested index on the `fields` of `model`."""
+
+    model: Type[models.Model]
+    fields: Tuple[str, ...]
+    score: int
+    reports: Tuple[str, ...]
+
+    def to_index(self) -> models.Index:
+        index = models.Index(fields=list(self.fields))
+        index.set_name_with_model(self.model)
+
+        return index
+
+
+def _resolve_field(field_index, path: str):
+    """Return the model field at `path`, `None` if the path does not exist."""
+    node = field_index.find(path)
+
+    return None if node is None else node.field.model_field
+
+
+def get_existing_indexes(model: Type[models.Model]) -> Set[Tuple[str, ...]]:
+    """Return the field names of the indexes of `model`, in index order."""
+    indexes = {
+        (field.name,)
+        for field in model._meta.concrete_fields
+        if field.primary_key or field.unique or field.db_index
+    }
+    indexes.update(
+        tuple(field_name.lstrip("-") for field_name in index.fields)
+        for index in model._meta.indexes
+        if index.fields
+    )
+    indexes.update(
+        tuple(constraint.fields)
+        for constraint in model._meta.constraints
+        if isinstance(constraint, models.UniqueConstraint)
+        and constraint.fields
+        and constraint.condition is None
+    )
+    indexes.update(tuple(fields) for fields in model._meta.unique_together)
+    # `index_together` is deprecated in django 4.2 and removed in 5.1.
+    indexes.update(
+        tuple(fields) for fields in getattr(model._meta, "index_together", ())
+    )
+
+    return indexes
+
+
+def _is_served(fields: Tuple[str, ...], equality_count: int, existing_indexes) -> bool:
+    return any(
+        set(index[:equality_count]) == set(fields[:equality_count])
+        and index[: len(fields)][equality_count:] == fields[equality_count:]
+        for index in existing_indexes
+        if len(index) >= len(fields)
+    )
+
+
+def get_report_indexes(report) -> Dict[Tuple[Type[models.Model], Tuple[str, ...]], int]:
+    """Return the `(model, field names)` of the indexes that would serve `report`.
+
+    Each index maps to the number of its leading fields that are only matched by equality lookups.
+    """
+    field_index = report.model_index.field_index
+    # Model -> field name -> whether every lookup of the field is an equality lookup.
+    filter_fields: Dict[Type[models.Model], Dict[str, bool]] = defaultdict(dict)
+
+    for path, lookup_expression in get_filter_lookups(report.filters or {}):
+        lookups = lookup_expression.split(LOOKUP_SEP)
+        model_field = _resolve_field(field_index, path)
+
+        if model_field is None or lookups[0] in pattern_lookups:
+            continue
+
+        is_equality = len(lookups) == 1 and lookups[0] in equality_lookups
+        fields = filter_fields[model_field.model]
+        fields[model_field.name] = fields.get(model_field.name, True) and is_equality
+
+    group_fields = []
+
+    if report.type != report.Type.SUMMARY and report.aggregations.get("metrics"):
+        for column in report.aggregations.get("columns", []):
+            model_field = _resolve_field(field_index, column.get("path", ""))
+
+            # Indexes of related models do not serve the grouping of report rows.
+            if (
+                model_field is not None
+                and model_field.model is report.model
+                and model_field.name not in group_fields
+            ):
+                group_fields.append(model_field.name)
+
+    indexes = {(report.model, (field_name,)): 0 for field_name in group_fields}
+    indexes.update(
+        ((model, (field_name,)), int(is_equality))
+        for model, fields in filter_fields.items()
+        for field_name, is_equality in fields.items()
+        if (model, (field_name,)) not in indexes
+    )
+
+    for model in {*filter_fields, report.model}:
+        fields = filter_fields.get(model, {})
+        equality_fields = sorted(
+            name for name, is_equality in fields.items() if is_equality
+        )
+        composite_fields = [
+            *equality_fields,
+            *sorted(name for name, is_equality in fields.items() if not is_equality),
+        ]
+
+        if model is report.model:
+            composite_fields.extend(
+                name for name in group_fields if name not in composite_fields
+            )
+
+        if len(composite_fields) > 1:
+            indexes[model, tuple(composite_fields)] = len(equality_fields)
+
+    return indexes
+
+
+def suggest_indexes(reports: Iterable) -> List[IndexSuggestion]:
+    """Return the index suggestions for `reports`, highest score first."""
+    scores: Dict[Tuple[Type[models.Model], Tuple[str, ...]], int] = defaultdict(int)
+    report_names = defaultdict(list)
+    # The leading fields every report matches by equality, see `_is_served`.
+    equality_counts: Dict[Tuple[Type[models.Model], Tuple[str, ...]], int] = {}
+
+    for report in reports:
+        try:
+            report.model
+        except (LookupError, ValueError):
+            continue
+
+        for key, equality_count in get_report_indexes(report).items():
+            scores[key] += max(report.run_count, 1)
+            report_names[key].append(report.name)
+            equality_counts[key] = min(
+                equality_counts.get(key, equality_count), equality_count
+            )
+
+    existing_indexes = {}
+    suggestions = []
+
+    for (model, fields), score in scores.items():
+        if model not in existing_indexes:
+            existing_indexes[model] = get_existing_indexes(model)
+
+        if not _is_served(
+            fields, equality_counts[model, fields], existing_indexes[model]
+        ):
+            suggestions.append(
+                IndexSuggestion(
+                    model, fields, score, tuple(sorted(report_names[model, fields]))
+                )
+            )
+
+    return sorted(
+        suggestions,
+        key=lambda suggestion: (
+            -suggestion.score,
+            len(suggestion.fields),
+            suggestion.model._meta.label,
+            suggestion.fields,
+        ),
+    )
+
+
+def make_index_migration(
+    app_label: str, suggestions: Iterable[IndexSuggestion], name: str = "report_indexes"
+) -> Migration:
+    """Return a migration of `app_label` adding the suggested indexes of its models."""
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    leaf_nodes = loader.graph.leaf_nodes(app_label)
+    number = (
+        max(MigrationAutodetector.parse_number(leaf[1]) or 0 for leaf in leaf_nodes)
+        if leaf_nodes
+        else 0
+    )
+    migration = Migration(f"{number + 1:04d}_{name}", app_label)
+    migration.dependencies = leaf_nodes
+    migration.operations = [
+        AddIndex(
+            model_name=suggestion.model._meta.model_name, index=suggestion.to_index()
+        )
+        for suggestion in suggestions
+        if suggestion.model._meta.app_label == app_label
+    ]
+
+    return migration
@@ -1,2 +1,222 @@
-class Aggrigator:
-    pass
+"""Report aggregations.
+
+Aggregation data describes the columns of a report and the metrics computed per group of rows:
+
+    {
+        "columns": [
+            {"path": "publisher__name"},
+            {"path": "created_at", "transform": "date"},
+        ],
+        "metrics": [
+            {"name": "books", "function": "count", "path": "id", "distinct": False},
+            {"name": "average_price", "function": "avg", "path": "price"},
+        ],
+    }
+
+Table and chart reports group rows by their columns (`values(...).annotate(...)`), while summary
+reports aggregate all rows into a single value per metric (`aggregate(...)`). Tables without
+metrics list the column values of every row.
+"""
+from typing import Any, Dict, List, Set
+
+from asgiref.sync import sync_to_async
+from django import VERSION as DJANGO_VERSION
+from django.core.exceptions import ValidationError
+from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+
+from django_reports.index import fields
+from django_reports.index.models import ModelIndex
+from django_reports.structs import Option
+
+# Async queryset methods (`aaggregate`, `aiterator`, `async for`) require django version >= 4.1.
+SUPPORTS_ASYNC_QUERIES = DJANGO_VERSION >= (4, 1)
+
+
+class Function(str, Option):
+    COUNT = "count"
+    SUM = "sum"
+    AVG = "avg"
+    MIN = "min"
+    MAX = "max"
+
+
+aggregate_functions = {
+    Function.COUNT: models.Count,
+    Function.SUM: models.Sum,
+    Function.AVG: models.Avg,
+    Function.MIN: models.Min,
+    Function.MAX: models.Max,
+}
+
+# Index fields that sum and average can be computed for.
+numeric_fields = (fields.IntegerField, fields.FloatField, fields.DecimalField)
+
+
+class Aggregator:
+    def __init__(self, data, model_index: ModelIndex) -> None:
+        self.model_index = model_index
+        self.columns = [
+            get_column_lookup_path(column) for column in data.get("columns", [])
+        ]
+        self.metrics = {
+            metric["name"]: to_aggregate(metric) for metric in data.get("metrics", [])
+        }
+
+    def annotate(self, queryset):
+        """Return the values of the columns, grouped with their metrics if there are any."""
+        queryset = queryset.values(*self.columns)
+
+        if self.metrics:
+            queryset = queryset.annotate(**self.metrics).order_by(*self.columns)
+
+        return queryset
+
+    def aggregate(self, queryset) -> Dict[str, Any]:
+        """Return the metrics of all rows of the queryset."""
+        return queryset.aggregate(**self.metrics)
+
+    async def aaggregate(self, queryset) -> Dict[str, Any]:
+        """Async version of `aggregate`."""
+        if SUPPORTS_ASYNC_QUERIES:
+            return await queryset.aaggregate(**self.metrics)
+
+        return await sync_to_async(queryset.aggregate)(**self.metrics)
+
+    async def aannotate(self, queryset) -> List[Dict[str, Any]]:
+        """Async version of `annotate`, returning the evaluated rows."""
+        queryset = self.annotate(queryset)
+
+        if SUPPORTS_ASYNC_QUERIES:
+            return [row async for row in queryset]
+
+        return await sync_to_async(list)(queryset)
+
+
+# Backwards compatible alias of the original (misspelled) class name.
+Aggrigator = Aggregator
+
+
+def get_column_lookup_path(column_data: Dict[str, Any]) -> str:
+    """Return the lookup path of a column, including its transform, e.g. `created_at__date`."""
+    if column_data.get("transform"):
+        return f"{column_data['path']}{LOOKUP_SEP}{column_data['transform']}"
+
+    return column_data["path"]
+
+
+def get_aggregation_paths(aggregation_data) -> Set[str]:
+    """Return the field paths of the columns and metrics of the aggregation data."""
+    return {
+        data["path"]
+        for data in (
+            *aggregation_data.get("columns", []),
+            *aggregation_data.get("metrics", []),
+        )
+        if data.get("path")
+    }
+
+
+def to_aggregate(metric_data: Dict[str, Any]) -> models.Aggregate:
+    function = Function(metric_data["function"])
+    extra = {"distinct": True} if metric_data.get("distinct") else {}
+
+    return aggregate_functions[function](metric_data.get("path") or "pk", **extra)
+
+
+def validate_aggregation_data(aggregation_data, field_index):
+    """Validate the aggregation data.
+
+    All errors are raised together, each prefixed with the JSON path of the invalid column or
+    metric, e.g. `$.metrics[1]`.
+    """
+    errors: List[ValidationError] = []
+    column_names = set()
+
+    for index, column_data in enumerate(aggregation_data.get("columns", [])):
+        try:
+            column_names.add(_validate_column(column_data, field_index))
+        except ValidationError as error:
+            errors.extend(_with_json_path(error, f"$.columns[{index}]"))
+
+    metric_names = set()
+
+    for index, metric_data in enumerate(aggregation_data.get("metrics", [])):
+        try:
+            _validate_metric(metric_data, field_index, column_names | metric_names)
+        except ValidationError as error:
+            errors.extend(_with_json_path(error, f"$.metrics[{index}]"))
+        else:
+            metric_names.add(metric_data["name"])
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def _with_json_path(error: ValidationError, json_path: str):
+    return [
+        ValidationError(f"{json_path}: {node_error.message}", code=node_error.code)
+        for node_error in error.error_list
+    ]
+
+
+def _validate_column(column_data, field_index) -> str:
+    """Validate a column and return its lookup path."""
+    index_field = _validate_field_path(column_data.get("path"), field_index)
+    transform = column_data.get("transform")
+
+    if transform and index_field.field.model_field.get_transform(transform) is None:
+        raise ValidationError(
+            f"'{transform}' is not a valid transform for '{column_data['path']}'.",
+            code="invalid",
+        )
+
+    return get_column_lookup_path(column_data)
+
+
+def _validate_metric(metric_data, field_index, used_names):
+    """Validate a metric."""
+    name = metric_data.get("name")
+
+    if not name or not isinstance(name, str) or not name.isidentifier():
+        raise ValidationError("'name' must be a valid identifier.", code="invalid")
+    elif name in used_names or field_index.find(name) is not None:
+        raise ValidationError(
+            f"'{name}' is already used by another column, metric or field.",
+            code="invalid",
+        )
+
+    function = metric_data.get("function")
+
+    if function not in Function:
+        raise ValidationError(f"'{function}' is not a valid function.", code="invalid")
+
+    if metric_data.get("distinct") and function != Function.COUNT:
+        raise ValidationError(
+            "'distinct' is only supported by 'count'.", code="invalid"
+        )
+
+    if function == Function.COUNT and not metric_data.get("path"):
+        return
+
+    index_field = _validate_field_path(metric_data.get("path"), field_index)
+
+    if function in (Function.SUM, Function.AVG) and not isinstance(
+        index_field.field, numeric_fields
+    ):
+        raise ValidationError(f"'{function}' requires a numeric field.", code="invalid")
+
+
+def _validate_field_path(field_path, field_index):
+    if not field_path or not isinstance(field_path, str):
+        raise ValidationError("'path' is required.", code="required")
+
+    index_field = field_index.find(field_path)
+
+    if index_field is None:
+        raise ValidationError(
+            f"Field with path '{field_path}' does not exist or is not supported.",
+            code="invalid",
+        )
+
+    return index_field
@@ -0,0 +1,46 @@
+"""Django reports app configuration."""
+from django.apps import AppConfig, apps
+from django.core.signals import setting_changed
+from django.db.models.signals import class_prepared
+
+
+class DjangoReportsConfig(AppConfig):
+    name = "django_reports"
+    default_auto_field = "django.db.models.AutoField"
+    verbose_name = "Django Reports"
+
+    def ready(self):
+        from django_reports.cache import connect_signals
+        from django_reports.conf import get_setting
+        from django_reports.index.snapshot import load_snapshot
+
+        # Shared model indexes reference model classes and their fields, so the index of a model is
+        # dropped whenever the model is (re)created, and all indexes when the installed apps change.
+        class_prepared.connect(
+            _invalidate_prepared_model, dispatch_uid="django_reports_clear_registry"
+        )
+        setting_changed.connect(
+            _clear_registry_on_installed_apps_change,
+            dispatch_uid="django_reports_clear_registry_on_setting_changed",
+        )
+
+        if get_setting("INDEX_SNAPSHOT_PATH"):
+            load_snapshot(get_setting("INDEX_SNAPSHOT_PATH"))
+
+        if get_setting("RESULT_CACHE") is not None:
+            connect_signals()
+
+
+def _invalidate_prepared_model(sender, **kwargs):
+    from django_reports.index.models import ModelIndex
+
+    # Models of other app registries, e.g. of migration states, are never shared.
+    if sender._meta.apps is apps:
+        ModelIndex.invalidate(sender)
+
+
+def _clear_registry_on_installed_apps_change(setting, **kwargs):
+    from django_reports.index.models import ModelIndex
+
+    if setting == "INSTALLED_APPS":
+        ModelIndex.clear_registry()
@@ -0,0 +1,195 @@
+"""Columnar (Arrow IPC and Parquet) export of report results.
+
+This module requires `pyarrow`, installed with the `arrow` extra. Report rows are read from a
+`ReportRunner` in chunks and converted into typed record batches, so the result is never held in
+memory as a whole.
+"""
+from itertools import chain
+from typing import List, Optional
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.conf import settings
+
+from django_reports.aggregator import Function, get_column_lookup_path
+from django_reports.export import iter_batches
+from django_reports.index import fields
+from django_reports.runner import ReportRunner
+
+
+class Format:
+    IPC = "ipc"
+    PARQUET = "parquet"
+
+
+# Precision of the sums of decimal fields, the largest `decimal128` precision.
+SUM_DECIMAL_PRECISION = 38
+
+
+def get_arrow_type(index_field: fields.Field) -> Optional[pa.DataType]:
+    """Return the arrow type of the values of `index_field`, or `None` if it is not known."""
+    if isinstance(index_field, fields.ForeignKeyField):
+        # Relations hold the value of the related field, usually the primary key.
+        return _get_model_field_arrow_type(index_field.model_field.target_field)
+    elif isinstance(index_field, fields.CharField):
+        return pa.string()
+    elif isinstance(index_field, fields.IntegerField):
+        return pa.int64()
+    elif isinstance(index_field, fields.FloatField):
+        return pa.float64()
+    elif isinstance(index_field, fields.DecimalField):
+        return pa.decimal128(
+            index_field.model_field.max_digits, index_field.model_field.decimal_places
+        )
+    elif isinstance(index_field, fields.BooleanField):
+        return pa.bool_()
+    elif isinstance(index_field, fields.DateTimeField):
+        return pa.timestamp("us", tz="UTC" if settings.USE_TZ else None)
+    elif isinstance(index_field, fields.DateField):
+        return pa.date32()
+
+    return None
+
+
+def _get_model_field_arrow_type(model_field) -> Optional[pa.DataType]:
+    try:
+        index_field = fields.to_model_index_field(model_field)
+    except KeyError:
+        # Fields that are not indexed, e.g. a `UUIDField`, are inferred from the rows.
+        return None
+
+    return get_arrow_type(index_field)
+
+
+def get_column_types(runner: ReportRunner) -> List[Optional[pa.DataType]]:
+    """Return the arrow types of the runner columns.
+
+    Types that depend on the database, e.g. transformed columns and averages, are `None` and
+    inferred from the rows.
+    """
+    field_index = runner.report.model_index.field_index
+    aggregations = runner.report.aggregations
+    # Column name -> arrow type of the report columns and metrics.
+    column_types = {}
+
+    if not runner.is_summary:
+        for column_data in aggregations.get("columns", []):
+            column_types[get_column_lookup_path(column_data)] = (
+                None
+                if column_data.get("transform")
+                else get_arrow_type(field_index.find(column_data["path"]).field)
+            )
+
+    for metric_data in aggregations.get("metrics", []):
+        function = Function(metric_data["function"])
+
+        if function == Function.COUNT:
+            column_type = pa.int64()
+        elif function == Function.AVG:
+            column_type = None
+        else:
+            column_type = get_arrow_type(field_index.find(metric_data["path"]).field)
+
+            # Sums exceed the precision of the summed field.
+            if function == Function.SUM and pa.types.is_decimal(column_type):
+                column_type = pa.decimal128(SUM_DECIMAL_PRECISION, column_type.scale)
+
+        column_types[metric_data["name"]] = column_type
+
+    # Rows of tables without columns and metrics hold every field, see `ReportRunner.columns`.
+    model_fields = {
+        model_field.attname: model_field
+        for model_field in runner.report.model._meta.concrete_fields
+    }
+
+    return [
+        column_types[column]
+        if column in column_types
+        else _get_model_field_arrow_type(model_fields[column])
+        if column in model_fields
+        else None
+        for column in runner.columns
+    ]
+
+
+def to_record_batch(columns, column_types, rows) -> pa.RecordBatch:
+    """Convert a list of row tuples into a record batch."""
+    values = list(zip(*rows)) if rows else [()] * len(columns)
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(column_values, type=column_type)
+            for column_values, column_type in zip(values, column_types)
+        ],
+        names=columns,
+    )
+
+
+def _cast_record_batch(batch: pa.RecordBatch, column_types) -> pa.RecordBatch:
+    return pa.RecordBatch.from_arrays(
+        [
+            column if column.type == column_type else column.cast(column_type)
+            for column, column_type in zip(batch.columns, column_types)
+        ],
+        names=batch.schema.names,
+    )
+
+
+def iter_record_batches(runner: ReportRunner):
+    """Yield the report rows as record batches of up to `runner.chunk_size` rows.
+
+    Every batch has the same schema. Types that are not known up front are inferred from the rows,
+    so batches are held back while a column has only held `None` values, which have no type.
+    """
+    column_types = get_column_types(runner)
+    held_batches = []
+
+    for rows in iter_batches(runner, runner.chunk_size):
+        batch = to_record_batch(runner.columns, column_types, rows)
+        held_batches.append(batch)
+        # Fix the inferred types, columns of `None` values are inferred again from the next rows.
+        column_types = [
+            None if pa.types.is_null(column_type) else column_type
+            for column_type in batch.schema.types
+        ]
+
+        if None not in column_types:
+            for held_batch in held_batches:
+                yield _cast_record_batch(held_batch, column_types)
+
+            held_batches = []
+
+    # Columns without any value keep the null type.
+    column_types = [
+        pa.null() if column_type is None else column_type
+        for column_type in column_types
+    ]
+
+    for held_batch in held_batches:
+        yield _cast_record_batch(held_batch, column_types)
+
+
+def write_report(runner: ReportRunner, sink, format: str = Format.IPC) -> int:
+    """Write the report rows to `sink` as an Arrow IPC stream or Parquet file.
+
+    `sink` is a path or a writable binary file. Return the number of rows written.
+    """
+    batches = iter_record_batches(runner)
+    first_batch = next(batches, None)
+
+    if first_batch is None:
+        first_batch = to_record_batch(runner.columns, get_column_types(runner), [])
+
+    if format == Format.PARQUET:
+        writer = pq.ParquetWriter(sink, first_batch.schema)
+    else:
+        writer = pa.ipc.new_stream(sink, first_batch.schema)
+
+    row_count = 0
+
+    with writer:
+        for batch in chain([first_batch], batches):
+            writer.write_batch(batch)
+            row_count += batch.num_rows
+
+    return row_count
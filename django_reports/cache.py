@@ -0,0 +1,229 @@
+"""Report result cache.
+
+Report results are cached with django's cache framework, in the cache named by the `RESULT_CACHE`
+setting. Cache keys hold a version per model the report reads, i.e. the report model and the
+models related through the paths of its filters and aggregations. Saving or deleting an instance
+of a model bumps its version, so only the results of the reports reading that model go stale.
+
+Bulk operations (`QuerySet.update`, `bulk_create`, raw SQL) do not send model signals and should be
+followed by a call to `invalidate_model`.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.utils import timezone
+
+from django_reports.aggregator import get_aggregation_paths
+from django_reports.conf import get_setting
+from django_reports.filter import get_filter_paths
+
+KEY_PREFIX = "django_reports"
+
+_MISSING = object()
+
+
+class ResultCacheInfo(NamedTuple):
+    """Report result cache statistics."""
+
+    hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+
+_info_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def cache_info() -> ResultCacheInfo:
+    """Return the hit and miss counts of the result cache in this process."""
+    with _info_lock:
+        return ResultCacheInfo(_hits, _misses)
+
+
+def reset_cache_info() -> None:
+    global _hits, _misses
+
+    with _info_lock:
+        _hits = _misses = 0
+
+
+def _count(hit: bool) -> None:
+    global _hits, _misses
+
+    with _info_lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
+
+
+def get_cache():
+    return caches[get_setting("RESULT_CACHE")]
+
+
+def _get_version_key(model_label: str) -> str:
+    return f"{KEY_PREFIX}:version:{model_label}"
+
+
+def _new_version() -> int:
+    # Versions start from the current time, so a version that was evicted from the cache does not
+    # restart at a value used by results that are still cached.
+    return time.time_ns()
+
+
+def get_model_versions(model_labels: Iterable[str]) -> Dict[str, int]:
+    """Return the data version of each model label."""
+    cache = get_cache()
+    version_keys = {_get_version_key(label): label for label in model_labels}
+    versions = cache.get_many(version_keys)
+
+    for version_key in version_keys.keys() - versions.keys():
+        cache.add(version_key, _new_version(), timeout=None)
+        versions[version_key] = cache.get(version_key)
+
+    return {version_keys[key]: version for key, version in versions.items()}
+
+
+def invalidate_model(model) -> None:
+    """Mark the cached results of the reports reading `model` as stale."""
+    cache = get_cache()
+    version_key = _get_version_key(model._meta.label)
+
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, _new_version(), timeout=None)
+
+
+def get_report_model_labels(report) -> FrozenSet[str]:
+    """Return the labels of the models `report` reads."""
+    field_index = report.model_index.field_index
+    paths = get_aggregation_paths(report.aggregations or {})
+
+    if report.filters:
+        paths |= get_filter_paths(report.filters)
+
+    model_labels = {report.model._meta.label}
+
+    for path in paths:
+        keys = path.split(LOOKUP_SEP)
+
+        # Every relation on the path, e.g. `author` and `author__country` of
+        # `author__country__name`.
+        for length in range(1, len(keys) + 1):
+            node = field_index.find(keys[:length])
+
+            if node is None:
+                break
+            elif node.field.is_relation:
+                model_labels.add(node.field.related_model._meta.label)
+
+    return frozenset(model_labels)
+
+
+def get_report_cache_key(report) -> str:
+    """Return the key of the cached results of `report` at the current model versions.
+
+    Naive datetime filter values are in the current time zone, so it is part of the key.
+    """
+    definition = json.dumps(
+        [
+            report.type,
+            report.filters,
+            report.aggregations,
+            report.annotations,
+            timezone.get_current_timezone_name() if settings.USE_TZ else None,
+        ],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    versions = sorted(get_model_versions(get_report_model_labels(report)).items())
+    digest = hashlib.blake2b(
+        f"{definition}{versions}".encode(), digest_size=16
+    ).hexdigest()
+
+    return f"{KEY_PREFIX}:result:{report.pk}:{digest}"
+
+
+def get_report_results(report):
+    """Return the results of `report`, from the result cache when it is enabled.
+
+    Table and chart results are returned as a list of rows.
+    """
+    if get_setting("RESULT_CACHE") is None:
+        return _evaluate(report.get_results())
+
+    cache = get_cache()
+    cache_key = get_report_cache_key(report)
+    results = cache.get(cache_key, _MISSING)
+
+    _count(hit=results is not _MISSING)
+
+    if results is _MISSING:
+        results = _evaluate(report.get_results())
+        cache.set(cache_key, results, timeout=get_setting("RESULT_CACHE_TIMEOUT"))
+
+    return results
+
+
+async def aget_report_results(report):
+    """Async version of `get_report_results`."""
+    if get_setting("RESULT_CACHE") is None:
+        return _evaluate(await report.aget_results())
+
+    cache = get_cache()
+    cache_key = await sync_to_async(get_report_cache_key)(report)
+    results = await cache.aget(cache_key, _MISSING)
+
+    _count(hit=results is not _MISSING)
+
+    if results is _MISSING:
+        results = _evaluate(await report.aget_results())
+        await cache.aset(
+            cache_key, results, timeout=get_setting("RESULT_CACHE_TIMEOUT")
+        )
+
+    return results
+
+
+def _evaluate(results):
+    return results if isinstance(results, dict) else list(results)
+
+
+def _invalidate_sender(sender, **kwargs) -> None:
+    invalidate_model(sender)
+
+
+def _invalidate_m2m_models(sender, instance, action, model, **kwargs) -> None:
+    if action.startswith("post_"):
+        for changed_model in {sender, type(instance), model}:
+            invalidate_model(changed_model)
+
+
+def connect_signals() -> None:
+    """Invalidate cached results whenever model instances are saved or deleted."""
+    post_save.connect(_invalidate_sender, dispatch_uid="django_reports_result_cache")
+    post_delete.connect(_invalidate_sender, dispatch_uid="django_reports_result_cache")
+    m2m_changed.connect(
+        _invalidate_m2m_models, dispatch_uid="django_reports_result_cache"
+    )
+
+
+def disconnect_signals() -> None:
+    post_save.disconnect(dispatch_uid="django_reports_result_cache")
+    post_delete.disconnect(dispatch_uid="django_reports_result_cache")
+    m2m_changed.disconnect(dispatch_uid="django_reports_result_cache")
@@ -0,0 +1,41 @@
+"""Django reports settings.
+
+Settings are read from the `DJANGO_REPORTS` dictionary of the django settings module, e.g.
+
+    DJANGO_REPORTS = {"INDEX_SNAPSHOT_PATH": BASE_DIR / "report-index.snapshot"}
+"""
+from django.conf import settings
+
+DEFAULTS = {
+    # Path of the precomputed model field index snapshot, see `manage.py build_report_index`.
+    "INDEX_SNAPSHOT_PATH": None,
+    # Maximum number of compiled filter queries (and filter validation results) kept in memory.
+    "FILTER_CACHE_SIZE": 1024,
+    # Number of rows fetched from the database at a time when a report runner streams its rows.
+    "RUNNER_CHUNK_SIZE": 2000,
+    # Alias of the django cache that report results are cached in, or `None` to disable caching.
+    "RESULT_CACHE": None,
+    # Seconds report results are cached for, `None` caches results until the data changes.
+    "RESULT_CACHE_TIMEOUT": 300,
+    # Answer reports from the rollup tables of materialized reports when possible.
+    "USE_ROLLUPS": False,
+    # Maximum number of reports of a dashboard run at the same time.
+    "DASHBOARD_MAX_WORKERS": 4,
+    # Seconds a report job worker waits before checking for new jobs when the queue is empty.
+    "JOB_POLL_INTERVAL": 1.0,
+    # Seconds after the last heartbeat of a running job that its worker is considered gone, and the
+    # job is claimed again. Must exceed the time the slowest chunk of a report takes, `None` never
+    # claims running jobs again.
+    "JOB_TIMEOUT": 600,
+    # Budgets of the estimated cost and rows of report queries run by the rest framework views, `None`
+    # disables a budget. See `django_reports.guard`.
+    "MAX_QUERY_COST": None,
+    "MAX_QUERY_ROWS": None,
+    # What the rest framework views do with reports over budget, "reject" or "defer" to a job.
+    "QUERY_BUDGET_ACTION": "reject",
+}
+
+
+def get_setting(name):
+    """Return the django reports setting `name`."""
+    return getattr(settings, "DJANGO_REPORTS", {}).get(name, DEFAULTS[name])
@@ -0,0 +1,193 @@
+"""Concurrent execution of the reports of a dashboard.
+
+`DashboardRunner` runs a batch of reports on a bounded thread pool, so the latency of a dashboard
+tracks its slowest report rather than the sum of its reports. Every worker thread uses its own
+database connection, which is closed when the report completes. Reports with the same model,
+type, filters and aggregations are run once and share their results.
+
+Reports that do not complete within the timeout of the dashboard, or that are running when the
+dashboard is cancelled, have their running query interrupted (SQLite) or cancelled (PostgreSQL).
+On PostgreSQL the queries of a dashboard are also bounded with `statement_timeout`.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+from django_reports.cache import get_report_results
+from django_reports.conf import get_setting
+from django_reports.incremental import get_definition_key
+from django_reports.structs import Option
+
+
+class Status(str, Option):
+    DONE = "done"
+    FAILED = "failed"
+    TIMED_OUT = "timed out"
+    CANCELLED = "cancelled"
+
+
+class ReportResult(NamedTuple):
+    """The outcome of a dashboard report."""
+
+    report: Any
+    status: Status
+    results: Any = None
+    error: Optional[BaseException] = None
+
+
+class DashboardRunner:
+    """Run the `reports` of a dashboard concurrently.
+
+    `timeout` bounds the seconds every report may take from the start of the dashboard, `None`
+    waits for every report. `max_workers` bounds the number of reports run at the same time.
+    """
+
+    def __init__(
+        self,
+        reports,
+        timeout: Optional[float] = None,
+        max_workers: Optional[int] = None,
+        using: str = DEFAULT_DB_ALIAS,
+    ) -> None:
+        self.reports = list(reports)
+        self.timeout = timeout
+        self.max_workers = max_workers or get_setting("DASHBOARD_MAX_WORKERS")
+        self.using = using
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._futures = []
+        # Signature -> database connection of the running reports.
+        self._connections: Dict[str, Any] = {}
+
+    def run(self) -> List[ReportResult]:
+        """Run the reports and return their results, in the order of the reports."""
+        signatures = [get_definition_key(report) for report in self.reports]
+        reports_by_signature = dict(zip(signatures, self.reports))
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(reports_by_signature) or 1),
+            thread_name_prefix="django_reports_dashboard",
+        )
+
+        try:
+            futures = {
+                signature: executor.submit(
+                    self._run_report, signature, report, deadline
+                )
+                for signature, report in reports_by_signature.items()
+            }
+
+            with self._lock:
+                self._futures = list(futures.values())
+
+            if self._cancelled.is_set():
+                self.cancel()
+
+            _, not_done = wait(futures.values(), timeout=self.timeout)
+
+            for future in not_done:
+                future.cancel()
+
+            self._interrupt_queries()
+        finally:
+            executor.shutdown(wait=False)
+
+        outcomes = {
+            signature: self._get_outcome(future, future in not_done)
+            for signature, future in futures.items()
+        }
+        self._record_runs(
+            report
+            for report, signature in zip(self.reports, signatures)
+            if outcomes[signature][0] == Status.DONE
+        )
+
+        return [
+            ReportResult(report, *outcomes[signature])
+            for report, signature in zip(self.reports, signatures)
+        ]
+
+    def cancel(self) -> None:
+        """Cancel the pending reports and interrupt the running reports."""
+        self._cancelled.set()
+
+        with self._lock:
+            futures = list(self._futures)
+
+        for future in futures:
+            future.cancel()
+
+        self._interrupt_queries()
+
+    @staticmethod
+    def _record_runs(reports) -> None:
+        """Count a run of the saved `reports` with a single query."""
+        from django_reports.models import Report
+
+        report_pks = {report.pk for report in reports if report.pk is not None}
+
+        if report_pks:
+            Report.objects.filter(pk__in=report_pks).update(
+                run_count=models.F("run_count") + 1
+            )
+
+    def _get_outcome(self, future, timed_out: bool):
+        if timed_out:
+            status = Status.CANCELLED if self._cancelled.is_set() else Status.TIMED_OUT
+            return status, None, None
+        elif future.cancelled():
+            return Status.CANCELLED, None, None
+
+        error = future.exception()
+
+        if error is None:
+            return Status.DONE, future.result(), None
+
+        # Queries interrupted by a cancellation fail with a database error.
+        status = Status.CANCELLED if self._cancelled.is_set() else Status.FAILED
+        return status, None, error
+
+    def _run_report(self, signature, report, deadline):
+        connection = connections[self.using]
+
+        try:
+            connection.ensure_connection()
+
+            if connection.vendor == "postgresql" and deadline is not None:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET statement_timeout = %s",
+                        [max(int((deadline - time.monotonic()) * 1000), 1)],
+                    )
+
+            with self._lock:
+                self._connections[signature] = connection
+
+            return get_report_results(report)
+        finally:
+            with self._lock:
+                self._connections.pop(signature, None)
+
+            connections.close_all()
+
+    def _interrupt_queries(self) -> None:
+        # The lock is held while interrupting, so workers that complete in the meantime wait to
+        # close their connection until the interrupt is done.
+        with self._lock:
+            for connection in self._connections.values():
+                interrupt_query(connection)
+
+
+def interrupt_query(connection) -> None:
+    """Abort the query running on the database `connection`, if the backend supports it."""
+    raw_connection = connection.connection
+
+    if raw_connection is None:
+        return
+    elif connection.vendor == "sqlite":
+        raw_connection.interrupt()
+    elif connection.vendor == "postgresql":
+        raw_connection.cancel()
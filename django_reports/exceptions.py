@@ -0,0 +1,14 @@
+"""Django reports exceptions."""
+from typing import Any, Dict, List
+
+
+class QueryCostExceeded(Exception):
+    """The estimated cost of a report query exceeds the query budget.
+
+    `errors` describes every exceeded budget, see `django_reports.guard`.
+    """
+
+    def __init__(self, estimate, errors: List[Dict[str, Any]]) -> None:
+        super().__init__(" ".join(error["message"] for error in errors))
+        self.estimate = estimate
+        self.errors = errors
@@ -0,0 +1,181 @@
+"""Report export encoders.
+
+Encoders turn an iterable of row tuples into an iterable of byte strings. Rows are encoded a batch
+at a time, so an export can be streamed without holding the whole result in memory and without a
+per-row serializer.
+"""
+import csv
+import io
+from itertools import islice
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Tuple,
+)
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from django_reports.conf import get_setting
+from django_reports.instrumentation import Stage, start
+
+
+def iter_batches(rows: Iterable[Tuple], batch_size: int) -> Iterator[List[Tuple]]:
+    """Yield lists of up to `batch_size` rows."""
+    rows = iter(rows)
+
+    while True:
+        batch = list(islice(rows, batch_size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+async def aiter_batches(
+    rows: AsyncIterable[Tuple], batch_size: int
+) -> AsyncIterator[List[Tuple]]:
+    """Async version of `iter_batches`."""
+    batch = []
+
+    async for row in rows:
+        batch.append(row)
+
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+def _get_csv_batch_encoder() -> Callable[[Iterable[Sequence]], bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def encode_batch(batch):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+
+        return buffer.getvalue().encode()
+
+    return encode_batch
+
+
+def _get_ndjson_batch_encoder(columns: Sequence[str]) -> Callable[[List[Tuple]], bytes]:
+    encode = DjangoJSONEncoder().encode
+
+    def encode_batch(batch):
+        return "".join(
+            [f"{encode(dict(zip(columns, row)))}\n" for row in batch]
+        ).encode()
+
+    return encode_batch
+
+
+def _encode_batches(
+    encode_batch: Callable[[List[Tuple]], bytes], batches: Iterable[List[Tuple]]
+) -> Iterator[bytes]:
+    """Encode `batches`, measuring the encoding as the serialization stage."""
+    measurement = start(Stage.SERIALIZATION)
+
+    if measurement is None:
+        yield from map(encode_batch, batches)
+        return
+
+    measurement.row_count = 0
+
+    try:
+        for batch in batches:
+            with measurement:
+                content = encode_batch(batch)
+
+            measurement.row_count += len(batch)
+            yield content
+    finally:
+        measurement.finish()
+
+
+async def _aencode_batches(
+    encode_batch: Callable[[List[Tuple]], bytes],
+    batches: AsyncIterable[List[Tuple]],
+) -> AsyncIterator[bytes]:
+    """Async version of `_encode_batches`."""
+    measurement = start(Stage.SERIALIZATION)
+
+    if measurement is None:
+        async for batch in batches:
+            yield encode_batch(batch)
+        return
+
+    measurement.row_count = 0
+
+    try:
+        async for batch in batches:
+            with measurement:
+                content = encode_batch(batch)
+
+            measurement.row_count += len(batch)
+            yield content
+    finally:
+        measurement.finish()
+
+
+def encode_csv(
+    columns: Sequence[str], rows: Iterable[Tuple], batch_size: int = None
+) -> Iterator[bytes]:
+    """Encode `rows` as CSV, starting with a header row of the `columns`."""
+    encode_batch = _get_csv_batch_encoder()
+
+    yield encode_batch([columns])
+
+    yield from _encode_batches(
+        encode_batch,
+        iter_batches(rows, batch_size or get_setting("RUNNER_CHUNK_SIZE")),
+    )
+
+
+def encode_ndjson(
+    columns: Sequence[str], rows: Iterable[Tuple], batch_size: int = None
+) -> Iterator[bytes]:
+    """Encode `rows` as newline delimited JSON objects keyed by the `columns`."""
+    encode_batch = _get_ndjson_batch_encoder(columns)
+
+    yield from _encode_batches(
+        encode_batch,
+        iter_batches(rows, batch_size or get_setting("RUNNER_CHUNK_SIZE")),
+    )
+
+
+async def aencode_csv(
+    columns: Sequence[str], rows: AsyncIterable[Tuple], batch_size: int = None
+) -> AsyncIterator[bytes]:
+    """Async version of `encode_csv`."""
+    encode_batch = _get_csv_batch_encoder()
+
+    yield encode_batch([columns])
+
+    async for content in _aencode_batches(
+        encode_batch,
+        aiter_batches(rows, batch_size or get_setting("RUNNER_CHUNK_SIZE")),
+    ):
+        yield content
+
+
+async def aencode_ndjson(
+    columns: Sequence[str], rows: AsyncIterable[Tuple], batch_size: int = None
+) -> AsyncIterator[bytes]:
+    """Async version of `encode_ndjson`."""
+    encode_batch = _get_ndjson_batch_encoder(columns)
+
+    async for content in _aencode_batches(
+        encode_batch,
+        aiter_batches(rows, batch_size or get_setting("RUNNER_CHUNK_SIZE")),
+    ):
+        yield content
@@ -1,11 +1,17 @@
-from typing import Any, Dict
+import hashlib
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
 from django import VERSION as DJANGO_VERSION
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
 
+from django_reports.conf import get_setting
 from django_reports.index.models import ModelIndex
-from django_reports.structs import Option
+from django_reports.instrumentation import Stage, instrument
+from django_reports.structs import LRUCache, Option
 
 # Query XOR is not supported for django version < 4.1.
 SUPPORTS_XOR = DJANGO_VERSION[0] > 4 or (
@@ -21,28 +27,421 @@ class Connector(str, Option):
         XOR = "XOR"
 
 
+# Compiled queries and valid filters, keyed by model label and canonical filter key. Compiled queries
+# are also keyed by the current time zone.
+query_cache = LRUCache(maxsize=get_setting("FILTER_CACHE_SIZE"))
+validation_cache = LRUCache(maxsize=get_setting("FILTER_CACHE_SIZE"))
+
+
 class Filter:
     def __init__(self, data, model_index: ModelIndex) -> None:
-        self._query = to_query(data)
+        # The field index is only built when the query is not cached.
+        self._query = compile_query(
+            data, model_index.label, lambda: model_index.field_index
+        )
         self.model_index = model_index
 
+    @instrument(Stage.FILTER)
     def __call__(self, queryset):
         """Filter the report queryset with the initialized query."""
         return queryset.filter(self._query)
 
 
-def to_query(filter_node_data: Dict[str, Any]):
-    if "children" not in filter_node_data:
-        # Leaf node
-        field_lookup_path = filter_node_data["path"]
+def _fold_tree(root, get_children, fold_leaf_node, fold_node):
+    """Fold a tree bottom up using an explicit stack, so trees of any depth can be folded.
+
+    `get_children` returns the children of a node or `None` for leaf nodes, `fold_leaf_node` folds
+    a leaf node and `fold_node` folds a node given the folded values of its children.
+    """
+    folded_root = []
+    # (node, folded siblings, folded children or `None` if the children are not yet folded)
+    stack = [(root, folded_root, None)]
+
+    while stack:
+        node, folded_siblings, folded_children = stack.pop()
+
+        if folded_children is not None:
+            folded_siblings.append(fold_node(node, folded_children))
+            continue
+
+        children = get_children(node)
+
+        if children is None:
+            folded_siblings.append(fold_leaf_node(node))
+            continue
+
+        folded_children = []
+        stack.append((node, folded_siblings, folded_children))
+        stack.extend((child, folded_children, None) for child in reversed(children))
+
+    return folded_root[0]
+
+
+def _get_filter_node_children(filter_node_data):
+    if not isinstance(filter_node_data, dict) or "children" not in filter_node_data:
+        return None
+
+    return filter_node_data.get("children") or []
+
+
+def _fold_filter_data(filter_node_data, fold_leaf_node, fold_node):
+    return _fold_tree(
+        filter_node_data, _get_filter_node_children, fold_leaf_node, fold_node
+    )
+
+
+def get_filter_paths(filter_node_data: Dict[str, Any]) -> Set[str]:
+    """Return the field paths of the leaf nodes of the filter."""
+    return _fold_filter_data(
+        filter_node_data,
+        lambda leaf_node_data: {leaf_node_data["path"]},
+        lambda _, children: set().union(*children),
+    )
+
+
+def get_filter_lookups(filter_node_data: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """Return the `(field path, lookup expression)` pairs of the leaf nodes of the filter.
+
+    The lookup expression of leaf nodes without one is `exact`.
+    """
+    return _fold_filter_data(
+        filter_node_data,
+        lambda leaf_node_data: {
+            (
+                leaf_node_data["path"],
+                leaf_node_data.get("lookup_expression") or "exact",
+            )
+        },
+        lambda _, children: set().union(*children),
+    )
+
+
+def _digest(value: str) -> str:
+    return hashlib.blake2b(value.encode(), digest_size=16).hexdigest()
+
+
+def _get_leaf_node_digest(filter_node_data) -> str:
+    # Only the keys that affect the query are hashed, e.g. the display name is not. The raw values
+    # are hashed, so that invalid data, e.g. a leaf without a value, never shares the key of valid
+    # data the defaults would make it equal to.
+    if not isinstance(filter_node_data, dict):
+        return _digest(repr(filter_node_data))
+
+    return _digest(
+        repr(
+            (
+                filter_node_data.get("path"),
+                filter_node_data.get("lookup_expression"),
+                "value" in filter_node_data,
+                filter_node_data.get("value"),
+            )
+        )
+    )
+
+
+def _get_connector_node_digest(filter_node_data, child_digests) -> str:
+    connector = filter_node_data.get("connector")
+
+    if isinstance(connector, Connector):
+        connector = connector.value
+
+    # Child digests are sorted so that the order of children does not matter.
+    return _digest(
+        repr(
+            (
+                connector,
+                filter_node_data.get("negated", False),
+                ",".join(sorted(child_digests)),
+            )
+        )
+    )
+
+
+def get_filter_key(filter_node_data: Dict[str, Any]) -> str:
+    """Return a hash of the parts of the filter data that affect the query.
+
+    Equivalent filters with differently ordered connector children have the same key.
+    """
+    return _fold_filter_data(
+        filter_node_data, _get_leaf_node_digest, _get_connector_node_digest
+    )
+
+
+def _coerce_leaf_node(filter_node_data, field_index):
+    node = field_index.find(filter_node_data["path"])
+
+    if node is None or "value" not in filter_node_data:
+        return filter_node_data
+
+    return {
+        **filter_node_data,
+        "value": node.field.coerce_lookup_value(
+            filter_node_data.get("lookup_expression"), filter_node_data["value"]
+        ),
+    }
+
+
+def coerce_filter_data(filter_node_data: Dict[str, Any], field_index) -> Dict[str, Any]:
+    """Return the filter data with the values of the leaf nodes converted to the python types of
+    their fields, see `Field.coerce_lookup_value`.
+
+    Leaf nodes of paths that are not indexed keep their values.
+    """
+    return _fold_filter_data(
+        filter_node_data,
+        lambda leaf_node_data: _coerce_leaf_node(leaf_node_data, field_index),
+        lambda filter_node_data, children: {**filter_node_data, "children": children},
+    )
+
+
+def compile_query(
+    filter_node_data: Dict[str, Any],
+    model_label: Optional[str] = None,
+    field_index=None,
+):
+    """Return the (cached) query of the filter data.
+
+    If the `field_index` of the model is given, the leaf values are converted to the python types
+    of their fields first, so invalid values are rejected before the query is built and `in` lists
+    are deduplicated. `field_index` may also be a callable returning the index, which is only
+    called when the query is not cached yet, e.g. to avoid building the index of a model.
+
+    Compiled queries are shared between callers, so they must not be modified.
+    """
+    # Naive datetime values are made aware in the current time zone when they are converted.
+    # Coerced and uncoerced queries of the same filter differ, e.g. in the types of their values,
+    # so whether a field index is given is part of the key. The index itself is identified by
+    # `model_label`.
+    cache_key = (
+        model_label,
+        timezone.get_current_timezone_name() if settings.USE_TZ else None,
+        field_index is not None,
+        get_filter_key(filter_node_data),
+    )
+    query = query_cache.get(cache_key)
+
+    if query is None:
+        if callable(field_index):
+            field_index = field_index()
+
+        if field_index is not None:
+            filter_node_data = coerce_filter_data(filter_node_data, field_index)
+
+        query = to_query(optimize_filter_data(filter_node_data, field_index))
+
+        # The optimized filter may be a single leaf node.
+        if not isinstance(query, models.Q):
+            query = models.Q(query)
+
+        query_cache.set(cache_key, query)
+
+    return query
+
+
+class _OptimizedNode(NamedTuple):
+    data: Dict[str, Any]
+    digest: str
+    # Optimized children of connector nodes, `None` for leaf nodes.
+    children: Optional[List["_OptimizedNode"]]
+
+
+def optimize_filter_data(
+    filter_node_data: Dict[str, Any], field_index=None
+) -> Dict[str, Any]:
+    """Return an equivalent, simplified filter data tree.
+
+    - `AND`/`OR` children with the same connector as their parent are merged into the parent.
+    - Duplicate children of `AND`/`OR` nodes are dropped.
+    - `exact`/`in` leaves on the same path are merged into a single `in` leaf when they are OR'd, or
+      when they are negated and AND'd.
+    - Connector nodes with a single child are replaced by the child.
+
+    `XOR` nodes are kept as is, apart from optimizing their children.
+
+    Django promotes the joins of nullable and multi-valued relations to outer joins, and guards
+    negated lookups on nullable fields with `IS NOT NULL` checks, depending on the shape of the whole
+    tree. So filters with leaves on paths through nullable fields are returned as is, and negations
+    are never pushed down to the leaves (De Morgan). Without the `field_index` of the model every
+    field is assumed to be nullable, so the filter is not optimized.
+    """
+    if any(
+        _is_nullable_path(path, field_index)
+        for path in get_filter_paths(filter_node_data)
+    ):
+        return filter_node_data
+
+    return _fold_filter_data(
+        filter_node_data, _to_optimized_leaf_node, _optimize_connector_node
+    ).data
+
+
+def _is_nullable_path(path: str, field_index) -> bool:
+    """Whether a field on `path` is nullable or a multi-valued relation."""
+    if field_index is None:
+        return True
+
+    field_names = path.split(LOOKUP_SEP)
+
+    for index in range(1, len(field_names) + 1):
+        node = field_index.find(LOOKUP_SEP.join(field_names[:index]))
+
+        if node is None:
+            return True
+
+        model_field = node.field.model_field
 
-        if filter_node_data.get("lookup_expression"):
-            field_lookup_path += f"__{filter_node_data.get('lookup_expression')}"
+        if model_field.null or model_field.many_to_many or model_field.one_to_many:
+            return True
 
-        return (field_lookup_path, filter_node_data["value"])
+    return False
 
-    children = [to_query(child) for child in filter_node_data.get("children", [])]
 
+def _to_optimized_leaf_node(filter_node_data) -> _OptimizedNode:
+    return _OptimizedNode(
+        filter_node_data, _get_leaf_node_digest(filter_node_data), None
+    )
+
+
+def _to_optimized_connector_node(connector, negated, children) -> _OptimizedNode:
+    filter_node_data = {
+        "connector": str(connector),
+        "negated": negated,
+        "children": [child.data for child in children],
+    }
+
+    return _OptimizedNode(
+        filter_node_data,
+        _get_connector_node_digest(
+            filter_node_data, [child.digest for child in children]
+        ),
+        children,
+    )
+
+
+def _optimize_connector_node(filter_node_data, children) -> _OptimizedNode:
+    connector = filter_node_data.get("connector") or Connector.AND
+    negated = filter_node_data.get("negated", False)
+
+    if connector != Connector.XOR and len(children) > 1:
+        flattened_children = []
+
+        for child in children:
+            if (
+                child.children is not None
+                and not child.data.get("negated", False)
+                and child.data["connector"] == connector
+            ):
+                flattened_children.extend(child.children)
+            else:
+                flattened_children.append(child)
+
+        unique_children = {}
+
+        for child in flattened_children:
+            unique_children.setdefault(child.digest, child)
+
+        children = _merge_in_leaf_nodes(list(unique_children.values()), connector)
+
+    if len(children) == 1 and not negated:
+        return children[0]
+
+    return _to_optimized_connector_node(connector, negated, children)
+
+
+def _is_negated_leaf_node(filter_node_data) -> bool:
+    """Whether the node negates a single leaf node, which is how leaf nodes are negated."""
+    return (
+        filter_node_data.get("negated", False)
+        and len(filter_node_data["children"]) == 1
+        and "children" not in filter_node_data["children"][0]
+    )
+
+
+def _merge_in_leaf_nodes(children, connector):
+    """Merge `exact`/`in` leaves on the same path into a single `in` leaf.
+
+    Leaves are merged when they are children of an `OR` node, or negated children of an `AND` node.
+    """
+    negated = connector == Connector.AND
+    leaves_by_path = {}
+
+    for child in children:
+        leaf = _get_mergeable_leaf_node(child.data, negated)
+
+        if leaf is not None:
+            leaves_by_path.setdefault(leaf["path"], []).append(leaf)
+
+    merged_children = []
+    merged_paths = set()
+
+    for child in children:
+        leaf = _get_mergeable_leaf_node(child.data, negated)
+
+        if leaf is None or len(leaves_by_path[leaf["path"]]) == 1:
+            merged_children.append(child)
+        elif leaf["path"] not in merged_paths:
+            merged_paths.add(leaf["path"])
+            values = {}
+
+            for path_leaf in leaves_by_path[leaf["path"]]:
+                for value in _get_in_values(path_leaf):
+                    values.setdefault((type(value), value), value)
+
+            merged_leaf = _to_optimized_leaf_node(
+                {**leaf, "lookup_expression": "in", "value": list(values.values())}
+            )
+            merged_children.append(
+                _to_optimized_connector_node(Connector.AND, True, [merged_leaf])
+                if negated
+                else merged_leaf
+            )
+
+    return merged_children
+
+
+def _get_mergeable_leaf_node(filter_node_data, negated):
+    if negated:
+        if "children" not in filter_node_data or not _is_negated_leaf_node(
+            filter_node_data
+        ):
+            return None
+
+        filter_node_data = filter_node_data["children"][0]
+    elif "children" in filter_node_data:
+        return None
+
+    return filter_node_data if _get_in_values(filter_node_data) is not None else None
+
+
+def _get_in_values(leaf_node_data):
+    """Return the values an `exact`/`in` leaf matches, or `None` for other lookups."""
+    lookup_expression = leaf_node_data.get("lookup_expression") or "exact"
+    value = leaf_node_data.get("value")
+
+    if lookup_expression == "in" and isinstance(value, (list, tuple)):
+        values = value
+    elif lookup_expression == "exact":
+        values = [value]
+    else:
+        return None
+
+    # `None` means `isnull` to `exact` and never matches in `in`, so these leaves are not merged.
+    if any(value is None or isinstance(value, (dict, list)) for value in values):
+        return None
+
+    return values
+
+
+def _to_query_leaf_node(filter_node_data):
+    field_lookup_path = filter_node_data["path"]
+
+    if filter_node_data.get("lookup_expression"):
+        field_lookup_path += f"__{filter_node_data.get('lookup_expression')}"
+
+    return (field_lookup_path, filter_node_data["value"])
+
+
+def _to_query_connector_node(filter_node_data, children):
     return models.Q(
         *children,
         _connector=filter_node_data.get("connector"),
@@ -50,29 +449,98 @@ def to_query(filter_node_data: Dict[str, Any]):
     )
 
 
-def to_dict(filter_query):
-    if isinstance(filter_query, tuple):
-        return filter_query
+@instrument(Stage.QUERY_BUILD)
+def to_query(filter_node_data: Dict[str, Any]):
+    return _fold_filter_data(
+        filter_node_data, _to_query_leaf_node, _to_query_connector_node
+    )
 
-    return {
-        "connector": filter_query.connector,
-        "negated": filter_query.negated,
-        "children": (
-            [to_dict(child) for child in filter_query.children]
-            if filter_query.children
-            else []
-        ),
-    }
+
+def to_dict(filter_query):
+    return _fold_tree(
+        filter_query,
+        lambda query: query.children if isinstance(query, models.Q) else None,
+        lambda query: query,
+        lambda query, children: {
+            "connector": query.connector,
+            "negated": query.negated,
+            "children": children,
+        },
+    )
 
 
+@instrument(Stage.VALIDATION)
 def validate_filter_data(filter_node_data, field_index):
-    """Recursively validate the filter data tree."""
-    if "children" in filter_node_data:
-        _validate_filter_connector_node(filter_node_data)
-        for child_node in filter_node_data["children"]:
-            validate_filter_data(child_node, field_index)
-    else:
-        _validate_filter_leaf_node(filter_node_data, field_index)
+    """Validate the filter data tree in a single pass.
+
+    All errors are raised together, each prefixed with the JSON path of the invalid node, e.g.
+    `$.children[1].children[0]`.
+    """
+    errors = []
+    # (node data, parent stack entry, index in the parent's children)
+    stack = [(filter_node_data, None, None)]
+
+    while stack:
+        entry = stack.pop()
+        node_data = entry[0]
+
+        if not isinstance(node_data, dict):
+            errors.append(
+                ValidationError(
+                    f"{_get_json_path(entry)}: Filter node must be an object.",
+                    code="invalid",
+                )
+            )
+            continue
+
+        is_connector_node = "children" in node_data
+
+        try:
+            if is_connector_node:
+                _validate_filter_connector_node(node_data)
+            else:
+                _validate_filter_leaf_node(node_data, field_index)
+        except ValidationError as error:
+            json_path = _get_json_path(entry)
+            errors.extend(
+                ValidationError(
+                    f"{json_path}: {node_error.message}", code=node_error.code
+                )
+                for node_error in error.error_list
+            )
+
+        if is_connector_node and isinstance(node_data["children"], list):
+            stack.extend(
+                (child_node_data, entry, index)
+                for index, child_node_data in reversed(
+                    list(enumerate(node_data["children"]))
+                )
+            )
+
+    if errors:
+        raise ValidationError(errors)
+
+
+def _get_json_path(entry) -> str:
+    """Return the JSON path of a `validate_filter_data` stack entry."""
+    indexes = []
+
+    while entry[1] is not None:
+        indexes.append(entry[2])
+        entry = entry[1]
+
+    return "$" + "".join(f".children[{index}]" for index in reversed(indexes))
+
+
+def validate_filter(filter_node_data, model_index: ModelIndex):
+    """Validate the filter data against the fields of a model, caching valid filters."""
+    cache_key = (model_index.label, get_filter_key(filter_node_data))
+
+    # Only validity is cached, invalid filters are validated again since the paths in the errors
+    # depend on the order of the children, which the filter key ignores.
+    if not validation_cache.get(cache_key, False):
+        validate_filter_data(filter_node_data, model_index.field_index)
+        validation_cache.set(cache_key, True)
 
 
 def _validate_filter_connector_node(filter_node_data):
@@ -92,7 +560,11 @@ def _validate_filter_connector_node(filter_node_data):
 
 def _validate_filter_leaf_node(filter_node_data, field_index):
     """Validate the data that will be used to filter against a specific field."""
-    field_path = filter_node_data["path"]
+    field_path = filter_node_data.get("path")
+
+    if not field_path or not isinstance(field_path, str):
+        raise ValidationError("'path' is required.", code="required")
+
     index_field = field_index.find(field_path)
 
     if index_field is None:
@@ -101,6 +573,16 @@ def _validate_filter_leaf_node(filter_node_data, field_index):
             code="invalid",
         )
 
-    # Todo: Implement missing validation checks
-    # Validate lookup expression
-    # Validate value for field and lookup expression
+    lookup_expression = filter_node_data.get("lookup_expression")
+
+    if lookup_expression and lookup_expression not in (
+        index_field.field.lookup_expressions
+    ):
+        raise ValidationError(
+            f"'{lookup_expression}' is not a supported lookup of field '{field_path}'.",
+            code="invalid",
+        )
+
+    index_field.field.coerce_lookup_value(
+        lookup_expression, filter_node_data.get("value")
+    )
@@ -0,0 +1,173 @@
+"""Pre-execution cost guard of report queries.
+
+Ad-hoc filters can make a report scan the largest tables of a database, e.g. with `icontains`
+lookups on unindexed fields. The guard asks the database to explain the report query before it
+runs and rejects queries whose estimated cost or rows exceed the budget of the `MAX_QUERY_COST`
+and `MAX_QUERY_ROWS` settings.
+
+Estimates are backend specific:
+
+* PostgreSQL: the total cost and the rows of the root node of `EXPLAIN (FORMAT JSON)`.
+* SQLite has no cost model, so the rows are the rows of the tables `EXPLAIN QUERY PLAN` fully
+  scans, read from their largest row id. The cost is unknown.
+
+Queries of other databases are not estimated and always pass.
+"""
+import json
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from django.db import DatabaseError, connections
+
+from django_reports.conf import get_setting
+from django_reports.exceptions import QueryCostExceeded
+from django_reports.runner import ReportRunner
+
+# e.g. "SCAN tests_book" or "SCAN TABLE tests_book USING INDEX ..." (SQLite < 3.36).
+_SQLITE_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)")
+_SQLITE_NON_TABLE_SCANS = frozenset({"CONSTANT", "SUBQUERY"})
+
+
+class QueryEstimate(NamedTuple):
+    """The estimated cost and rows of a query, `None` if the database does not estimate them."""
+
+    cost: Optional[float]
+    rows: Optional[int]
+    # Tables the query reads in full.
+    full_scans: Tuple[str, ...]
+
+
+def parse_postgresql_plan(plan_data: List[Dict[str, Any]]) -> QueryEstimate:
+    """Return the estimate of a PostgreSQL `EXPLAIN (FORMAT JSON)` plan."""
+    root = plan_data[0]["Plan"]
+    full_scans = []
+    nodes = [root]
+
+    while nodes:
+        node = nodes.pop()
+
+        if node.get("Node Type") == "Seq Scan":
+            full_scans.append(node["Relation Name"])
+
+        nodes.extend(reversed(node.get("Plans", [])))
+
+    return QueryEstimate(root["Total Cost"], root["Plan Rows"], tuple(full_scans))
+
+
+def parse_sqlite_plan(plan: str) -> Tuple[str, ...]:
+    """Return the table aliases fully scanned by an SQLite `EXPLAIN QUERY PLAN` plan."""
+    return tuple(
+        alias
+        for alias in _SQLITE_SCAN.findall(plan)
+        if alias not in _SQLITE_NON_TABLE_SCANS
+    )
+
+
+def _estimate_sqlite_query(queryset) -> QueryEstimate:
+    connection = connections[queryset.db]
+    alias_map = queryset.query.alias_map
+    full_scans = tuple(
+        alias_map[alias].table_name if alias in alias_map else alias
+        for alias in parse_sqlite_plan(queryset.explain())
+    )
+    rows = 0
+
+    with connection.cursor() as cursor:
+        for table_name in full_scans:
+            try:
+                cursor.execute(
+                    f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table_name)}"
+                )
+            except DatabaseError:
+                continue
+
+            rows += cursor.fetchone()[0] or 0
+
+    return QueryEstimate(None, rows, full_scans)
+
+
+def estimate_query(queryset) -> QueryEstimate:
+    """Return the estimated cost and rows of `queryset`."""
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        return parse_postgresql_plan(json.loads(queryset.explain(format="json")))
+    elif vendor == "sqlite":
+        return _estimate_sqlite_query(queryset)
+
+    return QueryEstimate(None, None, ())
+
+
+def get_budget_errors(
+    estimate: QueryEstimate,
+    max_cost: Optional[float] = None,
+    max_rows: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Return a description of every budget the `estimate` exceeds."""
+    errors = []
+    scans = (
+        f" The query reads all rows of {', '.join(estimate.full_scans)}."
+        if estimate.full_scans
+        else ""
+    )
+
+    if max_cost is not None and estimate.cost is not None and estimate.cost > max_cost:
+        errors.append(
+            {
+                "code": "max_cost",
+                "message": f"The estimated query cost {estimate.cost:g} exceeds the budget of "
+                f"{max_cost:g}.{scans}",
+                "estimate": estimate.cost,
+                "budget": max_cost,
+                "full_scans": list(estimate.full_scans),
+            }
+        )
+
+    if max_rows is not None and estimate.rows is not None and estimate.rows > max_rows:
+        errors.append(
+            {
+                "code": "max_rows",
+                "message": f"The estimated {estimate.rows} query rows exceed the budget of "
+                f"{max_rows}.{scans}",
+                "estimate": estimate.rows,
+                "budget": max_rows,
+                "full_scans": list(estimate.full_scans),
+            }
+        )
+
+    return errors
+
+
+def get_report_query(report):
+    """Return the queryset of the query that runs `report`."""
+    runner = ReportRunner(report)
+
+    # The aggregate query of summary reports is not a queryset, its cost is dominated by reading
+    # the filtered rows.
+    return report.get_queryset() if runner.is_summary else runner.get_queryset()
+
+
+def check_report_cost(
+    report, max_cost: Optional[float] = None, max_rows: Optional[int] = None
+) -> Optional[QueryEstimate]:
+    """Raise `QueryCostExceeded` if the query of `report` is estimated to exceed the budget.
+
+    The budget defaults to the `MAX_QUERY_COST` and `MAX_QUERY_ROWS` settings. Return the estimate,
+    or `None` without querying the database if there is no budget.
+    """
+    if max_cost is None:
+        max_cost = get_setting("MAX_QUERY_COST")
+
+    if max_rows is None:
+        max_rows = get_setting("MAX_QUERY_ROWS")
+
+    if max_cost is None and max_rows is None:
+        return None
+
+    estimate = estimate_query(get_report_query(report))
+    errors = get_budget_errors(estimate, max_cost, max_rows)
+
+    if errors:
+        raise QueryCostExceeded(estimate, errors)
+
+    return estimate
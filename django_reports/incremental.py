@@ -0,0 +1,330 @@
+"""Incremental refresh of summary and chart reports.
+
+The aggregate state of a report is stored in its `ReportState` together with a high-water mark:
+the largest value of an ever increasing field (an auto-increment primary key, or else a
+`DateTimeField`) among the rows aggregated so far. A refresh aggregates only the rows past the
+high-water mark and merges them into the state, so its cost depends on the number of rows added
+since the last refresh rather than the size of the table.
+
+Only rows that are added are picked up. Reports over tables whose rows are updated or deleted, or
+whose high-water mark field is not strictly increasing in commit order, should be rebuilt in full
+from time to time with `refresh_report(report, full=True)`.
+"""
+import datetime
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+
+from django_reports.aggregator import Function, get_column_lookup_path
+from django_reports.index import fields
+from django_reports.index.models import ModelIndex
+
+# Name of the high-water mark annotation of the partial aggregate queries.
+WATERMARK = "_watermark"
+
+# Partial aggregates each metric function is computed from, and how they are merged.
+partial_functions = {
+    Function.COUNT: (("count", models.Count),),
+    Function.SUM: (("sum", models.Sum),),
+    Function.MIN: (("min", models.Min),),
+    Function.MAX: (("max", models.Max),),
+    Function.AVG: (("sum", models.Sum), ("count", models.Count)),
+}
+
+
+def _merge_sum(value, other):
+    if value is None or other is None:
+        return other if value is None else value
+
+    return value + other
+
+
+def _merge_min(value, other):
+    if value is None or other is None:
+        return other if value is None else value
+
+    return min(value, other)
+
+
+def _merge_max(value, other):
+    if value is None or other is None:
+        return other if value is None else value
+
+    return max(value, other)
+
+
+merge_functions = {
+    "count": _merge_sum,
+    "sum": _merge_sum,
+    "min": _merge_min,
+    "max": _merge_max,
+}
+
+
+def get_watermark_field(model_index: ModelIndex) -> Optional[str]:
+    """Return the name of the high-water mark field of the indexed model, if it has one.
+
+    This is the primary key if it is auto-incremented, or else the first `DateTimeField`,
+    preferring fields set when rows are created (`auto_now_add`).
+    """
+    pk = model_index.field_index.model._meta.pk
+
+    if isinstance(pk, models.fields.AutoFieldMixin):
+        return pk.name
+
+    datetime_fields = [
+        node.field.model_field
+        for node in model_index.field_index.root.children
+        if isinstance(node.field, fields.DateTimeField)
+    ]
+    datetime_fields.sort(key=lambda model_field: not model_field.auto_now_add)
+
+    return datetime_fields[0].name if datetime_fields else None
+
+
+def supports_incremental_refresh(report) -> bool:
+    """Return whether `report` can be refreshed incrementally."""
+    return (
+        report.type in (report.Type.SUMMARY, report.Type.CHART)
+        and all(
+            not metric_data.get("distinct")
+            for metric_data in report.aggregations.get("metrics", [])
+        )
+        and get_watermark_field(report.model_index) is not None
+    )
+
+
+def get_definition_key(report) -> str:
+    """Return a hash of the parts of `report` its aggregate state depends on."""
+    definition = json.dumps(
+        [report.model_label, report.type, report.filters, report.aggregations],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+
+    return hashlib.blake2b(definition.encode(), digest_size=16).hexdigest()
+
+
+class _Partials:
+    """The partial aggregates of the metrics of a report."""
+
+    def __init__(self, report) -> None:
+        self.queryset = report.get_queryset()
+        # Summary reports aggregate all rows into a single group.
+        self.columns = [
+            get_column_lookup_path(column_data)
+            for column_data in report.aggregations.get("columns", [])
+            if report.type != report.Type.SUMMARY
+        ]
+
+        self.metrics = report.aggregations.get("metrics", [])
+        self.watermark_field = get_watermark_field(report.model_index)
+        # Partial aggregate name, e.g. `_sum_revenue` -> (partial name, aggregate)
+        self.aggregates = {
+            f"_{partial_name}_{metric_data['name']}": (
+                partial_name,
+                aggregate(metric_data.get("path") or "pk"),
+            )
+            for metric_data in self.metrics
+            for partial_name, aggregate in partial_functions[
+                Function(metric_data["function"])
+            ]
+        }
+        self.output_fields = {
+            name: self._get_output_field(expression)
+            for name, expression in (
+                *((column, models.F(column)) for column in self.columns),
+                *(
+                    (name, aggregate)
+                    for name, (_, aggregate) in self.aggregates.items()
+                ),
+                (WATERMARK, models.F(self.watermark_field)),
+            )
+        }
+
+    def _get_output_field(self, expression) -> models.Field:
+        return expression.resolve_expression(
+            self.queryset.model._default_manager.all().query
+        ).output_field
+
+    def to_python(self, name, value):
+        return None if value is None else self.output_fields[name].to_python(value)
+
+    @staticmethod
+    def to_json(value):
+        """Return `value` as stored in the state, which restores it with `to_python`."""
+        # `DjangoJSONEncoder` truncates times to milliseconds, which would make the high-water mark
+        # fall behind rows already aggregated, so they are stored with their microseconds.
+        if isinstance(value, (datetime.datetime, datetime.time)):
+            return value.isoformat()
+
+        return value
+
+    def compute(self, watermark) -> Tuple[Dict[Tuple, Dict[str, Any]], Any]:
+        """Aggregate the rows past `watermark`.
+
+        Return the partial aggregates of each group, keyed by the group's column values, and the
+        new high-water mark.
+        """
+        queryset = self.queryset
+
+        if watermark is not None:
+            queryset = queryset.filter(**{f"{self.watermark_field}__gt": watermark})
+
+        aggregates = {
+            name: aggregate for name, (_, aggregate) in self.aggregates.items()
+        }
+        aggregates[WATERMARK] = models.Max(self.watermark_field)
+
+        if self.columns:
+            rows = queryset.values(*self.columns).annotate(**aggregates).order_by()
+        else:
+            rows = [queryset.aggregate(**aggregates)]
+
+        groups = {}
+        new_watermark = None
+
+        for row in rows:
+            if row[WATERMARK] is None:
+                # An aggregate over no rows.
+                continue
+
+            new_watermark = _merge_max(new_watermark, row[WATERMARK])
+            groups[tuple(row[column] for column in self.columns)] = {
+                name: row[name] for name in self.aggregates
+            }
+
+        return groups, new_watermark
+
+    def merge(self, groups, other_groups):
+        """Merge the partial aggregates of `other_groups` into `groups`."""
+        for key, other_partials in other_groups.items():
+            partials = groups.get(key)
+
+            if partials is None:
+                groups[key] = other_partials
+                continue
+
+            for name, (partial_name, _) in self.aggregates.items():
+                partials[name] = merge_functions[partial_name](
+                    partials[name], other_partials[name]
+                )
+
+        return groups
+
+    def to_state(self, groups) -> List:
+        return [
+            [
+                [self.to_json(value) for value in key],
+                {name: self.to_json(value) for name, value in partials.items()},
+            ]
+            for key, partials in groups.items()
+        ]
+
+    def from_state(self, state) -> Dict[Tuple, Dict[str, Any]]:
+        return {
+            tuple(
+                self.to_python(column, value)
+                for column, value in zip(self.columns, key)
+            ): {name: self.to_python(name, value) for name, value in partials.items()}
+            for key, partials in state
+        }
+
+    def get_results(self, groups):
+        """Return the metric values of the groups, in the shape of `Report.get_results`."""
+        rows = []
+
+        for key, partials in sorted(groups.items(), key=_sort_key):
+            row = dict(zip(self.columns, key))
+
+            for metric_data in self.metrics:
+                name = metric_data["name"]
+
+                if metric_data["function"] == Function.AVG:
+                    row[name] = get_average(
+                        partials[f"_sum_{name}"], partials[f"_count_{name}"]
+                    )
+                else:
+                    partial_name = metric_data["function"]
+                    row[name] = partials[f"_{partial_name}_{name}"]
+
+            rows.append(row)
+
+        if not self.columns:
+            return rows[0] if rows else self._get_empty_summary()
+
+        return rows
+
+    def _get_empty_summary(self):
+        return {
+            metric_data["name"]: 0
+            if metric_data["function"] == Function.COUNT
+            else None
+            for metric_data in self.metrics
+        }
+
+
+def _sort_key(item):
+    # Order groups by their column values, with `None` values first.
+    return tuple((value is not None, value) for value in item[0])
+
+
+def get_average(value_sum, count):
+    # Like the database average, decimal fields average to a decimal and others to a float.
+    return value_sum / count if count else None
+
+
+@transaction.atomic
+def refresh_report(report, full: bool = False):
+    """Aggregate the rows added since the last refresh of `report` into its state.
+
+    The state is rebuilt from all rows when `full` is set, when the report has no state yet or
+    when the report changed since the state was built. Return the `ReportState` of the report.
+    """
+    from django_reports.models import ReportState
+
+    if not supports_incremental_refresh(report):
+        raise ValueError(
+            f"Report '{report.name}' does not support incremental refresh."
+        )
+
+    partials = _Partials(report)
+    definition_key = get_definition_key(report)
+    report_state, created = ReportState.objects.select_for_update().get_or_create(
+        report=report, defaults={"definition_key": definition_key}
+    )
+
+    if full or created or report_state.definition_key != definition_key:
+        groups, watermark = partials.compute(watermark=None)
+    else:
+        watermark = partials.to_python(WATERMARK, report_state.watermark)
+        groups, new_watermark = partials.compute(watermark)
+        groups = partials.merge(partials.from_state(report_state.state), groups)
+        watermark = _merge_max(watermark, new_watermark)
+
+    report_state.definition_key = definition_key
+    report_state.state = partials.to_state(groups)
+    report_state.watermark = partials.to_json(watermark)
+    report_state.save()
+
+    return report_state
+
+
+def get_incremental_results(report, refresh: bool = True):
+    """Return the results of `report` computed from its aggregate state.
+
+    The state is refreshed first unless `refresh` is unset.
+    """
+    from django_reports.models import ReportState
+
+    partials = _Partials(report)
+
+    if refresh:
+        report_state = refresh_report(report)
+    else:
+        report_state = ReportState.objects.get(report=report)
+
+    return partials.get_results(partials.from_state(report_state.state))
@@ -1,40 +1,300 @@
-"""Classes and utilities for indexing Django model fields."""
-from functools import cached_property
-from typing import Optional, Sequence, Tuple, Type
-
+"""Classes and utilities for indexing Django model fields.
+
+Indexes of large schemas hold many nodes and fields, so the classes in this module use `__slots__`
+instead of per-instance dictionaries.
+"""
+import datetime
+import decimal
+import math
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple, Type
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Transform
+from django.db.models.constants import LOOKUP_SEP
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+# Lookups that match text patterns, their values are not coerced to the type of the field.
+pattern_lookups = frozenset(
+    {
+        "contains",
+        "icontains",
+        "startswith",
+        "istartswith",
+        "endswith",
+        "iendswith",
+        "regex",
+        "iregex",
+    }
+)
 
 
 class ChoiceFieldMixin:
-    _field: models.Field
+    # The choice variants created by `get_choice_field_class` hold the `_choice_values` slot, slots
+    # of the mixin would conflict with those of the index field classes.
+    __slots__ = ()
 
-    @cached_property
+    model_field: models.Field
+    value_type: str
+    _choice_values: FrozenSet[Any]
+
+    @property
     def choices(self) -> Sequence[Tuple[str, str]]:
-        return self._field.choices
+        return self.model_field.choices
+
+    @property
+    def choice_values(self) -> FrozenSet[Any]:
+        """The values of the (grouped) choices, computed once per index field."""
+        try:
+            return self._choice_values
+        except AttributeError:
+            self._choice_values = frozenset(
+                value for value, _ in self.model_field.flatchoices
+            )
+
+            return self._choice_values
+
+    def to_python(self, value):
+        value = super().to_python(value)
+
+        if value not in self.choice_values:
+            raise ValueError(value)
+
+        return value
+
+    def get_value_error(self, value) -> Optional[str]:
+        try:
+            python_value = super().to_python(value)
+        except (TypeError, ValueError):
+            return f"{value!r} is not a valid {self.value_type}."
+
+        if python_value not in self.choice_values:
+            return f"{value!r} is not a valid choice."
+
+        return None
+
+
+def derive_lookup_expressions(
+    model_field_class: Type[models.Field],
+) -> FrozenSet[str]:
+    """Return the lookup expressions django supports for fields of `model_field_class`.
+
+    Transforms, e.g. the `year` of date fields, are supported on their own and combined with the
+    lookups of their output field, e.g. `year__gte`. `isnull` is left out since it only applies to
+    nullable fields.
+    """
+    lookup_expressions = set()
+
+    for name, lookup in model_field_class.get_lookups().items():
+        lookup_expressions.add(name)
+
+        if issubclass(lookup, Transform):
+            output_field = getattr(lookup, "output_field", None)
+            transform_lookups = {
+                **(
+                    output_field.get_lookups()
+                    if isinstance(output_field, models.Field)
+                    else {}
+                ),
+                **lookup.get_lookups(),
+            }
+            lookup_expressions.update(
+                f"{name}{LOOKUP_SEP}{transform_lookup_name}"
+                for transform_lookup_name, transform_lookup in transform_lookups.items()
+                if not issubclass(transform_lookup, Transform)
+                and transform_lookup_name != "isnull"
+            )
+
+    lookup_expressions.discard("isnull")
+
+    return frozenset(lookup_expressions)
 
 
 class Field:
+    __slots__ = ("model_field",)
+
+    # The django field class the lookup expressions of the index field are derived from.
+    model_field_class: Type[models.Field] = models.Field
+    # Lookup expressions supported in addition to those of `model_field_class`.
+    extra_lookup_expressions: FrozenSet[str] = frozenset()
+    # Describes the values of the field in validation errors.
+    value_type = "value"
+
     def __init__(self, model_field, **kwargs) -> None:
         self.model_field = model_field
 
-    @cached_property
+    @classmethod
+    def get_lookup_expressions(cls, nullable: bool = False) -> FrozenSet[str]:
+        """Return the lookup expressions supported by fields of this class.
+
+        The lookup expressions are derived the first time they are needed, after apps registered
+        their custom lookups, and stored on the class.
+        """
+        lookup_tables = cls.__dict__.get("_lookup_tables")
+
+        if lookup_tables is None:
+            lookup_expressions = (
+                derive_lookup_expressions(cls.model_field_class)
+                | cls.extra_lookup_expressions
+            )
+            lookup_tables = cls._lookup_tables = (
+                lookup_expressions,
+                lookup_expressions | {"isnull"},
+            )
+
+        return lookup_tables[nullable]
+
+    @property
+    def lookup_expressions(self) -> FrozenSet[str]:
+        """The lookup expressions supported by the field, `isnull` only if it is nullable."""
+        return self.get_lookup_expressions(self.model_field.null)
+
+    @classmethod
+    def get_transform_field(cls, transform_name: str) -> Optional["Field"]:
+        """Return the index field of the values compared with the transform, e.g. the integer
+        field of the `year` of dates, or `None` if `transform_name` is not a transform.
+
+        Values of transforms without a known output field are not coerced.
+        """
+        transform_fields = cls.__dict__.get("_transform_fields")
+
+        if transform_fields is None:
+            transform_fields = cls._transform_fields = {}
+
+        try:
+            return transform_fields[transform_name]
+        except KeyError:
+            pass
+
+        transform_field = None
+        transform = cls.model_field_class.get_lookups().get(transform_name)
+
+        if transform is not None and issubclass(transform, Transform):
+            output_field = getattr(transform, "output_field", None)
+
+            try:
+                transform_field = to_model_index_field(output_field)
+            except KeyError:
+                transform_field = Field(None)
+
+        return transform_fields.setdefault(transform_name, transform_field)
+
+    @property
+    def value_field(self) -> "Field":
+        """The index field the filter values of the field are coerced by."""
+        return self
+
+    def to_python(self, value):
+        """Return the filter value converted to the python type of the field.
+
+        Raise `TypeError` or `ValueError` if it is not a valid value of the field.
+        """
+        if isinstance(value, (dict, list)):
+            raise TypeError(value)
+
+        return value
+
+    def get_value_error(self, value) -> Optional[str]:
+        """Return why `value` is not a valid value of the field, `None` if it is valid."""
+        try:
+            self.to_python(value)
+        except (TypeError, ValueError):
+            return f"{value!r} is not a valid {self.value_type}."
+
+        return None
+
+    def coerce_value(self, value):
+        """Return the filter value converted to the python type of the field."""
+        try:
+            return self.to_python(value)
+        except (TypeError, ValueError):
+            raise ValidationError(self.get_value_error(value), code="invalid") from None
+
+    def coerce_values(self, values) -> List[Any]:
+        """Return the filter values converted to the python type of the field in one pass,
+        deduplicated and sorted.
+
+        The `ValidationError` of invalid values lists every invalid value with its index.
+        """
+        if not isinstance(values, (list, tuple)):
+            raise ValidationError(f"{values!r} is not a list.", code="invalid")
+
+        try:
+            coerced_values = set(map(self.to_python, values))
+        except (TypeError, ValueError):
+            raise ValidationError(
+                [
+                    ValidationError(f"Index {index}: {error}", code="invalid")
+                    for index, error in enumerate(map(self.get_value_error, values))
+                    if error is not None
+                ]
+            ) from None
+
+        try:
+            return sorted(coerced_values)
+        except TypeError:
+            # Values of fields that are not coerced may not be comparable.
+            return list(coerced_values)
+
+    def coerce_lookup_value(self, lookup_expression: Optional[str], value):
+        """Return the filter value of `lookup_expression` converted to the python type it is
+        compared with.
+
+        Transforms change the type, e.g. `year__in` compares integers. The values of `in` lookups
+        are deduplicated and sorted, those of `range` lookups keep their order. Values of pattern
+        lookups and `None` values of `exact` lookups, which django turns into `isnull`, are not
+        converted.
+        """
+        field = self.value_field
+        lookup_names = lookup_expression.split(LOOKUP_SEP) if lookup_expression else ()
+        lookup_name = lookup_names[-1] if lookup_names else "exact"
+
+        if lookup_names:
+            transform_field = field.get_transform_field(lookup_names[0])
+
+            if transform_field is not None:
+                field = transform_field
+                lookup_name = lookup_names[1] if len(lookup_names) > 1 else "exact"
+
+        if lookup_name in pattern_lookups or (value is None and lookup_name == "exact"):
+            return value
+        elif lookup_name == "isnull":
+            return _isnull_field.coerce_value(value)
+        elif lookup_name == "in":
+            return field.coerce_values(value)
+        elif lookup_name == "range":
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise ValidationError(
+                    f"{value!r} is not a list of two values.", code="invalid"
+                )
+
+            return [field.coerce_value(value[0]), field.coerce_value(value[1])]
+
+        return field.coerce_value(value)
+
+    @property
     def name(self) -> str:
         return self.model_field.name
 
-    @cached_property
+    @property
     def is_relation(self) -> bool:
         return self.model_field.is_relation
 
-    @cached_property
+    @property
     def related_model(self) -> Optional[Type[models.Model]]:
         return self.model_field.related_model
 
-    def __new__(cls, *args, **kwargs):
+    def __new__(cls, model_field, **kwargs):
         """Create a choice variant of the index field if the model field has choices."""
-        if kwargs.get("model_field", {}).get("choices") is not None:
-            return type(f"{cls.__name__[-5:]}ChoiceField", (ChoiceFieldMixin, cls), {})(
-                *args, **kwargs
-            )
+        if getattr(model_field, "choices", None) and not issubclass(
+            cls, ChoiceFieldMixin
+        ):
+            cls = get_choice_field_class(cls)
 
         return super().__new__(cls)
 
@@ -42,58 +302,237 @@ class Field:
         return str(self.model_field)
 
 
-# Todo: Conditionally include expressions like "isnull" when the field is nullable.
+_choice_field_classes: Dict[Type[Field], Type[Field]] = {}
+
+
+def get_choice_field_class(index_class: Type[Field]) -> Type[Field]:
+    """Return the choice variant of `index_class`, e.g. `CharChoiceField` for `CharField`."""
+    try:
+        return _choice_field_classes[index_class]
+    except KeyError:
+        return _choice_field_classes.setdefault(
+            index_class,
+            type(
+                f"{index_class.__name__[:-5]}ChoiceField",
+                (ChoiceFieldMixin, index_class),
+                {"__slots__": ("_choice_values",)},
+            ),
+        )
+
+
 class CharField(Field):
-    lookup_expressions = {
-        "in",
-        "contains",
-        "icontains",
-        "exact",
-        "iexact",
-        "startswith",
-        "endswith",
-    }
+    __slots__ = ()
+
+    model_field_class = models.CharField
+    value_type = "string"
+
+    def to_python(self, value):
+        if isinstance(value, str):
+            return value
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+
+        raise TypeError(value)
 
 
 class ForeignKeyField(Field):
-    lookup_expressions = {"pk", "pk__in", "isnull"}
+    __slots__ = ()
+
+    model_field_class = models.ForeignKey
+    extra_lookup_expressions = frozenset({"pk", "pk__in"})
+
+    @property
+    def value_field(self) -> Field:
+        """The index field of the related field, foreign keys are filtered by its values."""
+        try:
+            return to_model_index_field(self.model_field.target_field)
+        except KeyError:
+            return self
 
 
 class IntegerField(Field):
-    pass
+    __slots__ = ()
+
+    model_field_class = models.IntegerField
+    value_type = "integer"
+
+    def to_python(self, value):
+        if isinstance(value, bool) or (
+            isinstance(value, float) and not value.is_integer()
+        ):
+            raise ValueError(value)
+
+        return int(value)
+
+
+class FloatField(Field):
+    __slots__ = ()
+
+    model_field_class = models.FloatField
+    value_type = "number"
+
+    def to_python(self, value):
+        if isinstance(value, bool):
+            raise ValueError(value)
+
+        value = float(value)
+
+        if not math.isfinite(value):
+            raise ValueError(value)
+
+        return value
+
+
+class DecimalField(Field):
+    __slots__ = ()
+
+    model_field_class = models.DecimalField
+    value_type = "decimal number"
+
+    def to_python(self, value):
+        if isinstance(value, bool):
+            raise ValueError(value)
+
+        try:
+            value = decimal.Decimal(value if isinstance(value, str) else str(value))
+        except decimal.InvalidOperation:
+            raise ValueError(value) from None
+
+        if not value.is_finite():
+            raise ValueError(value)
+
+        return value
+
+
+# Filter values of boolean fields, the numbers `1` and `0` match the `True` and `False` keys.
+_boolean_values: Dict[Any, bool] = {
+    True: True,
+    False: False,
+    "true": True,
+    "false": False,
+    "True": True,
+    "False": False,
+    "1": True,
+    "0": False,
+}
 
 
 class BooleanField(Field):
-    pass
+    __slots__ = ()
+
+    model_field_class = models.BooleanField
+    value_type = "boolean"
+
+    def to_python(self, value):
+        try:
+            return _boolean_values[value]
+        except KeyError:
+            raise ValueError(value) from None
+
+
+def _parse_date(value) -> datetime.date:
+    date = parse_date(value)
+
+    if date is None:
+        raise ValueError(value)
+
+    return date
 
 
 class DateField(Field):
-    pass
+    __slots__ = ()
+
+    model_field_class = models.DateField
+    value_type = "date"
+
+    def to_python(self, value):
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        elif isinstance(value, datetime.date):
+            return value
+
+        return _parse_date(value)
 
 
 class DateTimeField(Field):
-    pass
+    __slots__ = ()
+
+    model_field_class = models.DateTimeField
+    value_type = "datetime"
+
+    def to_python(self, value):
+        if isinstance(value, datetime.datetime):
+            date_time = value
+        elif isinstance(value, datetime.date):
+            date_time = datetime.datetime.combine(value, datetime.time())
+        else:
+            date_time = parse_datetime(value)
+
+            if date_time is None:
+                # Dates are the start of the day, as in django forms.
+                date_time = datetime.datetime.combine(
+                    _parse_date(value), datetime.time()
+                )
 
+        # Convert values to the time zone support of the project, as django does not compare
+        # naive with aware datetimes.
+        if settings.USE_TZ and timezone.is_naive(date_time):
+            return timezone.make_aware(date_time)
+        elif not settings.USE_TZ and timezone.is_aware(date_time):
+            return timezone.make_naive(date_time)
+
+        return date_time
+
+
+# Coerces the values of `isnull` lookups.
+_isnull_field = BooleanField(models.BooleanField())
 
 model_field_map = {
+    models.BooleanField: BooleanField,
     models.CharField: CharField,
     models.ForeignKey: ForeignKeyField,
     models.IntegerField: IntegerField,
+    models.FloatField: FloatField,
+    models.DecimalField: DecimalField,
     models.DateField: DateField,
     models.DateTimeField: DateTimeField,
 }
 
 
 def to_model_index_field(model_field):
-    for field_class, index_class in model_field_map.items():
-        if isinstance(model_field, field_class):
+    # Match the most specific mapped class so that, for example, a `DateTimeField` is not indexed
+    # as its `DateField` base class.
+    for field_class in type(model_field).__mro__:
+        index_class = model_field_map.get(field_class)
+
+        if index_class is not None:
             return index_class(model_field)
 
     # Todo: Replace this with appropriate exception
     raise KeyError
 
 
+# Model label -> `(field name, index class name)` pairs of the indexed model fields, loaded from a
+# precomputed snapshot (see `django_reports.index.snapshot`).
+index_field_snapshot: Dict[str, Sequence[Tuple[str, str]]] = {}
+
+
 def get_model_index_fields(model):
+    snapshot_fields = model._meta.apps is apps and index_field_snapshot.get(
+        model._meta.label
+    )
+
+    if snapshot_fields:
+        index_classes = {
+            index_class.__name__: index_class
+            for index_class in model_field_map.values()
+        }
+
+        return [
+            index_classes[index_class_name](model._meta.get_field(field_name))
+            for field_name, index_class_name in snapshot_fields
+        ]
+
     index_fields = []
 
     for field in model._meta.get_fields():
@@ -105,92 +544,264 @@ def get_model_index_fields(model):
     return index_fields
 
 
+# Guards the one-off expansion of lazy nodes, which may be shared between threads.
+_expand_lock = threading.RLock()
+
+# Incremented whenever nodes that may have been resolved by a tree change, so trees drop the nodes
+# they resolved. Building new nodes, including lazy expansion, leaves it unchanged.
+_mutation_count = 0
+
+
+def _count_mutation():
+    global _mutation_count
+    _mutation_count += 1
+
+
+# Children lookup of nodes without children, shared to avoid an empty dictionary per leaf node.
+_NO_CHILDREN = MappingProxyType({})
+
+
 class FieldTreeNode:
+    __slots__ = ("key", "field", "_children", "_children_by_key", "_source")
+
     def __init__(self, field=None, **kwargs) -> None:
         self.key = field and field.name
         self.field = field
-        self.lookup_path = kwargs.get("lookup_path", "")
-        self.children = kwargs.get("children", [])
+        self._children = ()
+        self._children_by_key = _NO_CHILDREN
+        # The node whose children are used as the children of this node, or a callable returning
+        # that node which is called the first time the children are accessed.
+        self._source = kwargs.get("expand")
+
+        if kwargs.get("children"):
+            self.set_children(kwargs["children"])
+
+    def _resolve(self) -> "FieldTreeNode":
+        """Return the node that holds the children of this node."""
+        source = self._source
+
+        if source is None:
+            return self
+        elif isinstance(source, FieldTreeNode):
+            return source
+
+        with _expand_lock:
+            if not isinstance(self._source, FieldTreeNode):
+                self._source = self._source()
+
+        return self._source
+
+    @property
+    def children(self) -> Tuple["FieldTreeNode", ...]:
+        return self._resolve()._children
+
+    @property
+    def is_expanded(self):
+        return self._source is None or isinstance(self._source, FieldTreeNode)
 
     @property
     def is_leaf_node(self):
         return not self.children
 
+    def get(self, key):
+        """Return the child node with `key` or `None` if there is no such child."""
+        return self._resolve()._children_by_key.get(key)
+
+    def set_children(self, nodes):
+        """Replace the children of this node with `nodes`."""
+        node = self._resolve()
+
+        if node._children:
+            _count_mutation()
+
+        node._children = tuple(nodes)
+        node._children_by_key = {
+            child_node.key: child_node for child_node in node._children
+        }
+
     def add(self, node):
         """Add a child `node`."""
-        self.children.append(node)
+        self.set_children((*self.children, node))
 
     def remove(self, child_node):
         """Prune `child_node`."""
-        self.children.remove(child_node)
+        if child_node not in self.children:
+            raise ValueError(f"{child_node} is not a child of {self}.")
+
+        self.set_children([node for node in self.children if node is not child_node])
+
+    def share_children(self, node):
+        """Use the children of `node` as the children of this node.
+
+        Changes to the children of either node are visible from both.
+        """
+        if self._source is not None or self._children:
+            _count_mutation()
+
+        self._source = node._resolve()
+        self._children = ()
+        self._children_by_key = _NO_CHILDREN
 
     def __str__(self) -> str:
-        return f"<{self.key} ({self.lookup_path}): {', '.join(str(child) for child in self.children)}>"
+        return f"<{self.key}: {', '.join(str(child.key) for child in self.children)}>"
 
 
 class FieldTree:
-    """An tree structured index of model fields."""
+    """An tree structured index of model fields.
 
-    def __init__(self, root) -> None:
+    Nodes are shared by every path that reaches the same model, so the index is a graph of
+    `models x fields` nodes. Paths are resolved by traversal, which hides relations back to a model
+    already on the path and relations deeper than `max_depth`.
+    """
+
+    def __init__(self, root, model=None, max_depth: Optional[int] = None) -> None:
         self.root = root
+        self.model = model
+        self.max_depth = max_depth
+        # Flat `lookup_path` -> node map of the paths that have been looked up so far, dropped when
+        # nodes change, see `_mutation_count`.
+        self._nodes_by_path = {"": root}
+        self._mutation_count = _mutation_count
 
     def find(self, path):
+        """Return the node at `path` or `None` if it does not exist.
+
+        `path` is either a sequence of node keys or a django style lookup path (`a__b__c`).
+        """
+        if isinstance(path, str):
+            lookup_path = path
+            keys = path.split(LOOKUP_SEP) if path else ()
+        else:
+            keys = path
+            lookup_path = LOOKUP_SEP.join(keys)
+
+        if self._mutation_count != _mutation_count:
+            self._nodes_by_path = {"": self.root}
+            self._mutation_count = _mutation_count
+
+        try:
+            return self._nodes_by_path[lookup_path]
+        except KeyError:
+            pass
+
         current_node = self.root
+        visited_models = {self.model}
 
-        for target_node_key in path:
-            try:
-                current_node = next(
-                    filter(
-                        lambda node: node.key == target_node_key, current_node.children
-                    )
-                )
-            except StopIteration:
+        for depth, target_node_key in enumerate(keys):
+            if self.max_depth is not None and depth >= self.max_depth:
+                return None
+
+            current_node = current_node.get(target_node_key)
+
+            if current_node is None:
                 return None
+            elif depth and current_node.field.is_relation:
+                # We want to avoid circular traversals so we ignore relations to models already
+                # traversed on this path. Relations of the root model, including those back to it,
+                # are always followed.
+                if current_node.field.related_model in visited_models:
+                    return None
+
+                visited_models.add(current_node.field.related_model)
+
+        self._nodes_by_path[lookup_path] = current_node
 
         return current_node
 
+    def walk(self):
+        """Yield a `(lookup_path, node)` pair for every path in the tree, depth first.
+
+        This expands every reachable relation of a lazily built tree.
+        """
+        stack = [
+            (child_node.key, child_node, 1, {self.model})
+            for child_node in reversed(self.root.children)
+        ]
+
+        while stack:
+            lookup_path, node, depth, visited_models = stack.pop()
+
+            if depth > 1 and node.field.is_relation:
+                if node.field.related_model in visited_models:
+                    continue
+
+                visited_models = {*visited_models, node.field.related_model}
+
+            yield lookup_path, node
+
+            if node.field.is_relation and (
+                self.max_depth is None or depth < self.max_depth
+            ):
+                stack.extend(
+                    (
+                        f"{lookup_path}{LOOKUP_SEP}{child_node.key}",
+                        child_node,
+                        depth + 1,
+                        visited_models,
+                    )
+                    for child_node in reversed(node.children)
+                )
+
     def __str__(self) -> str:
-        return str(self.root)
+        return "\n".join(lookup_path for lookup_path, _ in self.walk())
+
+
+def create_model_node(model, model_nodes, lazy: bool = False) -> FieldTreeNode:
+    """Return the node holding the fields of `model`.
+
+    `model_nodes` maps models to their nodes, so every relation to the same model shares one set
+    of child nodes.
+    """
+    model_node = model_nodes.get(model)
+
+    if model_node is None:
+        # Register the node before creating its children, so that relations back to `model` share
+        # it too.
+        model_node = model_nodes[model] = FieldTreeNode()
+        model_node.set_children(
+            [
+                create_model_field_branch(index_field, model_nodes, lazy)
+                for index_field in get_model_index_fields(model)
+            ]
+        )
+
+    return model_node
 
 
 def create_model_field_branch(
-    index_field: Field, visited_models, lookup_path=None
+    index_field: Field, model_nodes, lazy: bool = False
 ) -> FieldTreeNode:
-    """Create a model field tree structure with `index_field` root node."""
-    children = []
-
-    if lookup_path is not None:
-        lookup_path = f"{lookup_path}__{index_field.name}"
-    else:
-        lookup_path = index_field.name
-
-    if index_field.is_relation:
-        related_model_index_fields = get_model_index_fields(index_field.related_model)
-        for index_field in related_model_index_fields:
-            # We want to avoid circular traversals so we ignore relations to models already encountered
-            # in this sub branch.
-            if index_field.is_relation and index_field.related_model in visited_models:
-                continue
-
-            children.append(
-                create_model_field_branch(
-                    index_field,
-                    {*visited_models, index_field.related_model},
-                    lookup_path,
-                )
-            )
+    """Create a model field tree structure with `index_field` root node.
 
-    return FieldTreeNode(field=index_field, lookup_path=lookup_path, children=children)
+    When `lazy` is set, the fields of the related model are only indexed when the children of the
+    node are first accessed.
+    """
+    if not index_field.is_relation:
+        return FieldTreeNode(field=index_field)
 
+    related_model = index_field.related_model
 
-def build_model_field_tree(model: Type[models.Model]):
-    """Construct a tree structured index of `model`\'s fields."""
-    return FieldTree(
-        root=FieldTreeNode(
-            field=None,
-            children=[
-                create_model_field_branch(index_field, visited_models={model})
-                for index_field in get_model_index_fields(model)
-            ],
+    if lazy:
+        return FieldTreeNode(
+            field=index_field,
+            expand=lambda: create_model_node(related_model, model_nodes, lazy=True),
         )
+
+    node = FieldTreeNode(field=index_field)
+    node.share_children(create_model_node(related_model, model_nodes))
+
+    return node
+
+
+def build_model_field_tree(
+    model: Type[models.Model], lazy: bool = False, max_depth: Optional[int] = None
+):
+    """Construct a tree structured index of `model`\'s fields.
+
+    See `create_model_field_branch` for `lazy` and `FieldTree` for `max_depth`.
+    """
+    return FieldTree(
+        root=create_model_node(model, model_nodes={}, lazy=lazy),
+        model=model,
+        max_depth=max_depth,
     )
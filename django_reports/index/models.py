@@ -1,21 +1,92 @@
 """Classes and utilities for indexing Django models."""
+import threading
 from functools import cached_property
-from typing import Type
+from typing import Dict, NamedTuple, Optional, Type, Union
 
+from django.apps import apps
 from django.db import models
 
 from django_reports.index import fields
+from django_reports.instrumentation import Stage, measure
+
+
+class RegistryInfo(NamedTuple):
+    """Model index registry statistics."""
+
+    hits: int
+    misses: int
+    size: int
 
 
 class ModelIndex:
     """Index model information and provide utility methods to access model metadata."""
 
-    def __init__(self, model: Type[models.Model]) -> None:
+    # Process wide registry of shared model indexes, keyed by model label.
+    _registry: Dict[str, "ModelIndex"] = {}
+    _registry_lock = threading.Lock()
+    _registry_hits = 0
+    _registry_misses = 0
+
+    def __init__(
+        self,
+        model: Type[models.Model],
+        lazy: bool = True,
+        max_depth: Optional[int] = None,
+    ) -> None:
         self._model = model
+        self._lazy = lazy
+        self._max_depth = max_depth
+
+    @classmethod
+    def for_model(cls, model: Type[models.Model]) -> "ModelIndex":
+        """Return the process wide shared index of `model`."""
+        # Models of other app registries (migration states, isolated test apps) may share a label
+        # with an installed model, so they are never shared.
+        if model._meta.apps is not apps:
+            return cls(model)
+
+        with cls._registry_lock:
+            model_index = cls._registry.get(model._meta.label)
+
+            if model_index is None:
+                cls._registry_misses += 1
+                model_index = cls._registry[model._meta.label] = cls(model)
+            else:
+                cls._registry_hits += 1
+
+        return model_index
+
+    @classmethod
+    def registry_info(cls) -> RegistryInfo:
+        """Return the hit and miss counts and the size of the shared index registry."""
+        with cls._registry_lock:
+            return RegistryInfo(
+                cls._registry_hits, cls._registry_misses, len(cls._registry)
+            )
+
+    @classmethod
+    def clear_registry(cls, **kwargs) -> None:
+        """Drop all shared indexes.
+
+        Accepts arbitrary keyword arguments so it can be connected to signals directly.
+        """
+        with cls._registry_lock:
+            cls._registry.clear()
+
+    @classmethod
+    def invalidate(cls, model: Type[models.Model]) -> None:
+        """Drop the shared index of `model`, e.g. when the model class is created again."""
+        with cls._registry_lock:
+            cls._registry.pop(model._meta.label, None)
 
     @cached_property
     def field_index(self):
-        return fields.build_model_field_tree(self._model)
+        # Relations are expanded on demand by default, so the cost of the index is proportional to
+        # the paths that are looked up rather than to every model reachable from `model`.
+        with measure(Stage.FIELD_INDEX, self._model._meta.label):
+            return fields.build_model_field_tree(
+                self._model, lazy=self._lazy, max_depth=self._max_depth
+            )
 
     @cached_property
     def name(self):
@@ -24,3 +95,11 @@ class ModelIndex:
     @cached_property
     def label(self):
         return self._model._meta.label
+
+
+def get_model_index(model: Union[str, Type[models.Model]]) -> ModelIndex:
+    """Return the shared index of `model`, given as a model class or an `app_label.ModelName` label."""
+    if isinstance(model, str):
+        model = apps.get_model(model)
+
+    return ModelIndex.for_model(model)
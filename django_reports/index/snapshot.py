@@ -0,0 +1,133 @@
+"""Precomputed model field index snapshots.
+
+A snapshot is a flat, `marshal` serialized table of the indexed fields of a set of models. Loading
+it lets the field index skip inspecting model metadata, as long as the schema it was built from
+(see `schema_hash`) still matches the installed models.
+"""
+import hashlib
+import logging
+import marshal
+from typing import Dict, Iterable, Sequence, Tuple, Type
+
+from django.apps import apps
+from django.db import models
+
+from django_reports.index import fields
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+def schema_hash() -> str:
+    """Return a hash of the installed models' forward fields and the index field mapping."""
+    schema = [
+        sorted(
+            f"{field_class.__module__}.{field_class.__qualname__}:{index_class.__name__}"
+            for field_class, index_class in fields.model_field_map.items()
+        )
+    ]
+
+    for model in sorted(apps.get_models(), key=lambda model: model._meta.label):
+        schema.append(
+            (
+                model._meta.label,
+                [
+                    (
+                        field.name,
+                        f"{type(field).__module__}.{type(field).__qualname__}",
+                        field.related_model and field.related_model._meta.label,
+                        bool(field.choices),
+                    )
+                    # Only forward fields are indexed, and unlike `get_fields()` these do not
+                    # require the reverse relations of every model to be resolved.
+                    for field in (*model._meta.fields, *model._meta.many_to_many)
+                ],
+            )
+        )
+
+    return hashlib.sha256(repr(schema).encode()).hexdigest()
+
+
+def get_related_models(
+    root_models: Iterable[Type[models.Model]],
+) -> Sequence[Type[models.Model]]:
+    """Return `root_models` and every model reachable from them through indexed relations."""
+    related_models = list(root_models)
+    seen_models = set(related_models)
+
+    for model in related_models:
+        for index_field in fields.get_model_index_fields(model):
+            if index_field.is_relation and index_field.related_model not in seen_models:
+                seen_models.add(index_field.related_model)
+                related_models.append(index_field.related_model)
+
+    return related_models
+
+
+def build_snapshot(
+    root_models: Iterable[Type[models.Model]],
+) -> Dict[str, Sequence[Tuple[str, str]]]:
+    """Return the indexed fields of `root_models` and the models related to them."""
+    index_classes = set(fields.model_field_map.values())
+
+    def get_index_class_name(index_field):
+        # Choice variants are recreated from the model field when the snapshot is loaded.
+        return next(
+            index_class.__name__
+            for index_class in type(index_field).__mro__
+            if index_class in index_classes
+        )
+
+    return {
+        model._meta.label: [
+            (index_field.name, get_index_class_name(index_field))
+            for index_field in fields.get_model_index_fields(model)
+        ]
+        for model in get_related_models(root_models)
+    }
+
+
+def dump_snapshot(path, root_models: Iterable[Type[models.Model]]) -> int:
+    """Write the snapshot of `root_models` to `path` and return the number of indexed models."""
+    snapshot = build_snapshot(root_models)
+
+    with open(path, "wb") as snapshot_file:
+        marshal.dump(
+            {
+                "version": SNAPSHOT_VERSION,
+                "schema_hash": schema_hash(),
+                "models": snapshot,
+            },
+            snapshot_file,
+        )
+
+    return len(snapshot)
+
+
+def load_snapshot(path) -> bool:
+    """Use the snapshot at `path` as the source of indexed model fields.
+
+    Returns whether the snapshot was loaded, which it is not if it is missing or was built from a
+    different schema.
+    """
+    try:
+        with open(path, "rb") as snapshot_file:
+            snapshot = marshal.load(snapshot_file)
+    except (OSError, EOFError, ValueError, TypeError):
+        logger.warning("Could not read model field index snapshot '%s'.", path)
+        return False
+
+    if (
+        snapshot.get("version") != SNAPSHOT_VERSION
+        or snapshot.get("schema_hash") != schema_hash()
+    ):
+        logger.info(
+            "Model field index snapshot '%s' is out of date and will not be used.", path
+        )
+        return False
+
+    fields.index_field_snapshot.clear()
+    fields.index_field_snapshot.update(snapshot["models"])
+
+    return True
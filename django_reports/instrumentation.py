@@ -0,0 +1,202 @@
+"""Timing and query instrumentation of report processing.
+
+Every stage of processing a report (indexing the model fields, validating and compiling filters,
+executing the report query and serializing its rows) is measured while receivers are connected to
+the `stage_completed` signal. Receivers get the `StageMetrics` of every completed stage, e.g. to
+forward them to a metrics backend:
+
+    @receiver(stage_completed)
+    def record_stage(sender, metrics, **kwargs):
+        statsd.timing(f"reports.{metrics.stage}", metrics.duration * 1000)
+
+Nothing is measured while the signal has no receivers, which only costs an instrumented function
+a check of the receivers list.
+
+Queries are counted with a `connection.execute_wrapper` of the measured database. The metrics of
+a stage include those of stages run within it, e.g. the validation of a filter includes the
+indexing of the model fields on first use.
+"""
+import functools
+import time
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.dispatch import Signal
+
+from django_reports.structs import Option
+
+# Sent with the `StageMetrics` of every measured stage, the sender is the `Stage`.
+stage_completed = Signal()
+
+
+class Stage(str, Option):
+    FIELD_INDEX = "field_index"
+    VALIDATION = "validation"
+    QUERY_BUILD = "query_build"
+    FILTER = "filter"
+    EXECUTION = "execution"
+    SERIALIZATION = "serialization"
+
+
+class StageMetrics(NamedTuple):
+    """The metrics of a completed stage, durations are in seconds."""
+
+    stage: Stage
+    label: Optional[str]
+    duration: float
+    query_count: int
+    query_duration: float
+    row_count: Optional[int]
+
+
+def is_enabled() -> bool:
+    """Return whether stages are measured, that is whether `stage_completed` has receivers."""
+    return bool(stage_completed.receivers)
+
+
+class Measurement:
+    """Collect the metrics of a stage.
+
+    The time spent and the queries executed within `with measurement:` blocks are accumulated,
+    so a stage can be measured in parts, e.g. per row of a streamed result. `finish` sends the
+    metrics.
+    """
+
+    __slots__ = (
+        "stage",
+        "label",
+        "using",
+        "duration",
+        "query_count",
+        "query_duration",
+        "row_count",
+        "_started_at",
+    )
+
+    def __init__(
+        self, stage: Stage, label: Optional[str] = None, using: str = DEFAULT_DB_ALIAS
+    ) -> None:
+        self.stage = stage
+        self.label = label
+        self.using = using
+        self.duration = 0.0
+        self.query_count = 0
+        self.query_duration = 0.0
+        self.row_count = None
+        self._started_at = None
+
+    def __enter__(self) -> "Measurement":
+        connections[self.using].execute_wrappers.append(self._execute)
+        self._started_at = time.perf_counter()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.duration += time.perf_counter() - self._started_at
+        connections[self.using].execute_wrappers.remove(self._execute)
+
+    def _execute(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.query_duration += time.perf_counter() - started_at
+
+    def finish(self) -> StageMetrics:
+        """Send and return the metrics of the stage."""
+        metrics = StageMetrics(
+            stage=self.stage,
+            label=self.label,
+            duration=self.duration,
+            query_count=self.query_count,
+            query_duration=self.query_duration,
+            row_count=self.row_count,
+        )
+        stage_completed.send(sender=self.stage, metrics=metrics)
+
+        return metrics
+
+
+def start(
+    stage: Stage, label: Optional[str] = None, using: str = DEFAULT_DB_ALIAS
+) -> Optional[Measurement]:
+    """Return a new measurement of `stage`, or `None` if stages are not measured."""
+    if not stage_completed.receivers:
+        return None
+
+    return Measurement(stage, label, using)
+
+
+@contextmanager
+def measure(
+    stage: Stage, label: Optional[str] = None, using: str = DEFAULT_DB_ALIAS
+) -> Iterator[Optional[Measurement]]:
+    """Measure the `with` block as `stage`, yielding the measurement or `None`."""
+    measurement = start(stage, label, using)
+
+    if measurement is None:
+        yield None
+        return
+
+    try:
+        with measurement:
+            yield measurement
+    finally:
+        measurement.finish()
+
+
+def instrument(stage: Stage):
+    """Decorate a function to measure its calls as `stage`."""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not stage_completed.receivers:
+                return function(*args, **kwargs)
+
+            with measure(stage):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def measure_iter(
+    stage: Stage,
+    rows: Iterable,
+    label: Optional[str] = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> Iterable:
+    """Return `rows`, measuring the time spent producing them and counting them as `stage`.
+
+    Only the time spent within the iterator of `rows` is measured, not the time the caller spends
+    between rows. `rows` is returned as is if stages are not measured.
+    """
+    measurement = start(stage, label, using)
+
+    if measurement is None:
+        return rows
+
+    return _measure_iter(measurement, rows)
+
+
+def _measure_iter(measurement: Measurement, rows: Iterable) -> Iterator:
+    rows = iter(rows)
+    measurement.row_count = 0
+
+    try:
+        while True:
+            with measurement:
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    return
+
+            measurement.row_count += 1
+            yield row
+    finally:
+        measurement.finish()
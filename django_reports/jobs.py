@@ -0,0 +1,180 @@
+"""Deferred report jobs.
+
+Reports that are too slow to run within a request are submitted as a `ReportJob` and run later by
+a worker, `manage.py run_report_jobs`. The database is the queue: workers claim the oldest pending
+job with `SELECT ... FOR UPDATE SKIP LOCKED` where the database supports it, so several workers
+can share a queue without a message broker.
+
+A job streams the rows of its report into a result file of the default storage and records the
+number of rows written after every chunk, so clients can poll its progress. Every update is also a
+heartbeat of the worker: running jobs without a heartbeat for `JOB_TIMEOUT` seconds, e.g. of a
+worker that was killed, are claimed again like pending jobs.
+"""
+import datetime
+import tempfile
+import time
+from typing import Optional
+
+from django.core.files import File
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from django_reports.conf import get_setting
+from django_reports.export import encode_csv, encode_ndjson
+from django_reports.runner import ReportRunner
+
+encoders = {"csv": encode_csv, "ndjson": encode_ndjson}
+
+
+def submit_job(report, format: str = "csv", created_by=None):
+    """Queue a job running `report` into a `format` result file."""
+    from django_reports.models import ReportJob
+
+    return ReportJob.objects.create(report=report, format=format, created_by=created_by)
+
+
+def claim_job(using: str = DEFAULT_DB_ALIAS):
+    """Mark the oldest pending or abandoned job as running and return it, `None` if there is none.
+
+    Running jobs are abandoned when their worker did not send a heartbeat for `JOB_TIMEOUT` seconds.
+    """
+    from django_reports.models import ReportJob
+
+    claimable = Q(status=ReportJob.Status.PENDING)
+    timeout = get_setting("JOB_TIMEOUT")
+
+    if timeout is not None:
+        claimable |= Q(
+            status=ReportJob.Status.RUNNING,
+            heartbeat_at__lt=timezone.now() - datetime.timedelta(seconds=timeout),
+        )
+
+    with transaction.atomic(using=using):
+        job = (
+            ReportJob.objects.using(using)
+            .select_related("report")
+            .select_for_update(skip_locked=True, of=("self",))
+            .filter(claimable)
+            .order_by("created_at", "pk")
+            .first()
+        )
+
+        if job is None:
+            return None
+
+        job.status = ReportJob.Status.RUNNING
+        job.started_at = job.heartbeat_at = timezone.now()
+        # Abandoned jobs start over.
+        job.total_rows = None
+        job.row_count = 0
+        job.save(
+            update_fields=[
+                "status",
+                "started_at",
+                "heartbeat_at",
+                "total_rows",
+                "row_count",
+            ]
+        )
+
+    return job
+
+
+def _update(job, **fields):
+    """Set and store `fields` of `job` without saving its other fields, with a heartbeat."""
+    fields["heartbeat_at"] = timezone.now()
+
+    for name, value in fields.items():
+        setattr(job, name, value)
+
+    type(job)._default_manager.using(job._state.db).filter(pk=job.pk).update(**fields)
+
+
+def _track_progress(job, rows, chunk_size: int):
+    """Yield `rows`, storing the number of rows yielded so far every `chunk_size` rows."""
+    row_count = 0
+
+    for row_count, row in enumerate(rows, 1):
+        yield row
+
+        if row_count % chunk_size == 0:
+            _update(job, row_count=row_count)
+
+    _update(job, row_count=row_count)
+
+
+def run_job(job):
+    """Run a claimed `job`, storing the report rows in its result file.
+
+    Errors of the report are stored in the job, which is marked as failed. Return the job.
+    """
+    from django_reports.models import ReportJob
+
+    job.report.record_run()
+
+    try:
+        runner = ReportRunner(job.report)
+        _update(
+            job,
+            total_rows=1 if runner.is_summary else runner.get_queryset().count(),
+        )
+
+        with tempfile.TemporaryFile() as file:
+            for content in encoders[job.format](
+                runner.columns,
+                _track_progress(job, runner, runner.chunk_size),
+                runner.chunk_size,
+            ):
+                file.write(content)
+
+            job.result.save(
+                f"{job.report.name}-{job.pk}.{job.format}", File(file), save=False
+            )
+    except Exception as error:
+        _update(
+            job,
+            status=ReportJob.Status.FAILED,
+            error=f"{type(error).__name__}: {error}",
+            finished_at=timezone.now(),
+        )
+    else:
+        _update(
+            job,
+            status=ReportJob.Status.DONE,
+            result=job.result.name,
+            finished_at=timezone.now(),
+        )
+
+    return job
+
+
+def run_pending_jobs(
+    max_jobs: Optional[int] = None, using: str = DEFAULT_DB_ALIAS
+) -> int:
+    """Run pending jobs until the queue is empty or `max_jobs` ran. Return the number of jobs run."""
+    job_count = 0
+
+    while max_jobs is None or job_count < max_jobs:
+        job = claim_job(using)
+
+        if job is None:
+            break
+
+        run_job(job)
+        job_count += 1
+
+    return job_count
+
+
+def work(poll_interval: Optional[float] = None, using: str = DEFAULT_DB_ALIAS):
+    """Run jobs as they are submitted, checking for new jobs every `poll_interval` seconds."""
+    if poll_interval is None:
+        poll_interval = get_setting("JOB_POLL_INTERVAL")
+
+    while True:
+        # Long running workers would otherwise keep connections past `CONN_MAX_AGE`.
+        close_old_connections()
+
+        if not run_pending_jobs(using=using):
+            time.sleep(poll_interval)
@@ -0,0 +1,52 @@
+"""Build the model field index snapshot loaded by django reports at startup."""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_reports.conf import get_setting
+from django_reports.index.snapshot import dump_snapshot
+from django_reports.models import Report
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the field indexes of report models (and the models related to them) into a "
+        "snapshot file that is loaded at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "model_labels",
+            nargs="*",
+            metavar="app_label.ModelName",
+            help="Models to index. Defaults to the models of all saved reports.",
+        )
+        parser.add_argument(
+            "--output",
+            help="Snapshot file path. Defaults to the INDEX_SNAPSHOT_PATH setting.",
+        )
+
+    def handle(self, *args, model_labels=(), output=None, **options):
+        output = output or get_setting("INDEX_SNAPSHOT_PATH")
+
+        if not output:
+            raise CommandError(
+                "Either pass --output or configure the INDEX_SNAPSHOT_PATH setting."
+            )
+
+        if not model_labels:
+            model_labels = (
+                Report.objects.order_by()
+                .values_list("model_label", flat=True)
+                .distinct()
+            )
+
+        try:
+            root_models = [apps.get_model(model_label) for model_label in model_labels]
+        except (LookupError, ValueError) as error:
+            raise CommandError(error)
+
+        model_count = dump_snapshot(output, root_models)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {model_count} models into '{output}'.")
+        )
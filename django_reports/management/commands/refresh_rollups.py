@@ -0,0 +1,39 @@
+"""Refresh the rollup tables of materialized reports."""
+from django.core.management.base import BaseCommand
+
+from django_reports.models import Report
+from django_reports.rollup import drop_rollup, refresh_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the rollup tables of materialized reports and drop the rollup tables of reports "
+        "that are no longer materialized. Run it periodically, e.g. from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "report_ids",
+            nargs="*",
+            type=int,
+            metavar="report_id",
+            help="Reports to refresh. Defaults to all materialized reports.",
+        )
+
+    def handle(self, *args, report_ids=(), **options):
+        reports = Report.objects.all()
+
+        if report_ids:
+            reports = reports.filter(pk__in=report_ids)
+
+        for report in reports.filter(materialized=False).exclude(rollup_key=""):
+            drop_rollup(report)
+            self.stdout.write(f"Dropped the rollup of report '{report.name}'.")
+
+        for report in reports.filter(materialized=True):
+            row_count = refresh_rollup(report)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Refreshed the rollup of report '{report.name}' ({row_count} rows)."
+                )
+            )
@@ -0,0 +1,35 @@
+"""Run deferred report jobs."""
+from django.core.management.base import BaseCommand
+
+from django_reports.jobs import run_pending_jobs, work
+
+
+class Command(BaseCommand):
+    help = (
+        "Run submitted report jobs. The worker keeps running and checks for new jobs unless "
+        "--once is given. Any number of workers may run at the same time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the pending jobs and exit.",
+        )
+        parser.add_argument(
+            "--max-jobs",
+            type=int,
+            help="Maximum number of jobs to run with --once.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="Seconds to wait between checks for new jobs when the queue is empty.",
+        )
+
+    def handle(self, *args, once=False, max_jobs=None, poll_interval=None, **options):
+        if not once:
+            work(poll_interval)
+
+        job_count = run_pending_jobs(max_jobs)
+        self.stdout.write(self.style.SUCCESS(f"Ran {job_count} report jobs."))
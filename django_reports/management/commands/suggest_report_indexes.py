@@ -0,0 +1,71 @@
+"""Suggest database indexes for the filters and columns of saved reports."""
+from django.core.management.base import BaseCommand
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from django_reports.advisor import make_index_migration, suggest_indexes
+from django_reports.models import Report
+
+
+class Command(BaseCommand):
+    help = (
+        "Print database index suggestions for the filters and columns of saved reports, ranked by "
+        "how often the reports that would use them ran. See `django_reports.advisor`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=10,
+            help="Maximum number of suggestions. Defaults to 10.",
+        )
+        parser.add_argument(
+            "--emit-migration",
+            action="store_true",
+            help="Write a migration adding the suggested indexes for every app with migrations.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the migrations of --emit-migration instead of writing them.",
+        )
+
+    def handle(self, *args, limit=10, emit_migration=False, dry_run=False, **options):
+        suggestions = suggest_indexes(Report.objects.all())[:limit]
+
+        if not suggestions:
+            self.stdout.write("No index suggestions.")
+            return
+
+        for rank, suggestion in enumerate(suggestions, 1):
+            self.stdout.write(
+                f"{rank}. {suggestion.model._meta.label} ({', '.join(suggestion.fields)}) "
+                f"score {suggestion.score}, reports: {', '.join(suggestion.reports)}"
+            )
+
+        if emit_migration:
+            self.emit_migrations(suggestions, dry_run)
+
+    def emit_migrations(self, suggestions, dry_run):
+        migrated_apps = MigrationLoader(None, ignore_no_migrations=True).migrated_apps
+
+        for app_label in sorted(
+            {suggestion.model._meta.app_label for suggestion in suggestions}
+        ):
+            migration = make_index_migration(app_label, suggestions)
+            writer = MigrationWriter(migration)
+
+            if dry_run:
+                self.stdout.write(
+                    f"\n# {app_label}.{migration.name}\n{writer.as_string()}"
+                )
+            elif app_label not in migrated_apps:
+                self.stderr.write(
+                    f"Skipped the indexes of app '{app_label}', which has no migrations."
+                )
+            else:
+                with open(writer.path, "w", encoding="utf-8") as file:
+                    file.write(writer.as_string())
+
+                self.stdout.write(self.style.SUCCESS(f"Wrote {writer.path}."))
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import django_reports.filter
+import django_reports.validators
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Report",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=100, unique=True, verbose_name="name"),
+                ),
+                (
+                    "model_label",
+                    models.CharField(
+                        max_length=100,
+                        validators=[django_reports.validators.validate_model_label],
+                        verbose_name="report model label",
+                    ),
+                ),
+                (
+                    "description",
+                    models.TextField(
+                        blank=True, default=str, verbose_name="Description"
+                    ),
+                ),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("TB", "table"), ("CH", "chart"), ("SU", "summary")],
+                        max_length=2,
+                        verbose_name="type",
+                    ),
+                ),
+                (
+                    "annotations",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="annotations"
+                    ),
+                ),
+                (
+                    "filters",
+                    models.JSONField(
+                        blank=True,
+                        default=dict,
+                        validators=[django_reports.filter.validate_filter_data],
+                        verbose_name="filters",
+                    ),
+                ),
+                ("aggregations", models.JSONField(verbose_name="aggregations")),
+                (
+                    "options",
+                    models.JSONField(blank=True, default=dict, verbose_name="options"),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="reports",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
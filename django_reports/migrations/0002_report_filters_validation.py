@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_reports", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="report",
+            name="filters",
+            field=models.JSONField(blank=True, default=dict, verbose_name="filters"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_reports", "0003_reportstate"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="materialized",
+            field=models.BooleanField(default=False, verbose_name="materialized"),
+        ),
+        migrations.AddField(
+            model_name="report",
+            name="rollup_key",
+            field=models.CharField(
+                blank=True,
+                default=str,
+                editable=False,
+                max_length=32,
+                verbose_name="rollup key",
+            ),
+        ),
+    ]
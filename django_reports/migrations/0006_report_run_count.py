@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_reports", "0005_reportjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="report",
+            name="run_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="run count"
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-17 13:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_reports", "0006_report_run_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reportjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(null=True, verbose_name="heartbeat at"),
+        ),
+    ]
@@ -1,9 +1,18 @@
 """Django report models."""
+from asgiref.sync import sync_to_async
+from django.apps import apps
 from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from django_reports.filter import validate_filter_data
+from django_reports.aggregator import Aggregator, validate_aggregation_data
+from django_reports.conf import get_setting
+from django_reports.filter import Filter, validate_filter
+from django_reports.index.models import ModelIndex
+from django_reports.planner import apply_query_plan, get_query_plan
+from django_reports.rollup import get_rollup_results
 from django_reports.validators import validate_model_label
 
 
@@ -22,7 +31,9 @@ class Report(models.Model):
 
     name = models.CharField(verbose_name=_("name"), unique=True, max_length=100)
     model_label = models.CharField(
-        verbose_name=_("report model label"), validators=[validate_model_label]
+        verbose_name=_("report model label"),
+        max_length=100,
+        validators=[validate_model_label],
     )
     description = models.TextField(
         verbose_name=_("Description"), blank=True, default=str
@@ -37,19 +48,236 @@ class Report(models.Model):
         verbose_name=_("annotations"), blank=True, default=dict
     )
     # Store information about how the report QS will be filtered (created in 1 week ago to now, type is T, etc.)
-    filters = models.JSONField(
-        verbose_name=_("filters"),
-        blank=True,
-        default=dict,
-        validators=[validate_filter_data],
-    )
+    # Filters are validated against the report model's fields in `clean`.
+    filters = models.JSONField(verbose_name=_("filters"), blank=True, default=dict)
     # Store information about how the report QS will be aggregated (Group by, Count, Average, etc.)
     aggregations = models.JSONField(verbose_name=_("aggregations"))
 
     # Store report metadata, including chart type, chart settings (ApexChart options for example)
     options = models.JSONField(verbose_name=_("options"), blank=True, default=dict)
 
+    # Keep the results of the report in a pre-aggregated rollup table, see `django_reports.rollup`.
+    materialized = models.BooleanField(verbose_name=_("materialized"), default=False)
+    # Definition key of the rollup table built by the last refresh, empty if there is none.
+    rollup_key = models.CharField(
+        verbose_name=_("rollup key"),
+        max_length=32,
+        blank=True,
+        default=str,
+        editable=False,
+    )
+    # Number of times the report ran, which weighs the index suggestions of the report.
+    run_count = models.PositiveIntegerField(
+        verbose_name=_("run count"), default=0, editable=False
+    )
+
     class Meta(object):
         """Model metadata."""
 
         abstract = "django_reports" not in settings.INSTALLED_APPS
+
+    @property
+    def model(self):
+        """The model class the report queries."""
+        return apps.get_model(self.model_label)
+
+    @property
+    def model_index(self) -> ModelIndex:
+        """The shared index of the report model."""
+        return ModelIndex.for_model(self.model)
+
+    def get_queryset(self):
+        """Return the filtered rows of the report model."""
+        queryset = self.model._default_manager.all()
+
+        if self.filters:
+            queryset = Filter(self.filters, self.model_index)(queryset)
+
+        return queryset
+
+    def get_planned_queryset(self):
+        """Return the filtered rows of the report model, read by a single query.
+
+        The relations of the report columns are joined and only the column fields are loaded, see
+        `django_reports.planner`. Use it to read the rows as model instances, the results and
+        runner of the report read only the column values already.
+        """
+        plan = get_query_plan(
+            self.model_index.field_index,
+            [column["path"] for column in self.aggregations.get("columns", [])],
+        )
+
+        return apply_query_plan(self.get_queryset(), plan)
+
+    def get_results(self):
+        """Return the report results, computed by a single database query.
+
+        Summary reports return a `metric name -> value` dictionary, table and chart reports a
+        queryset of `column/metric name -> value` dictionaries. When the `USE_ROLLUPS` setting is
+        enabled, results are computed from the rollup table of a matching materialized report if
+        there is one, in which case table and chart results are a list.
+        """
+        if get_setting("USE_ROLLUPS") and self.type != self.Type.TABLE:
+            results = get_rollup_results(self)
+
+            if results is not None:
+                return results
+
+        aggregator = Aggregator(self.aggregations, self.model_index)
+
+        if self.type == self.Type.SUMMARY:
+            return aggregator.aggregate(self.get_queryset())
+
+        return aggregator.annotate(self.get_queryset())
+
+    async def aget_results(self):
+        """Async version of `get_results`, returning table and chart results as a list."""
+        if get_setting("USE_ROLLUPS") and self.type != self.Type.TABLE:
+            results = await sync_to_async(get_rollup_results)(self)
+
+            if results is not None:
+                return results
+
+        aggregator = Aggregator(self.aggregations, self.model_index)
+
+        if self.type == self.Type.SUMMARY:
+            return await aggregator.aaggregate(self.get_queryset())
+
+        return await aggregator.aannotate(self.get_queryset())
+
+    def record_run(self):
+        """Count a run of the report, see `manage.py suggest_report_indexes`."""
+        if self.pk is not None:
+            type(self)._default_manager.filter(pk=self.pk).update(
+                run_count=models.F("run_count") + 1
+            )
+
+    def clean(self):
+        super().clean()
+
+        try:
+            model_index = self.model_index
+        except (LookupError, ValueError):
+            # An invalid model label is reported by its field validator.
+            return
+
+        errors = {}
+
+        if self.filters:
+            try:
+                validate_filter(self.filters, model_index)
+            except ValidationError as error:
+                errors["filters"] = error.error_list
+
+        if self.aggregations:
+            try:
+                validate_aggregation_data(self.aggregations, model_index.field_index)
+            except ValidationError as error:
+                errors["aggregations"] = error.error_list
+
+        if errors:
+            raise ValidationError(errors)
+
+
+class ReportState(models.Model):
+    """Store the aggregate state of an incrementally refreshed report.
+
+    See `django_reports.incremental`.
+    """
+
+    report = models.OneToOneField(
+        to=Report, on_delete=models.CASCADE, related_name="state"
+    )
+    # Hash of the report definition the state was built for.
+    definition_key = models.CharField(verbose_name=_("definition key"), max_length=32)
+    # `[column values, partial aggregates]` pairs of the report groups.
+    state = models.JSONField(
+        verbose_name=_("state"), default=list, encoder=DjangoJSONEncoder
+    )
+    # The largest high-water mark field value of the aggregated rows.
+    watermark = models.JSONField(
+        verbose_name=_("high-water mark"), null=True, encoder=DjangoJSONEncoder
+    )
+    refreshed_at = models.DateTimeField(verbose_name=_("refreshed at"), auto_now=True)
+
+    class Meta(object):
+        """Model metadata."""
+
+        abstract = "django_reports" not in settings.INSTALLED_APPS
+
+
+class ReportJob(models.Model):
+    """A deferred run of a report, which stores the report rows in a result file.
+
+    See `django_reports.jobs`.
+    """
+
+    class Status(models.TextChoices):
+        """Job statuses."""
+
+        PENDING = "pending", _("pending")
+        RUNNING = "running", _("running")
+        DONE = "done", _("done")
+        FAILED = "failed", _("failed")
+
+    class Format(models.TextChoices):
+        """Result file formats."""
+
+        CSV = "csv", "CSV"
+        NDJSON = "ndjson", "NDJSON"
+
+    report = models.ForeignKey(to=Report, on_delete=models.CASCADE, related_name="jobs")
+    created_by = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="report_jobs",
+    )
+    format = models.CharField(
+        verbose_name=_("format"),
+        choices=Format.choices,
+        max_length=10,
+        default=Format.CSV,
+    )
+    status = models.CharField(
+        verbose_name=_("status"),
+        choices=Status.choices,
+        max_length=10,
+        default=Status.PENDING,
+    )
+    # Number of rows of the report, counted when the job starts.
+    total_rows = models.PositiveIntegerField(verbose_name=_("total rows"), null=True)
+    # Number of rows written to the result file so far.
+    row_count = models.PositiveIntegerField(verbose_name=_("row count"), default=0)
+    result = models.FileField(
+        verbose_name=_("result"), upload_to="django_reports/jobs/", blank=True
+    )
+    error = models.TextField(verbose_name=_("error"), blank=True, default=str)
+    created_at = models.DateTimeField(verbose_name=_("created at"), auto_now_add=True)
+    started_at = models.DateTimeField(verbose_name=_("started at"), null=True)
+    # Updated by the worker running the job after every chunk, see `JOB_TIMEOUT`.
+    heartbeat_at = models.DateTimeField(verbose_name=_("heartbeat at"), null=True)
+    finished_at = models.DateTimeField(verbose_name=_("finished at"), null=True)
+
+    class Meta(object):
+        """Model metadata."""
+
+        abstract = "django_reports" not in settings.INSTALLED_APPS
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    @property
+    def progress(self):
+        """The fraction of the report rows written so far, `None` until the rows are counted."""
+        if self.total_rows is None:
+            return None
+
+        return min(self.row_count / self.total_rows, 1.0) if self.total_rows else 1.0
+
+    @property
+    def duration(self):
+        """The time the job ran for, `None` until it finished."""
+        if self.started_at is None or self.finished_at is None:
+            return None
+
+        return self.finished_at - self.started_at
@@ -0,0 +1,74 @@
+"""Query planning of report querysets.
+
+Accessing the related fields of report rows, e.g. the `author__country__name` column of a book
+report, queries the related objects of every row unless they are selected with the rows. The
+planner resolves the column paths of a report through its field index and plans a queryset that
+joins every forward relation on the column paths (`select_related`) and loads only the column
+fields (`only`), so the rows of the report are read by a single query.
+
+Filters join the relations on their paths themselves, and those joins are reused by the planned
+`select_related`, so the plan only covers the column paths. Filter paths are validated with the
+filter, see `django_reports.filter.validate_filter`.
+
+Planning is opt-in, for callers that read the rows of a report as model instances, see
+`Report.get_planned_queryset`. `ReportRunner` and `Report.get_results` read the rows with `values`
+or `values_list`, which already select only the columns of the report in a single query and ignore
+`select_related` and `only`.
+"""
+from typing import Iterable, NamedTuple, Tuple
+
+from django.db.models.constants import LOOKUP_SEP
+
+from django_reports.index.fields import FieldTree
+
+
+class QueryPlan(NamedTuple):
+    """The relations to join and the fields to load for a set of field paths."""
+
+    select_related: Tuple[str, ...]
+    only: Tuple[str, ...]
+
+
+def get_query_plan(field_index: FieldTree, column_paths: Iterable[str]) -> QueryPlan:
+    """Plan the query of rows with the `column_paths` fields.
+
+    Raise `ValueError` if a path does not exist in the field index.
+    """
+    relation_paths = set()
+    only = set()
+
+    for path in column_paths:
+        if field_index.find(path) is None:
+            raise ValueError(
+                f"Field with path '{path}' does not exist or is not supported."
+            )
+
+        keys = path.split(LOOKUP_SEP)
+        # Relations at the end of a path are loaded as their primary key, without a join.
+        relation_paths.update(
+            LOOKUP_SEP.join(keys[:depth]) for depth in range(1, len(keys))
+        )
+        only.add(path)
+
+    # `select_related("a__b")` also joins `a`.
+    select_related = {
+        path
+        for path in relation_paths
+        if not any(
+            other_path.startswith(f"{path}{LOOKUP_SEP}")
+            for other_path in relation_paths
+        )
+    }
+
+    return QueryPlan(tuple(sorted(select_related)), tuple(sorted(only)))
+
+
+def apply_query_plan(queryset, plan: QueryPlan):
+    """Return `queryset` with the relations of `plan` joined and only its fields loaded."""
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+
+    if plan.only:
+        queryset = queryset.only(*plan.only)
+
+    return queryset
@@ -0,0 +1,42 @@
+"""Django report renderers."""
+from rest_framework import renderers
+
+from django_reports.export import aencode_csv, aencode_ndjson, encode_csv, encode_ndjson
+
+
+class ExportRenderer(renderers.BaseRenderer):
+    """Base class of the renderers of report exports.
+
+    Exports are streamed by encoding the report rows with `encode` (or `aencode` for async
+    iterables of rows). `render` is only used for other responses of the view, e.g. errors, and
+    renders the data as JSON.
+    """
+
+    charset = "utf-8"
+    encoder = None
+    async_encoder = None
+
+    def encode(self, columns, rows):
+        """Return an iterator of the encoded `columns` and `rows`."""
+        return self.encoder(columns, rows)
+
+    def aencode(self, columns, rows):
+        """Return an async iterator of the encoded `columns` and async iterable of `rows`."""
+        return self.async_encoder(columns, rows)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return renderers.JSONRenderer().render(data, renderer_context=renderer_context)
+
+
+class CSVRenderer(ExportRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    encoder = staticmethod(encode_csv)
+    async_encoder = staticmethod(aencode_csv)
+
+
+class NDJSONRenderer(ExportRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    encoder = staticmethod(encode_ndjson)
+    async_encoder = staticmethod(aencode_ndjson)
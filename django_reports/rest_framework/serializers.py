@@ -1,7 +1,15 @@
 """Django report serializers."""
+import re
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.urls import reverse
 from rest_framework import serializers
 
 from django_reports.filter import Connector
+from django_reports.models import ReportJob
+
+# Lookup and transform names separated by `__`, e.g. `date__gte`.
+LOOKUP_EXPRESSION_PATTERN = re.compile(r"^[a-z][a-z0-9]*(?:_{1,2}[a-z0-9]+)*$")
 
 
 class FilterFieldSerializer(serializers.Serializer):
@@ -47,7 +55,7 @@ class FilterConnectorNodeChildren(serializers.Field):
             )
 
         children_serializer = FilterNodeSerializer(
-            data=connector_node_children, many=True
+            data=connector_node_children, many=True, context=self.context
         )
         children_serializer.is_valid(raise_exception=True)
 
@@ -62,19 +70,100 @@ class FilterConnectorNodeSerializer(serializers.Serializer):
 
 
 class FilterLeafNodeSerializer(serializers.Serializer):
-    """Filter leaf node serializer."""
+    """Filter leaf node serializer.
+
+    When the serializer context holds the `field_index` of the report model, the lookup expression
+    is validated against the lookups supported by the field and the value against its type.
+    """
 
     field = FilterFieldSerializer()
     lookup_expression = serializers.CharField()
-    # The type of this value is determined by the field type.
-    value = serializers.CharField()
+    # The type of this value is determined by the field type and the lookup expression.
+    value = serializers.JSONField()
 
     def validate_lookup_expression(self, lookup_expression):
         """Validate filter lookup expression."""
-        # Todo: Implement lookup expression validation
+        if not LOOKUP_EXPRESSION_PATTERN.match(lookup_expression):
+            raise serializers.ValidationError(
+                f"'{lookup_expression}' is not a valid lookup expression."
+            )
+
         return lookup_expression
 
+    def validate(self, attrs):
+        """Validate the lookup expression against the lookups supported by the field."""
+        field_index = self.context.get("field_index")
+
+        if field_index is None:
+            return attrs
+
+        field_path = attrs["field"]["path"]
+        node = field_index.find(field_path)
+
+        if node is None:
+            raise serializers.ValidationError(
+                {
+                    "field": f"Field with path '{field_path}' does not exist or is not "
+                    "supported."
+                }
+            )
+        elif attrs["lookup_expression"] not in node.field.lookup_expressions:
+            raise serializers.ValidationError(
+                {
+                    "lookup_expression": f"'{attrs['lookup_expression']}' is not a supported "
+                    f"lookup of field '{field_path}'."
+                }
+            )
+
+        try:
+            node.field.coerce_lookup_value(attrs["lookup_expression"], attrs["value"])
+        except DjangoValidationError as error:
+            raise serializers.ValidationError({"value": error.messages})
+
+        return attrs
+
     def validate_value(self, value):
-        """Validate filter value."""
-        # Todo: Implement filter value validation
+        """Validate that the filter value is a scalar or a list of scalars."""
+        values = value if isinstance(value, list) else [value]
+
+        if any(isinstance(value, (dict, list)) for value in values):
+            raise serializers.ValidationError(
+                "Filter values must be scalars or lists of scalars."
+            )
+
         return value
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    """Report job serializer, only the format of a job is writable."""
+
+    progress = serializers.FloatField(read_only=True)
+    result = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            "id",
+            "report",
+            "format",
+            "status",
+            "total_rows",
+            "row_count",
+            "progress",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = [field for field in fields if field != "format"]
+
+    def get_result(self, job):
+        """Return the URL the result file of a done job is downloaded from."""
+        if job.status != ReportJob.Status.DONE:
+            return None
+
+        url = reverse("django_reports:report-job-result", kwargs={"pk": job.pk})
+        request = self.context.get("request")
+
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,35 @@
+"""Django reports rest framework URLs."""
+from django.urls import path
+
+from django_reports.rest_framework import views
+
+app_name = "django_reports"
+
+urlpatterns = [
+    path(
+        "reports/<int:pk>/export/",
+        views.ReportExportView.as_view(),
+        name="report-export",
+    ),
+    path(
+        "reports/<int:pk>/export/async/",
+        views.AsyncReportExportView.as_view(),
+        name="report-export-async",
+    ),
+    path(
+        "reports/<int:pk>/results/",
+        views.AsyncReportResultsView.as_view(),
+        name="report-results",
+    ),
+    path(
+        "reports/<int:pk>/jobs/",
+        views.ReportJobCreateView.as_view(),
+        name="report-job-create",
+    ),
+    path("jobs/<int:pk>/", views.ReportJobView.as_view(), name="report-job"),
+    path(
+        "jobs/<int:pk>/result/",
+        views.ReportJobResultView.as_view(),
+        name="report-job-result",
+    ),
+]
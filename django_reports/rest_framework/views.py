@@ -1 +1,259 @@
 """Django reports rest framework views."""
+import asyncio
+from urllib.parse import quote
+
+from asgiref.sync import sync_to_async
+from django import VERSION as DJANGO_VERSION
+from django.http import FileResponse, StreamingHttpResponse
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.generics import GenericAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from django_reports.cache import aget_report_results
+from django_reports.conf import get_setting
+from django_reports.exceptions import QueryCostExceeded
+from django_reports.guard import check_report_cost
+from django_reports.jobs import submit_job
+from django_reports.models import Report, ReportJob
+from django_reports.rest_framework.renderers import CSVRenderer, NDJSONRenderer
+from django_reports.rest_framework.serializers import ReportJobSerializer
+from django_reports.runner import ReportRunner
+
+if DJANGO_VERSION >= (4, 2):
+    from django.utils.http import content_disposition_header
+else:
+
+    def content_disposition_header(as_attachment, filename):
+        """Backport of `django.utils.http.content_disposition_header` of django 4.2."""
+        disposition = "attachment" if as_attachment else "inline"
+
+        try:
+            filename.encode("ascii")
+        except UnicodeEncodeError:
+            return f"{disposition}; filename*=utf-8''{quote(filename)}"
+
+        escaped_filename = filename.replace("\\", "\\\\").replace('"', r"\"")
+
+        return f'{disposition}; filename="{escaped_filename}"'
+
+
+class AsyncAPIView(APIView):
+    """An `APIView` with async handlers, requires django version >= 4.1.
+
+    The authentication, permission and throttling checks may query the database, so they are run
+    in a thread.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            # Get the appropriate handler method
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+
+            # Inherited handlers, e.g. `options`, are synchronous.
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def get_job_response(request, job):
+    """Return the response of a submitted job, with the URL the job is polled from as `Location`."""
+    location = reverse("django_reports:report-job", kwargs={"pk": job.pk})
+
+    return Response(
+        ReportJobSerializer(job, context={"request": request}).data,
+        status=status.HTTP_202_ACCEPTED,
+        headers={"Location": request.build_absolute_uri(location)},
+    )
+
+
+class CreatedByUserMixin:
+    """Require an authenticated user and restrict the objects to those the user created."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(created_by=self.request.user)
+
+
+class ReportQueryBudgetMixin:
+    """Check the estimated cost of report queries against the query budget before running them.
+
+    Reports over budget are rejected with a 422 response listing the exceeded budgets, or deferred
+    to a report job if the `QUERY_BUDGET_ACTION` setting is "defer". See `django_reports.guard`.
+    """
+
+    def check_query_budget(self, report, job_format):
+        """Return the response of a report over budget, `None` if the report is within budget."""
+        try:
+            check_report_cost(report)
+        except QueryCostExceeded as error:
+            if get_setting("QUERY_BUDGET_ACTION") == "defer":
+                job = submit_job(
+                    report, format=job_format, created_by=self.request.user
+                )
+
+                return get_job_response(self.request, job)
+
+            return Response(
+                {
+                    "detail": "The report query exceeds the query budget.",
+                    "errors": error.errors,
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+
+        return None
+
+
+class ReportExportMixin(CreatedByUserMixin, ReportQueryBudgetMixin):
+    """Stream the rows of a report as CSV or NDJSON.
+
+    The format is negotiated from the `Accept` header or the `format` query parameter. Other
+    responses, e.g. errors and deferred jobs, are JSON.
+    """
+
+    queryset = Report.objects.all()
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if isinstance(response, Response):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_export_response(self, report, content):
+        renderer = self.request.accepted_renderer
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        # Report names are user input, so they are quoted or percent encoded.
+        response["Content-Disposition"] = content_disposition_header(
+            True, f"{report.name}.{renderer.format}"
+        )
+
+        return response
+
+
+class ReportExportView(ReportExportMixin, GenericAPIView):
+    def get(self, request, *args, **kwargs):
+        report = self.get_object()
+        response = self.check_query_budget(report, request.accepted_renderer.format)
+
+        if response is not None:
+            return response
+
+        report.record_run()
+        runner = ReportRunner(report)
+
+        return self.get_export_response(
+            report, request.accepted_renderer.encode(runner.columns, runner)
+        )
+
+
+class AsyncReportExportView(ReportExportMixin, AsyncAPIView, GenericAPIView):
+    """Async version of `ReportExportView`, which streams the rows without holding a thread."""
+
+    async def get(self, request, *args, **kwargs):
+        report = await sync_to_async(self.get_object)()
+        response = await sync_to_async(self.check_query_budget)(
+            report, request.accepted_renderer.format
+        )
+
+        if response is not None:
+            return response
+
+        await sync_to_async(report.record_run)()
+        runner = ReportRunner(report)
+
+        return self.get_export_response(
+            report, request.accepted_renderer.aencode(runner.columns, runner)
+        )
+
+
+class AsyncReportResultsView(
+    CreatedByUserMixin, ReportQueryBudgetMixin, AsyncAPIView, GenericAPIView
+):
+    """Return the results of a report, from the result cache when it is enabled."""
+
+    queryset = Report.objects.all()
+
+    async def get(self, request, *args, **kwargs):
+        report = await sync_to_async(self.get_object)()
+        response = await sync_to_async(self.check_query_budget)(
+            report, ReportJob.Format.NDJSON
+        )
+
+        if response is not None:
+            return response
+
+        await sync_to_async(report.record_run)()
+
+        return Response(await aget_report_results(report))
+
+
+class ReportJobCreateView(CreatedByUserMixin, GenericAPIView):
+    """Submit a job running a report, see `django_reports.jobs`.
+
+    The response holds the queued job, and its `Location` header the URL the job is polled from.
+    """
+
+    queryset = Report.objects.all()
+    serializer_class = ReportJobSerializer
+
+    def post(self, request, *args, **kwargs):
+        report = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = submit_job(
+            report,
+            format=serializer.validated_data.get("format", ReportJob.Format.CSV),
+            created_by=request.user,
+        )
+
+        return get_job_response(request, job)
+
+
+class ReportJobView(CreatedByUserMixin, RetrieveAPIView):
+    """Return the status and progress of a report job."""
+
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+
+
+class ReportJobResultView(CreatedByUserMixin, GenericAPIView):
+    """Download the result file of a done report job."""
+
+    queryset = ReportJob.objects.filter(status=ReportJob.Status.DONE)
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+
+        return FileResponse(
+            job.result.open("rb"),
+            as_attachment=True,
+            filename=f"{job.report.name}.{job.format}",
+        )
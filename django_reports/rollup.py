@@ -0,0 +1,387 @@
+"""Materialized pre-aggregation (rollup) tables.
+
+The rollup table of a materialized report holds a row per group of the report columns with the
+partial aggregates of its metrics (see `django_reports.incremental.partial_functions`). Reports
+over the same model and filters whose columns and metrics can be derived from those of a rollup,
+e.g. a count per month from a count per day, are answered by re-aggregating the rollup rows
+rather than the rows of the report model.
+
+Rollup tables are built by `refresh_rollup`, e.g. with `manage.py refresh_rollups`, and are only
+as fresh as their last refresh.
+"""
+import hashlib
+import json
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple, Type
+
+from django.apps.registry import Apps
+from django.db import connection, models, transaction
+
+from django_reports.aggregator import Function, get_column_lookup_path
+from django_reports.filter import get_filter_key
+from django_reports.incremental import get_average, partial_functions
+
+TABLE_PREFIX = "django_reports_rollup"
+
+# Digits of the sums of decimal fields, which may exceed the digits of the summed field.
+SUM_MAX_DIGITS = 30
+
+# Transforms of a date that can be computed from the date itself, so a rollup of `path__date` can
+# answer reports with coarser time buckets (`path__month`, `path__year`, ...) of the same path.
+date_transforms = frozenset(
+    {
+        "date",
+        "year",
+        "iso_year",
+        "quarter",
+        "month",
+        "week",
+        "day",
+        "week_day",
+        "iso_week_day",
+    }
+)
+
+# Partial aggregate name -> aggregate computing it from report rows.
+partial_aggregates = {
+    partial_name: aggregate
+    for partials in partial_functions.values()
+    for partial_name, aggregate in partials
+}
+
+# Partial aggregate name -> aggregate merging the partial aggregates of rollup rows.
+merge_aggregates = {
+    "count": models.Sum,
+    "sum": models.Sum,
+    "min": models.Min,
+    "max": models.Max,
+}
+
+# Rollup models, keyed by table name. Every model has its own app registry, so models of tables
+# rebuilt for a new report definition do not clash.
+_rollup_models: Dict[str, Type[models.Model]] = {}
+
+
+def get_table_name(report_pk, key: str) -> str:
+    return f"{TABLE_PREFIX}_{report_pk}_{key[:12]}"
+
+
+class Rollup:
+    """The rollup table of a materialized report."""
+
+    def __init__(self, report) -> None:
+        self.report = report
+        self.filter_key = get_filter_key(report.filters) if report.filters else ""
+        # `(path, transform)` of the columns. Summary reports have no columns.
+        self.columns: List[Tuple[str, Optional[str]]] = [
+            (column_data["path"], column_data.get("transform") or None)
+            for column_data in report.aggregations.get("columns", [])
+            if report.type != report.Type.SUMMARY
+        ]
+        # `(partial name, path)` of the partial aggregates of the metrics.
+        self.partials: List[Tuple[str, str]] = sorted(
+            {
+                (partial_name, metric_data.get("path") or "pk")
+                for metric_data in report.aggregations.get("metrics", [])
+                for partial_name, _ in partial_functions[
+                    Function(metric_data["function"])
+                ]
+            }
+        )
+
+    @cached_property
+    def key(self) -> str:
+        """A hash of the definition of the rollup table."""
+        definition = json.dumps(
+            [self.report.model_label, self.filter_key, self.columns, self.partials]
+        )
+
+        return hashlib.blake2b(definition.encode(), digest_size=16).hexdigest()
+
+    @property
+    def is_current(self) -> bool:
+        """Whether the rollup table was built for the current report definition."""
+        return self.report.rollup_key == self.key
+
+    @property
+    def column_names(self) -> List[str]:
+        return [f"column_{index}" for index in range(len(self.columns))]
+
+    @property
+    def partial_names(self) -> List[str]:
+        return [
+            f"{partial_name}_{index}"
+            for index, (partial_name, _) in enumerate(self.partials)
+        ]
+
+    def get_row_expressions(self):
+        """Return the column and partial aggregate expressions of the rollup rows."""
+        columns = {
+            name: models.F(
+                get_column_lookup_path({"path": path, "transform": transform})
+            )
+            for name, (path, transform) in zip(self.column_names, self.columns)
+        }
+        partials = {
+            name: partial_aggregates[partial_name](path)
+            for name, (partial_name, path) in zip(self.partial_names, self.partials)
+        }
+
+        return columns, partials
+
+    @cached_property
+    def rollup_model(self) -> Type[models.Model]:
+        table_name = get_table_name(self.report.pk, self.key)
+
+        try:
+            return _rollup_models[table_name]
+        except KeyError:
+            pass
+
+        query = self.report.model._default_manager.all().query
+        columns, partials = self.get_row_expressions()
+        attributes = {
+            "__module__": __name__,
+            "Meta": type(
+                "Meta",
+                (),
+                {
+                    "app_label": "django_reports",
+                    "apps": Apps(installed_apps=()),
+                    "db_table": table_name,
+                },
+            ),
+        }
+
+        for name, expression in columns.items():
+            attributes[name] = _to_rollup_field(
+                expression.resolve_expression(query).output_field
+            )
+
+        for name, (partial_name, _) in zip(partials, self.partials):
+            attributes[name] = _to_rollup_field(
+                partials[name].resolve_expression(query).output_field, partial_name
+            )
+
+        return _rollup_models.setdefault(
+            table_name, type(f"Rollup{self.key[:12]}", (models.Model,), attributes)
+        )
+
+    def answers(self, report) -> bool:
+        """Return whether the results of `report` can be computed from this rollup."""
+        return self._plan(report) is not None
+
+    def _plan(self, report):
+        """Return the rollup lookups of the columns of `report`, or `None` if it cannot be
+        answered from this rollup."""
+        if (
+            not self.is_current
+            or report.type not in (report.Type.SUMMARY, report.Type.CHART)
+            or report.model_label != self.report.model_label
+            or (get_filter_key(report.filters) if report.filters else "")
+            != self.filter_key
+        ):
+            return None
+
+        for metric_data in report.aggregations.get("metrics", []):
+            if metric_data.get("distinct"):
+                return None
+
+            for partial_name, _ in partial_functions[Function(metric_data["function"])]:
+                if (partial_name, metric_data.get("path") or "pk") not in self.partials:
+                    return None
+
+        column_lookups = {}
+
+        if report.type == report.Type.SUMMARY:
+            return column_lookups
+        elif not report.aggregations.get("columns"):
+            # Chart reports without columns group by every model field.
+            return None
+
+        for column_data in report.aggregations.get("columns", []):
+            lookup = self._get_column_lookup(
+                column_data["path"], column_data.get("transform") or None
+            )
+
+            if lookup is None:
+                return None
+
+            column_lookups[get_column_lookup_path(column_data)] = lookup
+
+        return column_lookups
+
+    def _get_column_lookup(self, path, transform) -> Optional[str]:
+        for name, (column_path, column_transform) in zip(
+            self.column_names, self.columns
+        ):
+            if column_path != path:
+                continue
+            elif transform == column_transform:
+                return name
+            elif transform is not None and (
+                column_transform is None
+                or (column_transform == "date" and transform in date_transforms)
+            ):
+                return f"{name}__{transform}"
+
+        return None
+
+    def get_results(self, report):
+        """Return the results of `report` computed from the rollup rows.
+
+        Table and chart results are returned as a list of rows.
+        """
+        column_lookups = self._plan(report)
+
+        if column_lookups is None:
+            raise ValueError(
+                f"Report '{report.name}' cannot be answered by this rollup."
+            )
+
+        partial_names = dict(zip(self.partials, self.partial_names))
+        aggregates = {
+            name: merge_aggregates[partial_name](name)
+            for (partial_name, _), name in partial_names.items()
+        }
+        groups = {
+            f"group_{index}": models.F(lookup)
+            for index, lookup in enumerate(column_lookups.values())
+        }
+        queryset = self.rollup_model._default_manager.all()
+
+        if report.type == report.Type.SUMMARY:
+            rows = [queryset.aggregate(**aggregates)]
+        else:
+            rows = queryset.values(**groups).annotate(**aggregates).order_by(*groups)
+
+        results = []
+
+        for row in rows:
+            result = {
+                column: row[group] for column, group in zip(column_lookups, groups)
+            }
+
+            for metric_data in report.aggregations.get("metrics", []):
+                path = metric_data.get("path") or "pk"
+                function = Function(metric_data["function"])
+
+                if function == Function.AVG:
+                    value = get_average(
+                        row[partial_names["sum", path]],
+                        row[partial_names["count", path]],
+                    )
+                else:
+                    value = row[partial_names[function.value, path]]
+
+                    if function == Function.COUNT and value is None:
+                        value = 0
+
+                result[metric_data["name"]] = value
+
+            results.append(result)
+
+        return results[0] if report.type == report.Type.SUMMARY else results
+
+
+def _to_rollup_field(field: models.Field, partial_name: Optional[str] = None):
+    """Return a nullable field holding the values of `field` in a rollup table."""
+    if field.is_relation:
+        field = field.target_field
+
+    if partial_name == "count":
+        return models.BigIntegerField()
+    elif isinstance(field, models.fields.AutoFieldMixin) or (
+        partial_name == "sum" and isinstance(field, models.IntegerField)
+    ):
+        return models.BigIntegerField(null=True)
+    elif isinstance(field, models.DecimalField):
+        return models.DecimalField(
+            max_digits=SUM_MAX_DIGITS if partial_name == "sum" else field.max_digits,
+            decimal_places=field.decimal_places,
+            null=True,
+        )
+    elif isinstance(field, models.CharField):
+        return models.CharField(max_length=field.max_length, null=True)
+
+    return type(field)(null=True)
+
+
+def refresh_rollup(report) -> int:
+    """Rebuild the rollup table of `report` and return its number of rows.
+
+    A new table is created when the report definition changed since the last refresh, in which
+    case the table of the previous definition is dropped.
+    """
+    rollup = Rollup(report)
+    rollup_model = rollup.rollup_model
+    table_name = rollup_model._meta.db_table
+    previous_key = report.rollup_key
+
+    if table_name not in connection.introspection.table_names():
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(rollup_model)
+
+    columns, partials = rollup.get_row_expressions()
+    queryset = report.get_queryset().order_by()
+
+    with transaction.atomic():
+        rollup_model._default_manager.all().delete()
+
+        if not columns:
+            rollup_model._default_manager.create(**queryset.aggregate(**partials))
+        else:
+            query = queryset.values(**columns).annotate(**partials).query
+            sql, params = query.sql_with_params()
+            quote_name = connection.ops.quote_name
+
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {quote_name(table_name)} "
+                    f"({', '.join(map(quote_name, query.annotation_select))}) {sql}",
+                    params,
+                )
+
+        report.rollup_key = rollup.key
+        report.save(update_fields=["rollup_key"])
+
+    if previous_key and previous_key != rollup.key:
+        drop_rollup_table(get_table_name(report.pk, previous_key))
+
+    return rollup_model._default_manager.count()
+
+
+def drop_rollup(report) -> None:
+    """Drop the rollup table of `report`."""
+    if report.rollup_key:
+        drop_rollup_table(get_table_name(report.pk, report.rollup_key))
+        report.rollup_key = ""
+        report.save(update_fields=["rollup_key"])
+
+
+def drop_rollup_table(table_name: str) -> None:
+    _rollup_models.pop(table_name, None)
+
+    if table_name in connection.introspection.table_names():
+        with connection.schema_editor() as schema_editor:
+            schema_editor.execute(
+                schema_editor.sql_delete_table
+                % {"table": schema_editor.quote_name(table_name)}
+            )
+
+
+def get_rollup_results(report):
+    """Return the results of `report` computed from a matching rollup, or `None` if there is none."""
+    rollup_reports = (
+        type(report)
+        ._default_manager.filter(materialized=True, model_label=report.model_label)
+        .exclude(rollup_key="")
+    )
+
+    for rollup_report in rollup_reports:
+        rollup = Rollup(rollup_report)
+
+        if rollup.answers(report):
+            return rollup.get_results(report)
+
+    return None
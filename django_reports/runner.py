@@ -0,0 +1,93 @@
+"""Report execution.
+
+`ReportRunner` streams the result rows of a report from the database in chunks, so the memory
+used to run a report does not grow with the size of its result. On PostgreSQL the rows are read
+through a server-side cursor. Runners are iterated synchronously (`for row in runner`) or
+asynchronously (`async for row in runner`).
+"""
+from itertools import islice
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.utils.functional import cached_property
+
+from django_reports.aggregator import Aggregator
+from django_reports.conf import get_setting
+from django_reports.instrumentation import Stage, measure_iter
+
+
+class ReportRunner:
+    """Run a report, yielding its result rows as tuples.
+
+    Rows only hold the values of the report columns followed by its metrics, in the order of
+    `columns`. Summary reports yield a single row with their metrics.
+    """
+
+    def __init__(self, report, chunk_size: Optional[int] = None) -> None:
+        self.report = report
+        self.chunk_size = chunk_size or get_setting("RUNNER_CHUNK_SIZE")
+        self.aggregator = Aggregator(report.aggregations, report.model_index)
+
+    @property
+    def is_summary(self) -> bool:
+        return self.report.type == self.report.Type.SUMMARY
+
+    @cached_property
+    def columns(self) -> List[str]:
+        """The names of the row values."""
+        if self.is_summary:
+            return list(self.aggregator.metrics)
+
+        columns = [*self.aggregator.columns, *self.aggregator.metrics]
+
+        if not columns:
+            # Rows of reports without columns and metrics hold every field, as `values_list()`
+            # with no field names does.
+            query = (
+                self.aggregator.annotate(self.report.get_queryset()).values_list().query
+            )
+            columns = [
+                *query.extra_select,
+                *query.values_select,
+                *query.annotation_select,
+            ]
+
+        return columns
+
+    def get_queryset(self):
+        """Return the `values_list` queryset of the report rows."""
+        return self.aggregator.annotate(self.report.get_queryset()).values_list(
+            *self.columns
+        )
+
+    def __iter__(self) -> Iterator[Tuple]:
+        return iter(measure_iter(Stage.EXECUTION, self._iter_rows(), self.report.name))
+
+    def _iter_rows(self) -> Iterator[Tuple]:
+        if self.is_summary:
+            result = self.aggregator.aggregate(self.report.get_queryset())
+            yield tuple(result[name] for name in self.columns)
+            return
+
+        yield from self.get_queryset().iterator(chunk_size=self.chunk_size)
+
+    async def __aiter__(self) -> AsyncIterator[Tuple]:
+        if self.is_summary:
+            result = await self.aggregator.aaggregate(self.report.get_queryset())
+            yield tuple(result[name] for name in self.columns)
+            return
+
+        # `QuerySet.aiterator()` runs `values_list` queries in the event loop thread (django 4.2),
+        # so chunks of the synchronous iterator are fetched in a thread instead, as `aiterator`
+        # does for other querysets.
+        rows = self.get_queryset().iterator(chunk_size=self.chunk_size)
+        get_chunk = sync_to_async(lambda: list(islice(rows, self.chunk_size)))
+
+        while True:
+            chunk = await get_chunk()
+
+            if not chunk:
+                return
+
+            for row in chunk:
+                yield row
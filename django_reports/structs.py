@@ -1,5 +1,8 @@
 """Re-usable collections and structures."""
 import enum
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
 
 
 class OptionMeta(enum.EnumMeta):
@@ -15,3 +18,67 @@ class OptionMeta(enum.EnumMeta):
 class Option(enum.Enum, metaclass=OptionMeta):
     def __str__(self):
         return str(self.value)
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics."""
+
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class LRUCache:
+    """A thread-safe, bounded mapping that evicts the least recently used entries."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the entry for `key`, or `default` if there is none."""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self._misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store `value` for `key`, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Remove all entries and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Return the hit, miss and eviction counts and the size of the cache."""
+        with self._lock:
+            return CacheInfo(
+                self._hits,
+                self._misses,
+                self._evictions,
+                len(self._entries),
+                self.maxsize,
+            )
+
+    def __len__(self) -> int:
+        return len(self._entries)
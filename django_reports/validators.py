@@ -1,5 +1,13 @@
 """Model and field validators."""
+from django.apps import apps
+from django.core.exceptions import ValidationError
 
 
 def validate_model_label(label: str):
-    pass
+    """Validate that `label` is the `app_label.ModelName` label of an installed model."""
+    try:
+        apps.get_model(label)
+    except (LookupError, ValueError):
+        raise ValidationError(
+            f"'{label}' is not the label of an installed model.", code="invalid"
+        )
@@ -1,9 +1,12 @@
 """Test fixtures and utilities."""
+import datetime
+import decimal
 import os
 import sys
 from contextlib import contextmanager
 
 import django
+import pytest
 from django.core import management
 
 
@@ -46,6 +49,7 @@ def pytest_configure(config):
             "django.contrib.sites",
             "django.contrib.staticfiles",
             "django_reports",
+            "tests",
         ),
         PASSWORD_HASHERS=("django.contrib.auth.hashers.MD5PasswordHasher",),
         **use_l10n,
@@ -85,3 +89,73 @@ def does_not_raise():
         None
     """
     yield
+
+
+@pytest.fixture
+def books(db):
+    """Create a small library of books."""
+    from tests.models import Author, Book, Country, Publisher
+
+    netherlands, germany = Country.objects.bulk_create(
+        [Country(name="Netherlands"), Country(name="Germany")]
+    )
+    springer = Publisher.objects.create(name="Springer", country=germany)
+    elsevier = Publisher.objects.create(name="Elsevier", country=netherlands)
+    ann = Author.objects.create(name="Ann", country=netherlands)
+    bob = Author.objects.create(name="Bob", country=germany)
+    cid = Author.objects.create(name="Cid", country=None)
+
+    return Book.objects.bulk_create(
+        [
+            Book(
+                title=f"{author.name}'s book {number}",
+                edition=number % 3 + 1,
+                price=decimal.Decimal(10 + number),
+                format=Book.Format.choices[number % 2][0],
+                publication_date=datetime.date(2020 + number % 4, number % 12 + 1, 1),
+                created_at=datetime.datetime(2023, 1, number + 1, number),
+                author=author,
+                publisher=(springer, elsevier)[number % 2],
+            )
+            for number, author in enumerate([ann, bob, cid] * 4)
+        ]
+    )
+
+
+@pytest.fixture
+def make_report():
+    """Return a factory of reports on books.
+
+    Keyword arguments override the fields of the report, which is an unfiltered table without
+    aggregations by default, created by a "reporter" user. The report and a default creator are
+    saved when `save` is true.
+    """
+    from django.contrib.auth import get_user_model
+
+    from django_reports.models import Report
+
+    def make_report(save=False, **kwargs):
+        if "created_by" not in kwargs:
+            user_model = get_user_model()
+            kwargs["created_by"] = (
+                user_model.objects.get_or_create(username="reporter")[0]
+                if save
+                else user_model(username="reporter")
+            )
+
+        report = Report(
+            **{
+                "name": "Report",
+                "model_label": "tests.Book",
+                "type": Report.Type.TABLE,
+                "aggregations": {},
+                **kwargs,
+            }
+        )
+
+        if save:
+            report.save()
+
+        return report
+
+    return make_report
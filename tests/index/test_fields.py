@@ -1,54 +1,296 @@
 """Field index tests."""
+import datetime
+import tracemalloc
+from decimal import Decimal
 from unittest.mock import Mock
 
 import pytest
+from django.core.exceptions import ValidationError
+from django.db import models
 
-from django_reports.index.fields import FieldTree, FieldTreeNode
+from django_reports.index.fields import (
+    BooleanField,
+    CharField,
+    FieldTree,
+    FieldTreeNode,
+    build_model_field_tree,
+    to_model_index_field,
+)
+from tests.models import Author, Book, Category, Item
+
+
+def make_node(key, children=()):
+    """Create a field tree node for a mock index field named `key`."""
+    field = Mock()
+    # `name` is a reserved `Mock` constructor argument so it has to be assigned.
+    field.name = key
+
+    return FieldTreeNode(field=field, children=list(children))
+
+
+def traced_bytes_per_instance(create, count=1000):
+    """Return the memory allocated per instance when creating `count` instances with `create`."""
+    tracemalloc.start()
+
+    try:
+        instances = [create() for _ in range(count)]
+        traced_bytes, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return traced_bytes / len(instances)
+
+
+class TestField(object):
+    def test_field(self):
+        index_field = to_model_index_field(Book._meta.get_field("author"))
+
+        assert index_field.name == "author"
+        assert index_field.is_relation is True
+        assert index_field.related_model is Author
+
+    def test_choice_field(self):
+        index_field = to_model_index_field(Book._meta.get_field("format"))
+
+        assert type(index_field).__name__ == "CharChoiceField"
+        assert isinstance(index_field, CharField)
+        assert index_field.choices == Book.Format.choices
+        assert type(to_model_index_field(Book._meta.get_field("format"))) is type(
+            index_field
+        )
+
+    def test_lookup_expressions(self):
+        title = to_model_index_field(Book._meta.get_field("title"))
+        author = to_model_index_field(Book._meta.get_field("author"))
+        created_at = to_model_index_field(Book._meta.get_field("created_at"))
+
+        assert {"exact", "in", "icontains", "startswith", "range"} <= (
+            title.lookup_expressions
+        )
+        assert "isnull" not in title.lookup_expressions
+        assert {"exact", "in", "pk", "pk__in"} <= author.lookup_expressions
+        assert {
+            "date",
+            "date__gte",
+            "year",
+            "year__lt",
+            "hour__in",
+            "time__range",
+        } <= created_at.lookup_expressions
+        assert "date__year" not in created_at.lookup_expressions
+        assert "year__isnull" not in created_at.lookup_expressions
+        assert isinstance(title.lookup_expressions, frozenset)
+
+    def test_nullable_lookup_expressions(self):
+        country = to_model_index_field(Author._meta.get_field("country"))
+
+        assert "isnull" in country.lookup_expressions
+        assert (
+            country.lookup_expressions - {"isnull"}
+            == to_model_index_field(Book._meta.get_field("author")).lookup_expressions
+        )
+
+    def test_lookup_expressions_derived_once(self):
+        assert CharField.get_lookup_expressions() is CharField.get_lookup_expressions()
+        assert to_model_index_field(
+            Book._meta.get_field("format")
+        ).lookup_expressions == (CharField.get_lookup_expressions())
+
+    def test_boolean_field(self):
+        assert isinstance(to_model_index_field(models.BooleanField()), BooleanField)
+
+    def test_memory(self):
+        model_field = Book._meta.get_field("title")
+
+        assert not hasattr(CharField(model_field), "__dict__")
+        # A slotted object with a single slot, plus the reference held by the list.
+        assert traced_bytes_per_instance(lambda: CharField(model_field)) <= 64
+
+
+class TestCoercion:
+    def index_field(self, path):
+        return to_model_index_field(Book._meta.get_field(path))
+
+    @pytest.mark.parametrize(
+        "path, lookup_expression, value, expected",
+        [
+            ("edition", None, "2", 2),
+            ("edition", "in", ["3", 1, 3.0, "1"], [1, 3]),
+            ("edition", "range", ["5", 2], [5, 2]),
+            ("price", "gte", 9.5, Decimal("9.5")),
+            ("title", "in", ["b", "a", 1], ["1", "a", "b"]),
+            ("title", "icontains", "Book", "Book"),
+            ("author", "in", ["2", 1], [1, 2]),
+            ("author", "pk", "2", 2),
+            ("publication_date", "lte", "2020-02-01", datetime.date(2020, 2, 1)),
+            ("publication_date", "year__in", ["2021", 2020], [2020, 2021]),
+            (
+                "created_at",
+                "date",
+                "2020-02-01",
+                datetime.date(2020, 2, 1),
+            ),
+            (
+                "created_at",
+                "gte",
+                "2020-02-01",
+                datetime.datetime(2020, 2, 1),
+            ),
+            (
+                "created_at",
+                "in",
+                ["2020-02-01T10:30", "2020-02-01 10:30:00"],
+                [datetime.datetime(2020, 2, 1, 10, 30)],
+            ),
+            ("format", "in", ["paperback", "hardcover"], ["hardcover", "paperback"]),
+            ("format", None, None, None),
+        ],
+    )
+    def test_coerce_lookup_value(self, path, lookup_expression, value, expected):
+        assert (
+            self.index_field(path).coerce_lookup_value(lookup_expression, value)
+            == expected
+        )
+
+    def test_coerce_lookup_value_isnull(self):
+        country = to_model_index_field(Author._meta.get_field("country"))
+
+        assert country.coerce_lookup_value("isnull", "true") is True
+
+    def test_coerce_boolean_values(self):
+        assert BooleanField(models.BooleanField()).coerce_values(
+            [True, "false", 1, "0"]
+        ) == [False, True]
+
+    def test_coerce_datetime_values_use_tz(self, settings):
+        settings.USE_TZ = True
+        settings.TIME_ZONE = "UTC"
+
+        assert self.index_field("created_at").coerce_value("2020-02-01T10:30") == (
+            datetime.datetime(2020, 2, 1, 10, 30, tzinfo=datetime.timezone.utc)
+        )
+
+    @pytest.mark.parametrize(
+        "path, lookup_expression, value, messages",
+        [
+            (
+                "edition",
+                "in",
+                [1, "x", 2.5, True, None],
+                [
+                    "Index 1: 'x' is not a valid integer.",
+                    "Index 2: 2.5 is not a valid integer.",
+                    "Index 3: True is not a valid integer.",
+                    "Index 4: None is not a valid integer.",
+                ],
+            ),
+            ("edition", "in", 1, ["1 is not a list."]),
+            ("edition", "range", [1], ["[1] is not a list of two values."]),
+            ("edition", "gte", None, ["None is not a valid integer."]),
+            (
+                "publication_date",
+                "year__in",
+                [2020, "20x"],
+                ["Index 1: '20x' is not a valid integer."],
+            ),
+            (
+                "publication_date",
+                "in",
+                ["2020-02-30", "2020-02-01"],
+                ["Index 0: '2020-02-30' is not a valid date."],
+            ),
+            ("created_at", "exact", "now", ["'now' is not a valid datetime."]),
+            (
+                "format",
+                "in",
+                ["paperback", "ebook", {}],
+                [
+                    "Index 1: 'ebook' is not a valid choice.",
+                    "Index 2: {} is not a valid string.",
+                ],
+            ),
+            ("price", "exact", "NaN", ["'NaN' is not a valid decimal number."]),
+        ],
+    )
+    def test_coerce_lookup_value_errors(self, path, lookup_expression, value, messages):
+        with pytest.raises(ValidationError) as error:
+            self.index_field(path).coerce_lookup_value(lookup_expression, value)
+
+        assert error.value.messages == messages
+
+    def test_choice_values(self):
+        format_ = self.index_field("format")
+
+        assert format_.choice_values == {"paperback", "hardcover"}
+        assert format_.choice_values is format_.choice_values
 
 
 class TestTreeNode(object):
+    def test_memory(self):
+        index_field = CharField(Book._meta.get_field("title"))
+
+        assert not hasattr(FieldTreeNode(field=index_field), "__dict__")
+        # Leaf nodes share their (empty) children containers.
+        assert traced_bytes_per_instance(lambda: FieldTreeNode(field=index_field)) <= 96
+
     def test_is_leaf_node(self):
         assert FieldTreeNode(children=[]).is_leaf_node is True
-        assert FieldTreeNode(children=["some-child"]).is_leaf_node is False
+        assert FieldTreeNode(children=[make_node("some-child")]).is_leaf_node is False
 
     def test_add(self):
-        mock_node = Mock(children=[])
-        FieldTreeNode.add(mock_node, "new-node")
+        node = FieldTreeNode(children=[])
+        new_node = make_node("new-node")
+        node.add(new_node)
+
+        assert new_node in node.children
+        assert node.get("new-node") is new_node
 
-        assert "new-node" in mock_node.children
+    def test_lazy_expansion(self):
+        expand = Mock(return_value=FieldTreeNode(children=[make_node("child")]))
+        node = FieldTreeNode(field=Mock(), expand=expand)
+
+        assert node.is_expanded is False
+        assert node.get("child").key == "child"
+        assert node.is_expanded is True
+        assert [child.key for child in node.children] == ["child"]
+        assert isinstance(node.children, tuple)
+        expand.assert_called_once_with()
 
     def test_remove(self):
-        child_node_to_remove = Mock()
-        mock_node = Mock(children=[Mock(), child_node_to_remove, Mock()])
+        child_node_to_remove = make_node("to-remove")
+        node = FieldTreeNode(
+            children=[make_node("first"), child_node_to_remove, make_node("last")]
+        )
 
-        FieldTreeNode.remove(mock_node, child_node_to_remove)
+        node.remove(child_node_to_remove)
 
-        assert child_node_to_remove not in mock_node.children
+        assert child_node_to_remove not in node.children
+        assert node.get("to-remove") is None
+        assert node.get("last") is not None
 
 
 class TestFieldTree(object):
     @pytest.fixture
     def book_model_field_tree(self):
-        return Mock(
-            root=Mock(
-                key="root",
+        return FieldTree(
+            root=make_node(
+                "root",
                 children=[
-                    Mock(key="title", children=[]),  # Leaf node, char field
-                    Mock(key="publication_date", children=[]),  # Leaf node, date field
-                    Mock(key="edition", children=[]),  # Leaf node, char field
-                    Mock(key="reviews", children=[Mock(key="rating", children=[])]),
-                    Mock(
-                        key="author",
+                    make_node("title"),  # Leaf node, char field
+                    make_node("publication_date"),  # Leaf node, date field
+                    make_node("edition"),  # Leaf node, char field
+                    make_node("reviews", children=[make_node("rating")]),
+                    make_node(
+                        "author",
                         children=[
-                            Mock(
-                                key="books",
+                            make_node(
+                                "books",
                                 children=[
-                                    Mock(key="title", children=[]),
-                                    Mock(key="publication_date", children=[]),
-                                    Mock(key="edition", children=[]),
-                                    Mock(
-                                        key="reviews",
-                                        children=[Mock(key="rating", children=[])],
+                                    make_node("title"),
+                                    make_node("publication_date"),
+                                    make_node("edition"),
+                                    make_node(
+                                        "reviews", children=[make_node("rating")]
                                     ),
                                 ],
                             )
@@ -80,12 +322,18 @@ class TestFieldTree(object):
                 ("edition",),
                 "edition",
             ),
+            # Django style lookup paths
+            ("", "root"),
+            ("author__books__reviews__rating", "rating"),
+            ("edition", "edition"),
             # ========= Negative test cases =========
             # Node does not exist
             # =======================================
             (("subtitle"), None),
             (("author", "magazines"), None),
             (("author", "books", "reviews", "rating", "posted_by"), None),
+            ("author__magazines", None),
+            ("author__books__title__rating", None),
         ],
     )
     def test_find(self, node_path, expected_return_key, book_model_field_tree):
@@ -95,3 +343,127 @@ class TestFieldTree(object):
             assert node and node.key == expected_return_key
         else:
             assert node is None
+
+    def test_find_path_forms_resolve_the_same_node(self, book_model_field_tree):
+        node = book_model_field_tree.find(("author", "books", "reviews"))
+
+        assert node is not None
+        assert book_model_field_tree.find("author__books__reviews") is node
+        assert book_model_field_tree.find(["author", "books", "reviews"]) is node
+
+    def test_find_wide_node(self):
+        keys = [f"field_{index}" for index in range(500)]
+        field_tree = FieldTree(
+            root=make_node(
+                "root",
+                children=[make_node(key, children=[make_node("id")]) for key in keys],
+            )
+        )
+
+        for key in keys:
+            assert field_tree.find(f"{key}__id").key == "id"
+            assert field_tree.find([key]).key == key
+
+    def test_find_after_change(self, book_model_field_tree):
+        author_node = book_model_field_tree.find("author")
+        books_node = book_model_field_tree.find("author__books")
+
+        author_node.remove(books_node)
+
+        assert book_model_field_tree.find("author__books") is None
+        assert book_model_field_tree.find("author__books__title") is None
+
+        author_node.add(books_node)
+        new_title_node = make_node("title")
+        books_node.set_children([new_title_node])
+
+        assert book_model_field_tree.find("author__books") is books_node
+        assert book_model_field_tree.find("author__books__title") is new_title_node
+        assert book_model_field_tree.find("author__books__edition") is None
+
+        book_model_field_tree.root.set_children([])
+
+        assert book_model_field_tree.find("author") is None
+        assert book_model_field_tree.find("") is book_model_field_tree.root
+
+
+class TestBuildModelFieldTree(object):
+    @pytest.mark.parametrize(
+        "path,exists",
+        [
+            ("title", True),
+            ("author", True),
+            ("author__country__name", True),
+            ("publisher__country__id", True),
+            ("author__favourite_book__author", False),
+            ("author__favourite_book", False),
+            ("author__book", False),
+        ],
+    )
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_find(self, path, exists, lazy):
+        node = build_model_field_tree(Book, lazy=lazy).find(path)
+
+        if exists:
+            assert node and node.key == path.split("__")[-1]
+        else:
+            assert node is None
+
+    @pytest.mark.parametrize(
+        "model, path, exists",
+        [
+            (Category, "parent", True),
+            (Category, "parent__name", True),
+            (Category, "parent__parent", False),
+            (Item, "category__parent", True),
+            (Item, "category__parent__name", True),
+            (Item, "category__parent__parent", False),
+        ],
+    )
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_find_self_relation(self, model, path, exists, lazy):
+        field_tree = build_model_field_tree(model, lazy=lazy)
+
+        assert (field_tree.find(path) is not None) is exists
+        assert (path in {lookup_path for lookup_path, _ in field_tree.walk()}) is exists
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_nodes_are_shared_between_paths(self, lazy):
+        field_tree = build_model_field_tree(Book, lazy=lazy)
+
+        assert field_tree.find("author__country__name") is field_tree.find(
+            "publisher__country__name"
+        )
+
+    def test_lazy_tree_only_expands_traversed_relations(self):
+        field_tree = build_model_field_tree(Book, lazy=True)
+
+        assert field_tree.find("author").is_expanded is False
+
+        field_tree.find("author__country__name")
+
+        assert field_tree.find("author").is_expanded is True
+        assert field_tree.find("author__country").is_expanded is True
+        assert field_tree.find("publisher").is_expanded is False
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_max_depth(self, lazy):
+        field_tree = build_model_field_tree(Book, lazy=lazy, max_depth=2)
+
+        assert field_tree.find("author__country") is not None
+        assert field_tree.find("author__country__name") is None
+        assert "author__country__name" not in {
+            lookup_path for lookup_path, _ in field_tree.walk()
+        }
+
+    @pytest.mark.parametrize("lazy", [False, True])
+    def test_walk(self, lazy):
+        field_tree = build_model_field_tree(Book, lazy=lazy)
+        lookup_paths = [lookup_path for lookup_path, _ in field_tree.walk()]
+
+        assert len(lookup_paths) == len(set(lookup_paths))
+        assert "author__country__name" in lookup_paths
+        assert "author__favourite_book" not in lookup_paths
+
+        for lookup_path, node in field_tree.walk():
+            assert field_tree.find(lookup_path) is node
@@ -1 +1,80 @@
 """Model index tests."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import models
+from django.db.models.signals import class_prepared
+from django.test.utils import isolate_apps
+
+from django_reports.index.models import ModelIndex, get_model_index
+from tests.models import Author, Book
+
+
+class TestModelIndex(object):
+    def test_field_index_is_lazy_by_default(self):
+        field_index = ModelIndex(Book).field_index
+
+        assert field_index.find("author").is_expanded is False
+        assert field_index.find("author__name") is not None
+
+    def test_field_index_max_depth(self):
+        field_index = ModelIndex(Book, max_depth=1).field_index
+
+        assert field_index.find("author") is not None
+        assert field_index.find("author__name") is None
+
+
+class TestModelIndexRegistry(object):
+    @pytest.fixture(autouse=True)
+    def clear_registry(self):
+        ModelIndex.clear_registry()
+        yield
+        ModelIndex.clear_registry()
+
+    def test_for_model(self):
+        info = ModelIndex.registry_info()
+        model_index = ModelIndex.for_model(Book)
+
+        assert ModelIndex.for_model(Book) is model_index
+        assert get_model_index("tests.Book") is model_index
+        assert ModelIndex.for_model(Author) is not model_index
+        assert ModelIndex.registry_info() == (info.hits + 2, info.misses + 2, 2)
+
+    def test_for_model_is_thread_safe(self):
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            model_indexes = set(
+                executor.map(lambda _: ModelIndex.for_model(Book), range(100))
+            )
+
+        assert len(model_indexes) == 1
+
+    def test_class_prepared_invalidates_model(self):
+        model_index = ModelIndex.for_model(Book)
+        author_model_index = ModelIndex.for_model(Author)
+
+        class_prepared.send(sender=Book)
+
+        assert ModelIndex.registry_info().size == 1
+        assert ModelIndex.for_model(Book) is not model_index
+        assert ModelIndex.for_model(Author) is author_model_index
+
+    def test_class_prepared_of_other_app_registries(self):
+        model_index = ModelIndex.for_model(Book)
+
+        @isolate_apps("tests")
+        def create_model():
+            class Book(models.Model):
+                title = models.CharField(max_length=100)
+
+            return Book
+
+        assert ModelIndex.for_model(create_model()) is not model_index
+        assert ModelIndex.for_model(Book) is model_index
+
+    @isolate_apps("tests")
+    def test_models_of_other_app_registries_are_not_shared(self):
+        class Book(models.Model):
+            title = models.CharField(max_length=100)
+
+        assert ModelIndex.for_model(Book) is not ModelIndex.for_model(Book)
+        assert ModelIndex.registry_info().size == 0
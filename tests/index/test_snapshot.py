@@ -0,0 +1,84 @@
+"""Model field index snapshot tests."""
+from unittest.mock import patch
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from django_reports.index import fields
+from django_reports.index.snapshot import build_snapshot, dump_snapshot, load_snapshot
+from tests.models import Book
+
+
+@pytest.fixture(autouse=True)
+def clear_snapshot():
+    yield
+    fields.index_field_snapshot.clear()
+
+
+def test_build_snapshot():
+    snapshot = build_snapshot([Book])
+
+    assert set(snapshot) == {
+        "tests.Book",
+        "tests.Author",
+        "tests.Publisher",
+        "tests.Country",
+    }
+    assert ("format", "CharField") in snapshot["tests.Book"]
+    assert ("created_at", "DateTimeField") in snapshot["tests.Book"]
+    assert ("author", "ForeignKeyField") in snapshot["tests.Book"]
+
+
+def test_load_snapshot(tmp_path):
+    expected_fields = [
+        (type(index_field), index_field.model_field)
+        for index_field in fields.get_model_index_fields(Book)
+    ]
+    dump_snapshot(tmp_path / "index.snapshot", [Book])
+
+    assert load_snapshot(tmp_path / "index.snapshot") is True
+
+    # Model metadata is no longer inspected for models in the snapshot.
+    with patch.object(Book._meta, "get_fields", side_effect=AssertionError):
+        assert [
+            (type(index_field), index_field.model_field)
+            for index_field in fields.get_model_index_fields(Book)
+        ] == expected_fields
+
+
+def test_load_outdated_snapshot(tmp_path):
+    with patch("django_reports.index.snapshot.schema_hash", return_value="old-hash"):
+        dump_snapshot(tmp_path / "index.snapshot", [Book])
+
+    assert load_snapshot(tmp_path / "index.snapshot") is False
+    assert fields.index_field_snapshot == {}
+
+
+def test_load_missing_snapshot(tmp_path):
+    assert load_snapshot(tmp_path / "missing.snapshot") is False
+
+
+class TestBuildReportIndexCommand(object):
+    def test_model_labels(self, tmp_path):
+        call_command("build_report_index", "tests.Author", output=tmp_path / "index")
+
+        assert load_snapshot(tmp_path / "index") is True
+        assert set(fields.index_field_snapshot) == {
+            "tests.Author",
+            "tests.Book",
+            "tests.Publisher",
+            "tests.Country",
+        }
+
+    @pytest.mark.django_db
+    def test_report_models(self, tmp_path, make_report):
+        make_report(name="Publishers", model_label="tests.Publisher", save=True)
+
+        call_command("build_report_index", output=tmp_path / "index")
+
+        assert load_snapshot(tmp_path / "index") is True
+        assert set(fields.index_field_snapshot) == {"tests.Publisher", "tests.Country"}
+
+    def test_requires_output(self):
+        with pytest.raises(CommandError, match="INDEX_SNAPSHOT_PATH"):
+            call_command("build_report_index", "tests.Book")
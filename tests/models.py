@@ -0,0 +1,59 @@
+"""Models used by the test suite."""
+from django.db import models
+
+
+class Country(models.Model):
+    name = models.CharField(max_length=100)
+
+
+class Publisher(models.Model):
+    name = models.CharField(max_length=100)
+    country = models.ForeignKey(Country, on_delete=models.CASCADE)
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+    country = models.ForeignKey(Country, on_delete=models.SET_NULL, null=True)
+    favourite_book = models.ForeignKey(
+        "Book", on_delete=models.SET_NULL, null=True, related_name="+"
+    )
+
+
+class Book(models.Model):
+    class Format(models.TextChoices):
+        PAPERBACK = "paperback", "Paperback"
+        HARDCOVER = "hardcover", "Hardcover"
+
+    title = models.CharField(max_length=100)
+    edition = models.IntegerField(default=1)
+    price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    format = models.CharField(max_length=20, choices=Format.choices)
+    publication_date = models.DateField()
+    created_at = models.DateTimeField()
+    author = models.ForeignKey(Author, on_delete=models.CASCADE)
+    publisher = models.ForeignKey(Publisher, on_delete=models.CASCADE)
+
+
+class Measurement(models.Model):
+    sensor = models.CharField(max_length=100)
+    value = models.IntegerField()
+
+
+class Reading(models.Model):
+    # Readings have no auto-increment primary key, so their high-water mark is `recorded_at`.
+    id = models.CharField(max_length=36, primary_key=True)
+    sensor = models.CharField(max_length=100)
+    value = models.IntegerField()
+    recorded_at = models.DateTimeField()
+
+
+class Category(models.Model):
+    name = models.CharField(max_length=100)
+    parent = models.ForeignKey(
+        "self", on_delete=models.CASCADE, null=True, related_name="+"
+    )
+
+
+class Item(models.Model):
+    name = models.CharField(max_length=100)
+    category = models.ForeignKey(Category, on_delete=models.CASCADE)
@@ -2,12 +2,14 @@
 import pytest
 from rest_framework import serializers
 
+from django_reports.index.models import ModelIndex
 from django_reports.rest_framework.serializers import (
     FilterConnectorNodeSerializer,
     FilterLeafNodeSerializer,
     FilterNodeSerializer,
 )
 from tests.conftest import does_not_raise
+from tests.models import Book
 
 
 class TestFilterNodeSerializer(object):
@@ -128,3 +130,127 @@ class TestFilterSerializer(object):
 
         with expectation:
             assert serializer.is_valid(raise_exception=True)
+
+
+class TestFilterLeafNodeSerializer(object):
+    """Test filter leaf node serializer lookup expression and value validation."""
+
+    def leaf_data(self, path, lookup_expression):
+        return {
+            "field": {"name": path, "path": path},
+            "lookup_expression": lookup_expression,
+            "value": "2023",
+        }
+
+    @pytest.mark.parametrize(
+        "lookup_expression, is_valid",
+        [
+            ("exact", True),
+            ("date__gte", True),
+            ("iso_week_day", True),
+            ("__gte", False),
+            ("date___gte", False),
+            ("Year", False),
+            ("year__", False),
+        ],
+    )
+    def test_lookup_expression_syntax(self, lookup_expression, is_valid):
+        serializer = FilterLeafNodeSerializer(
+            data=self.leaf_data("created_at", lookup_expression)
+        )
+
+        assert serializer.is_valid() is is_valid
+
+    @pytest.mark.parametrize(
+        "path, lookup_expression, errors",
+        [
+            ("created_at", "year__gte", {}),
+            ("publication_date", "year", {}),
+            (
+                "publication_date",
+                "date__gte",
+                {
+                    "lookup_expression": [
+                        "'date__gte' is not a supported lookup of field "
+                        "'publication_date'."
+                    ]
+                },
+            ),
+            (
+                "title",
+                "isnull",
+                {
+                    "lookup_expression": [
+                        "'isnull' is not a supported lookup of field 'title'."
+                    ]
+                },
+            ),
+            (
+                "unknown",
+                "exact",
+                {
+                    "field": [
+                        "Field with path 'unknown' does not exist or is not supported."
+                    ]
+                },
+            ),
+        ],
+    )
+    def test_lookup_expression_field(self, path, lookup_expression, errors):
+        serializer = FilterLeafNodeSerializer(
+            data=self.leaf_data(path, lookup_expression),
+            context={"field_index": ModelIndex(Book).field_index},
+        )
+
+        assert serializer.is_valid() is not errors
+        assert serializer.errors == errors
+
+    @pytest.mark.parametrize(
+        "path, lookup_expression, value, errors",
+        [
+            ("edition", "in", ["1", 2], {}),
+            ("created_at", "year__gte", 2023, {}),
+            (
+                "edition",
+                "in",
+                [1, "x", "y"],
+                {
+                    "value": [
+                        "Index 1: 'x' is not a valid integer.",
+                        "Index 2: 'y' is not a valid integer.",
+                    ]
+                },
+            ),
+            (
+                "format",
+                "exact",
+                "ebook",
+                {"value": ["'ebook' is not a valid choice."]},
+            ),
+            (
+                "edition",
+                "in",
+                [[1]],
+                {"value": ["Filter values must be scalars or lists of scalars."]},
+            ),
+        ],
+    )
+    def test_value(self, path, lookup_expression, value, errors):
+        serializer = FilterLeafNodeSerializer(
+            data={**self.leaf_data(path, lookup_expression), "value": value},
+            context={"field_index": ModelIndex(Book).field_index},
+        )
+
+        assert serializer.is_valid() is not errors
+        assert serializer.errors == errors
+
+    def test_nested_lookup_expression_field(self):
+        serializer = FilterNodeSerializer(
+            data={
+                "connector": "AND",
+                "children": [self.leaf_data("publication_date", "date__gte")],
+            },
+            context={"field_index": ModelIndex(Book).field_index},
+        )
+
+        assert not serializer.is_valid()
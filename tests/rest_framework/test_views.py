@@ -0,0 +1,354 @@
+"""Django report view tests."""
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from django_reports.cache import cache_info, reset_cache_info
+from django_reports.jobs import run_pending_jobs, submit_job
+from django_reports.models import Report, ReportJob
+
+
+@pytest.fixture
+def report(books, make_report):
+    return make_report(
+        name="books",
+        filters={
+            "connector": "AND",
+            "children": [{"path": "author__name", "value": "Ann"}],
+        },
+        aggregations={"columns": [{"path": "title"}, {"path": "edition"}]},
+        save=True,
+    )
+
+
+@pytest.fixture
+def client(report):
+    client = APIClient()
+    client.force_authenticate(report.created_by)
+
+    return client
+
+
+@pytest.mark.parametrize(
+    "url_name, data",
+    [
+        ("report-export", {"format": "csv"}),
+        ("report-export-async", {"format": "csv"}),
+        ("report-results", {}),
+    ],
+)
+def test_report_of_other_user(report, url_name, data):
+    url = reverse(f"django_reports:{url_name}", kwargs={"pk": report.pk})
+    other_user = get_user_model().objects.create(username="other")
+
+    assert async_get(url, report.created_by, data=data).status_code == 200
+    assert async_get(url, other_user, data=data).status_code == 404
+    assert async_get(url, data=data).status_code == 403
+
+
+class TestReportExportView:
+    def get(self, client, report, **kwargs):
+        return client.get(
+            reverse("django_reports:report-export", kwargs={"pk": report.pk}), **kwargs
+        )
+
+    def test_csv(self, client, report):
+        response = self.get(client, report, data={"format": "csv"})
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert response["Content-Disposition"] == 'attachment; filename="books.csv"'
+        assert b"".join(response.streaming_content).decode().splitlines() == [
+            "title,edition",
+            "Ann's book 0,1",
+            "Ann's book 3,1",
+            "Ann's book 6,1",
+            "Ann's book 9,1",
+        ]
+
+    def test_ndjson(self, client, report):
+        response = self.get(client, report, HTTP_ACCEPT="application/x-ndjson")
+
+        assert response.status_code == 200
+        assert response.streaming
+        assert response["Content-Type"] == "application/x-ndjson; charset=utf-8"
+        assert [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).splitlines()
+        ] == [
+            {"title": f"Ann's book {number}", "edition": 1} for number in (0, 3, 6, 9)
+        ]
+
+    @pytest.mark.parametrize(
+        "name, content_disposition",
+        [
+            (
+                'books"; filename="evil.exe',
+                r'attachment; filename="books\"; filename=\"evil.exe.csv"',
+            ),
+            ("bücher", "attachment; filename*=utf-8''b%C3%BCcher.csv"),
+        ],
+    )
+    def test_content_disposition(self, client, report, name, content_disposition):
+        report.name = name
+        report.save()
+
+        response = self.get(client, report, data={"format": "csv"})
+
+        assert response["Content-Disposition"] == content_disposition
+
+    def test_not_found(self, client, report):
+        response = client.get(
+            reverse("django_reports:report-export", kwargs={"pk": report.pk + 1}),
+            data={"format": "csv"},
+        )
+
+        assert response.status_code == 404
+        assert response["Content-Type"] == "application/json"
+        assert response.json() == {"detail": "Not found."}
+
+
+def async_get(path, user=None, **kwargs):
+    """Request `path` with an async client, logged in as `user`."""
+    client = AsyncClient()
+
+    if user is not None:
+        client.force_login(user)
+
+    async def get():
+        return await client.get(path, **kwargs)
+
+    return async_to_sync(get)()
+
+
+async def read_streaming_content(response):
+    return b"".join([chunk async for chunk in response.streaming_content])
+
+
+class TestAsyncReportExportView:
+    def get(self, report, **kwargs):
+        return async_get(
+            reverse("django_reports:report-export-async", kwargs={"pk": report.pk}),
+            report.created_by,
+            **kwargs,
+        )
+
+    def test_csv(self, report):
+        response = self.get(report, data={"format": "csv"})
+
+        assert response.status_code == 200
+        assert response.is_async
+        assert response["Content-Type"] == "text/csv; charset=utf-8"
+        assert async_to_sync(read_streaming_content)(
+            response
+        ).decode().splitlines() == [
+            "title,edition",
+            "Ann's book 0,1",
+            "Ann's book 3,1",
+            "Ann's book 6,1",
+            "Ann's book 9,1",
+        ]
+
+    def test_ndjson(self, report):
+        response = self.get(report, headers={"Accept": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        assert [
+            json.loads(line)
+            for line in async_to_sync(read_streaming_content)(response).splitlines()
+        ] == [
+            {"title": f"Ann's book {number}", "edition": 1} for number in (0, 3, 6, 9)
+        ]
+
+
+class TestAsyncReportResultsView:
+    def get(self, report, pk=None):
+        return async_get(
+            reverse("django_reports:report-results", kwargs={"pk": pk or report.pk}),
+            report.created_by,
+        )
+
+    def test_results(self, report):
+        report.type = Report.Type.SUMMARY
+        report.aggregations = {
+            "metrics": [
+                {"name": "books", "function": "count"},
+                {"name": "price", "function": "max", "path": "price"},
+            ]
+        }
+        report.save()
+
+        response = self.get(report)
+
+        assert response.status_code == 200
+        assert response.json() == {"books": 4, "price": 19.0}
+
+    def test_result_cache(self, report, settings):
+        settings.DJANGO_REPORTS = {"RESULT_CACHE": "default"}
+        cache.clear()
+        reset_cache_info()
+
+        responses = [self.get(report) for _ in range(2)]
+
+        assert responses[0].json() == responses[1].json()
+        assert len(responses[1].json()) == 4
+        assert cache_info() == (1, 1)
+        report.refresh_from_db()
+        assert report.run_count == 2
+        cache.clear()
+
+    def test_not_found(self, report):
+        response = self.get(report, report.pk + 1)
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Not found."}
+
+
+class TestReportJobViews:
+    @pytest.fixture(autouse=True)
+    def media_root(self, settings, tmp_path):
+        settings.MEDIA_ROOT = tmp_path
+
+    def submit(self, client, report, **data):
+        return client.post(
+            reverse("django_reports:report-job-create", kwargs={"pk": report.pk}),
+            data=data,
+            format="json",
+        )
+
+    def test_submit(self, client, report):
+        response = self.submit(client, report, format="ndjson")
+
+        job = ReportJob.objects.get()
+        assert response.status_code == 202
+        assert response["Location"] == (
+            f"http://testserver{reverse('django_reports:report-job', kwargs={'pk': job.pk})}"
+        )
+        assert response.json()["status"] == "pending"
+        assert job.report == report
+        assert job.format == "ndjson"
+        assert job.created_by == report.created_by
+
+    def test_submit_anonymous(self, report):
+        response = self.submit(APIClient(), report)
+
+        assert response.status_code == 403
+        assert not ReportJob.objects.exists()
+
+    def test_submit_invalid_format(self, client, report):
+        response = self.submit(client, report, format="xlsx")
+
+        assert response.status_code == 400
+        assert response.json() == {"format": ['"xlsx" is not a valid choice.']}
+        assert not ReportJob.objects.exists()
+
+    def test_poll_and_download(self, client, report):
+        location = self.submit(client, report)["Location"]
+
+        response = client.get(location)
+
+        assert response.json()["status"] == "pending"
+        assert response.json()["progress"] is None
+        assert response.json()["result"] is None
+
+        run_pending_jobs()
+        response = client.get(location)
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert response.json()["total_rows"] == 4
+        assert response.json()["row_count"] == 4
+        assert response.json()["progress"] == 1.0
+
+        response = client.get(response.json()["result"])
+
+        assert response.status_code == 200
+        assert response["Content-Disposition"] == 'attachment; filename="books.csv"'
+        assert b"".join(response.streaming_content).decode().splitlines() == [
+            "title,edition",
+            "Ann's book 0,1",
+            "Ann's book 3,1",
+            "Ann's book 6,1",
+            "Ann's book 9,1",
+        ]
+
+    @pytest.mark.parametrize("url_name", ["report-job", "report-job-result"])
+    def test_other_user(self, client, report, url_name):
+        job = submit_job(report, created_by=report.created_by)
+        run_pending_jobs()
+        other_client = APIClient()
+        other_client.force_authenticate(
+            get_user_model().objects.create(username="other")
+        )
+        url = reverse(f"django_reports:{url_name}", kwargs={"pk": job.pk})
+
+        assert client.get(url).status_code == 200
+        assert other_client.get(url).status_code == 404
+        assert APIClient().get(url).status_code == 403
+
+    def test_result_not_done(self, client, report):
+        job = submit_job(report, created_by=report.created_by)
+
+        response = client.get(
+            reverse("django_reports:report-job-result", kwargs={"pk": job.pk})
+        )
+
+        assert response.status_code == 404
+
+
+class TestQueryBudget:
+    def test_reject(self, report, settings):
+        # The filtered authors are scanned to look up their books.
+        settings.DJANGO_REPORTS = {"MAX_QUERY_ROWS": 2}
+
+        response = async_get(
+            reverse("django_reports:report-results", kwargs={"pk": report.pk}),
+            report.created_by,
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"] == "The report query exceeds the query budget."
+        assert [
+            (error["code"], error["estimate"], error["budget"])
+            for error in response.json()["errors"]
+        ] == [("max_rows", 3, 2)]
+        report.refresh_from_db()
+        assert report.run_count == 0
+
+    def test_defer(self, client, report, settings):
+        settings.DJANGO_REPORTS = {
+            "MAX_QUERY_ROWS": 2,
+            "QUERY_BUDGET_ACTION": "defer",
+        }
+        response = client.get(
+            reverse("django_reports:report-export", kwargs={"pk": report.pk}),
+            data={"format": "ndjson"},
+        )
+
+        job = ReportJob.objects.get()
+        assert response.status_code == 202
+        assert response["Content-Type"] == "application/json"
+        assert response["Location"].endswith(
+            reverse("django_reports:report-job", kwargs={"pk": job.pk})
+        )
+        assert job.report == report
+        assert job.format == "ndjson"
+        assert job.created_by == report.created_by
+
+    def test_within_budget(self, client, report, settings):
+        settings.DJANGO_REPORTS = {"MAX_QUERY_ROWS": 3}
+
+        response = client.get(
+            reverse("django_reports:report-export", kwargs={"pk": report.pk}),
+            data={"format": "csv"},
+        )
+
+        assert response.status_code == 200
+        assert response.streaming
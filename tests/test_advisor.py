@@ -0,0 +1,209 @@
+"""Index advisor tests."""
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import models
+
+from django_reports.advisor import (
+    IndexSuggestion,
+    get_existing_indexes,
+    get_report_indexes,
+    make_index_migration,
+    suggest_indexes,
+)
+from django_reports.models import Report, ReportJob
+from tests.models import Author, Book
+
+
+def leaf(path, value, lookup_expression=None):
+    return {"path": path, "lookup_expression": lookup_expression, "value": value}
+
+
+@pytest.fixture
+def make_filtered_report(make_report):
+    """Return a factory of reports filtered by all of the given leaf nodes."""
+
+    def make_filtered_report(name, filters, **kwargs):
+        return make_report(
+            name=name,
+            filters={"connector": "AND", "children": filters},
+            **{
+                "type": Report.Type.SUMMARY,
+                "aggregations": {"metrics": [{"name": "books", "function": "count"}]},
+                **kwargs,
+            },
+        )
+
+    return make_filtered_report
+
+
+@pytest.fixture
+def reports(make_filtered_report):
+    return [
+        make_filtered_report(
+            "chart",
+            [
+                leaf("author__name", "Ann"),
+                leaf("edition", 2, "gte"),
+                leaf("title", "book", "icontains"),
+            ],
+            type=Report.Type.CHART,
+            run_count=5,
+            aggregations={
+                "columns": [{"path": "format"}, {"path": "author__name"}],
+                "metrics": [{"name": "books", "function": "count"}],
+            },
+        ),
+        make_filtered_report(
+            "summary",
+            [leaf("format", "paperback"), leaf("publication_date", 2020, "year")],
+        ),
+        make_filtered_report("author", [leaf("author", 1)]),
+    ]
+
+
+def test_get_report_indexes(reports):
+    assert get_report_indexes(reports[0]) == {
+        (Author, ("name",)): 1,
+        (Book, ("edition",)): 0,
+        (Book, ("format",)): 0,
+        (Book, ("edition", "format")): 0,
+    }
+    assert get_report_indexes(reports[1]) == {
+        (Book, ("format",)): 1,
+        (Book, ("publication_date",)): 0,
+        (Book, ("format", "publication_date")): 1,
+    }
+
+
+def test_get_existing_indexes():
+    assert get_existing_indexes(ReportJob) == {
+        ("id",),
+        ("report",),
+        ("created_by",),
+        ("status", "created_at"),
+    }
+
+
+def test_suggest_indexes(reports):
+    assert [
+        (suggestion.model, suggestion.fields, suggestion.score, suggestion.reports)
+        for suggestion in suggest_indexes(reports)
+    ] == [
+        (Book, ("format",), 6, ("chart", "summary")),
+        (Author, ("name",), 5, ("chart",)),
+        (Book, ("edition",), 5, ("chart",)),
+        (Book, ("edition", "format"), 5, ("chart",)),
+        (Book, ("publication_date",), 1, ("summary",)),
+        (Book, ("format", "publication_date"), 1, ("summary",)),
+    ]
+
+
+def test_suggest_indexes_existing_index(make_filtered_report):
+    report = make_filtered_report(
+        "jobs",
+        [leaf("status", "done"), leaf("created_at", "2023-01-01", "gte")],
+        model_label="django_reports.ReportJob",
+    )
+
+    assert suggest_indexes([report]) == [
+        IndexSuggestion(ReportJob, ("created_at",), 1, ("jobs",))
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters, suggested_fields",
+    [
+        # Equality fields are served by an index on them in any order.
+        (
+            [leaf("status", "done"), leaf("created_at", "2023-01-01")],
+            [("created_at",)],
+        ),
+        # A range field is only served after the equality fields, not before them.
+        (
+            [leaf("status", "done", "gte"), leaf("created_at", "2023-01-01")],
+            [("created_at",), ("created_at", "status")],
+        ),
+        (
+            [leaf("status", "done", "gte"), leaf("created_at", "2023-01-01", "gte")],
+            [("created_at",), ("created_at", "status")],
+        ),
+    ],
+)
+def test_suggest_indexes_existing_index_order(
+    filters, suggested_fields, make_filtered_report
+):
+    report = make_filtered_report(
+        "jobs", filters, model_label="django_reports.ReportJob"
+    )
+
+    assert [
+        suggestion.fields for suggestion in suggest_indexes([report])
+    ] == suggested_fields
+
+
+def test_make_index_migration():
+    suggestions = [
+        IndexSuggestion(ReportJob, ("created_at",), 1, ("jobs",)),
+        IndexSuggestion(Book, ("format",), 1, ("books",)),
+    ]
+
+    migration = make_index_migration("django_reports", suggestions)
+
+    assert migration.name == "0008_report_indexes"
+    assert migration.dependencies == [("django_reports", "0007_reportjob_heartbeat_at")]
+    assert len(migration.operations) == 1
+    assert migration.operations[0].model_name == "reportjob"
+    assert isinstance(migration.operations[0].index, models.Index)
+    assert migration.operations[0].index.fields == ["created_at"]
+    assert migration.operations[0].index.name.startswith("django_repo_created_")
+
+
+class TestCommand:
+    @pytest.fixture
+    def saved_reports(self, db, reports):
+        user = get_user_model().objects.create(username="reporter")
+
+        for report in reports:
+            report.created_by = user
+            report.save()
+
+    def test_suggestions(self, saved_reports):
+        stdout = io.StringIO()
+
+        call_command("suggest_report_indexes", "--limit", "2", stdout=stdout)
+
+        assert stdout.getvalue().splitlines() == [
+            "1. tests.Book (format) score 6, reports: chart, summary",
+            "2. tests.Author (name) score 5, reports: chart",
+        ]
+
+    def test_no_suggestions(self, db):
+        stdout = io.StringIO()
+
+        call_command("suggest_report_indexes", stdout=stdout)
+
+        assert stdout.getvalue() == "No index suggestions.\n"
+
+    def test_emit_migration_dry_run(self, saved_reports):
+        stdout = io.StringIO()
+
+        call_command(
+            "suggest_report_indexes", "--emit-migration", "--dry-run", stdout=stdout
+        )
+
+        assert "# tests.0001_report_indexes" in stdout.getvalue()
+        assert stdout.getvalue().count("migrations.AddIndex(") == 6
+
+    def test_emit_migration_without_migrations(self, saved_reports):
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        call_command(
+            "suggest_report_indexes", "--emit-migration", stdout=stdout, stderr=stderr
+        )
+
+        assert stderr.getvalue() == (
+            "Skipped the indexes of app 'tests', which has no migrations.\n"
+        )
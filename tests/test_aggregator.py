@@ -0,0 +1,203 @@
+"""Aggregator tests."""
+import datetime
+import decimal
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import models
+
+from django_reports.aggregator import (
+    Aggregator,
+    Aggrigator,
+    get_column_lookup_path,
+    to_aggregate,
+    validate_aggregation_data,
+)
+from django_reports.index.models import ModelIndex
+from tests.models import Book
+
+
+@pytest.fixture
+def model_index():
+    return ModelIndex.for_model(Book)
+
+
+def test_alias():
+    assert Aggrigator is Aggregator
+
+
+@pytest.mark.parametrize(
+    "column_data, expected",
+    [
+        ({"path": "author__name"}, "author__name"),
+        ({"path": "created_at", "transform": "date"}, "created_at__date"),
+        ({"path": "created_at", "transform": None}, "created_at"),
+    ],
+)
+def test_get_column_lookup_path(column_data, expected):
+    assert get_column_lookup_path(column_data) == expected
+
+
+@pytest.mark.parametrize(
+    "metric_data, expected",
+    [
+        ({"name": "books", "function": "count"}, models.Count("pk")),
+        (
+            {
+                "name": "authors",
+                "function": "count",
+                "path": "author",
+                "distinct": True,
+            },
+            models.Count("author", distinct=True),
+        ),
+        ({"name": "total", "function": "sum", "path": "price"}, models.Sum("price")),
+        ({"name": "average", "function": "avg", "path": "price"}, models.Avg("price")),
+        ({"name": "first", "function": "min", "path": "title"}, models.Min("title")),
+        ({"name": "last", "function": "max", "path": "title"}, models.Max("title")),
+    ],
+)
+def test_to_aggregate(metric_data, expected):
+    assert to_aggregate(metric_data) == expected
+
+
+class TestAggregator:
+    def test_annotate(self, books, model_index, django_assert_num_queries):
+        aggregator = Aggregator(
+            {
+                "columns": [{"path": "publisher__name"}, {"path": "format"}],
+                "metrics": [
+                    {"name": "books", "function": "count"},
+                    {
+                        "name": "authors",
+                        "function": "count",
+                        "path": "author",
+                        "distinct": True,
+                    },
+                    {"name": "revenue", "function": "sum", "path": "price"},
+                    {"name": "first_edition", "function": "min", "path": "edition"},
+                ],
+            },
+            model_index,
+        )
+
+        with django_assert_num_queries(1):
+            rows = list(aggregator.annotate(Book.objects.all()))
+
+        assert rows == [
+            {
+                "publisher__name": "Elsevier",
+                "format": "hardcover",
+                "books": 6,
+                "authors": 3,
+                "revenue": decimal.Decimal(96),
+                "first_edition": 1,
+            },
+            {
+                "publisher__name": "Springer",
+                "format": "paperback",
+                "books": 6,
+                "authors": 3,
+                "revenue": decimal.Decimal(90),
+                "first_edition": 1,
+            },
+        ]
+
+    def test_annotate_transform(self, books, model_index):
+        aggregator = Aggregator(
+            {
+                "columns": [{"path": "created_at", "transform": "date"}],
+                "metrics": [{"name": "books", "function": "count"}],
+            },
+            model_index,
+        )
+
+        rows = list(aggregator.annotate(Book.objects.filter(created_at__day__lte=2)))
+
+        assert rows == [
+            {"created_at__date": datetime.date(2023, 1, 1), "books": 1},
+            {"created_at__date": datetime.date(2023, 1, 2), "books": 1},
+        ]
+
+    def test_annotate_without_metrics(self, books, model_index):
+        aggregator = Aggregator({"columns": [{"path": "title"}]}, model_index)
+
+        rows = aggregator.annotate(Book.objects.filter(author__name="Ann"))
+
+        assert sorted(row["title"] for row in rows) == [
+            f"Ann's book {number}" for number in (0, 3, 6, 9)
+        ]
+
+    def test_aggregate(self, books, model_index, django_assert_num_queries):
+        aggregator = Aggregator(
+            {
+                "metrics": [
+                    {"name": "books", "function": "count"},
+                    {"name": "average_price", "function": "avg", "path": "price"},
+                    {"name": "latest", "function": "max", "path": "publication_date"},
+                ],
+            },
+            model_index,
+        )
+
+        with django_assert_num_queries(1):
+            result = aggregator.aggregate(Book.objects.all())
+
+        assert result == {
+            "books": 12,
+            "average_price": decimal.Decimal("15.5"),
+            "latest": datetime.date(2023, 12, 1),
+        }
+
+
+class TestValidateAggregationData:
+    def test_valid(self, model_index):
+        validate_aggregation_data(
+            {
+                "columns": [
+                    {"path": "author__country__name"},
+                    {"path": "created_at", "transform": "year"},
+                ],
+                "metrics": [
+                    {"name": "books", "function": "count"},
+                    {"name": "total", "function": "sum", "path": "price"},
+                    {"name": "editions", "function": "avg", "path": "edition"},
+                    {"name": "first", "function": "min", "path": "publication_date"},
+                ],
+            },
+            model_index.field_index,
+        )
+
+    def test_errors(self, model_index):
+        with pytest.raises(ValidationError) as error:
+            validate_aggregation_data(
+                {
+                    "columns": [
+                        {"path": "author__surname"},
+                        {"path": "title", "transform": "year"},
+                        {},
+                    ],
+                    "metrics": [
+                        {"name": "books", "function": "median"},
+                        {"name": "total", "function": "sum", "path": "title"},
+                        {"name": "title", "function": "count"},
+                        {"name": "books", "function": "count"},
+                        {"name": "books", "function": "count"},
+                        {"name": "authors", "function": "max", "distinct": True},
+                        {"name": "not valid", "function": "count"},
+                    ],
+                },
+                model_index.field_index,
+            )
+
+        assert error.value.messages == [
+            "$.columns[0]: Field with path 'author__surname' does not exist or is not supported.",
+            "$.columns[1]: 'year' is not a valid transform for 'title'.",
+            "$.columns[2]: 'path' is required.",
+            "$.metrics[0]: 'median' is not a valid function.",
+            "$.metrics[1]: 'sum' requires a numeric field.",
+            "$.metrics[2]: 'title' is already used by another column, metric or field.",
+            "$.metrics[4]: 'books' is already used by another column, metric or field.",
+            "$.metrics[5]: 'distinct' is only supported by 'count'.",
+            "$.metrics[6]: 'name' must be a valid identifier.",
+        ]
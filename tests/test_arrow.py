@@ -0,0 +1,194 @@
+"""Columnar export tests."""
+import datetime
+import decimal
+import io
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from django.db import models  # noqa: E402
+from django.test.utils import isolate_apps  # noqa: E402
+
+from django_reports.arrow import (  # noqa: E402
+    Format,
+    get_arrow_type,
+    get_column_types,
+    write_report,
+)
+from django_reports.index.models import ModelIndex  # noqa: E402
+from django_reports.models import Report  # noqa: E402
+from django_reports.runner import ReportRunner  # noqa: E402
+from tests.models import Book  # noqa: E402
+
+
+@pytest.fixture
+def make_runner(make_report):
+    def make_runner(chunk_size=5, **kwargs):
+        return ReportRunner(make_report(**kwargs), chunk_size=chunk_size)
+
+    return make_runner
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("title", pa.string()),
+        ("format", pa.string()),
+        ("edition", pa.int64()),
+        ("price", pa.decimal128(8, 2)),
+        ("publication_date", pa.date32()),
+        ("created_at", pa.timestamp("us")),
+        ("author", pa.int64()),
+    ],
+)
+def test_get_arrow_type(path, expected):
+    field_index = ModelIndex.for_model(Book).field_index
+
+    assert get_arrow_type(field_index.find(path).field) == expected
+
+
+def test_get_column_types(make_runner):
+    runner = make_runner(
+        aggregations={
+            "columns": [
+                {"path": "author__name"},
+                {"path": "created_at", "transform": "date"},
+            ],
+            "metrics": [
+                {"name": "books", "function": "count"},
+                {"name": "revenue", "function": "sum", "path": "price"},
+                {"name": "average_price", "function": "avg", "path": "price"},
+            ],
+        }
+    )
+
+    assert get_column_types(runner) == [
+        pa.string(),
+        None,
+        pa.int64(),
+        pa.decimal128(38, 2),
+        None,
+    ]
+
+
+@isolate_apps("tests")
+def test_get_arrow_type_unsupported_target_field():
+    class Token(models.Model):
+        id = models.UUIDField(primary_key=True)
+
+    class Session(models.Model):
+        token = models.ForeignKey(Token, on_delete=models.CASCADE)
+
+    field_index = ModelIndex(Session).field_index
+
+    assert get_arrow_type(field_index.find("token").field) is None
+
+
+@pytest.mark.parametrize(
+    "format, read",
+    [
+        (Format.IPC, lambda sink: pa.ipc.open_stream(sink).read_all()),
+        (Format.PARQUET, pq.read_table),
+    ],
+)
+def test_write_report(books, format, read, make_runner):
+    runner = make_runner(
+        aggregations={
+            "columns": [
+                {"path": "title"},
+                {"path": "price"},
+                {"path": "publication_date"},
+                {"path": "created_at"},
+            ]
+        }
+    )
+    sink = io.BytesIO()
+
+    assert write_report(runner, sink, format=format) == 12
+
+    sink.seek(0)
+    table = read(sink)
+
+    assert table.schema.types == [
+        pa.string(),
+        pa.decimal128(8, 2),
+        pa.date32(),
+        pa.timestamp("us"),
+    ]
+    assert table.slice(0, 1).to_pylist() == [
+        {
+            "title": "Ann's book 0",
+            "price": decimal.Decimal("10.00"),
+            "publication_date": datetime.date(2020, 1, 1),
+            "created_at": datetime.datetime(2023, 1, 1),
+        }
+    ]
+
+
+def test_write_table_without_columns(books, make_runner):
+    sink = io.BytesIO()
+
+    assert write_report(make_runner(), sink) == 12
+
+    sink.seek(0)
+    table = pa.ipc.open_stream(sink).read_all()
+    assert table.schema.names == [field.attname for field in Book._meta.concrete_fields]
+    assert table.schema.field("price").type == pa.decimal128(8, 2)
+    assert table.schema.field("author_id").type == pa.int64()
+
+
+def test_write_report_null_first_batch(books, make_runner):
+    # The books of authors without a country are grouped first, with an average of `None`.
+    runner = make_runner(
+        chunk_size=1,
+        type=Report.Type.CHART,
+        aggregations={
+            "columns": [{"path": "author__country__name"}],
+            "metrics": [
+                {"name": "country", "function": "avg", "path": "author__country__id"}
+            ],
+        },
+    )
+    sink = io.BytesIO()
+
+    assert write_report(runner, sink) == 3
+
+    sink.seek(0)
+    table = pa.ipc.open_stream(sink).read_all()
+    assert table.schema.field("country").type == pa.float64()
+    assert table.column("author__country__name").to_pylist() == [
+        None,
+        "Germany",
+        "Netherlands",
+    ]
+
+
+def test_write_report_inferred_types(books, make_runner):
+    runner = make_runner(
+        type=Report.Type.CHART,
+        aggregations={
+            "columns": [{"path": "created_at", "transform": "month"}],
+            "metrics": [{"name": "books", "function": "count"}],
+        },
+    )
+    sink = io.BytesIO()
+
+    write_report(runner, sink)
+
+    sink.seek(0)
+    assert pa.ipc.open_stream(sink).read_all().to_pydict() == {
+        "created_at__month": [1],
+        "books": [12],
+    }
+
+
+def test_write_empty_report(db, make_runner):
+    runner = make_runner(aggregations={"columns": [{"path": "title"}]})
+    sink = io.BytesIO()
+
+    assert write_report(runner, sink) == 0
+
+    sink.seek(0)
+    assert pa.ipc.open_stream(sink).read_all().to_pydict() == {"title": []}
@@ -0,0 +1,143 @@
+"""Report result cache tests."""
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+
+from django_reports.cache import (
+    ResultCacheInfo,
+    cache_info,
+    connect_signals,
+    disconnect_signals,
+    get_report_cache_key,
+    get_report_model_labels,
+    get_report_results,
+    invalidate_model,
+    reset_cache_info,
+)
+from tests.models import Author, Book, Country, Measurement, Publisher
+
+
+@pytest.fixture
+def result_cache(settings):
+    settings.DJANGO_REPORTS = {"RESULT_CACHE": "default"}
+    cache.clear()
+    reset_cache_info()
+    connect_signals()
+
+    yield
+
+    disconnect_signals()
+    cache.clear()
+
+
+@pytest.fixture
+def report(books, make_report):
+    return make_report(
+        name="Books per author",
+        filters={
+            "connector": "AND",
+            "children": [{"path": "author__country__name", "value": "Netherlands"}],
+        },
+        aggregations={
+            "columns": [{"path": "author__name"}],
+            "metrics": [{"name": "books", "function": "count"}],
+        },
+        save=True,
+    )
+
+
+def test_result_cache_info():
+    assert ResultCacheInfo(hits=3, misses=1).hit_rate == 0.75
+    assert ResultCacheInfo(hits=0, misses=0).hit_rate == 0.0
+
+
+def test_get_report_model_labels(report):
+    assert get_report_model_labels(report) == {
+        "tests.Book",
+        "tests.Author",
+        "tests.Country",
+    }
+
+
+@pytest.mark.usefixtures("result_cache")
+class TestResultCache:
+    def test_cache_hit(self, report, django_assert_num_queries):
+        assert get_report_results(report) == [{"author__name": "Ann", "books": 4}]
+
+        with django_assert_num_queries(0):
+            assert get_report_results(report) == [{"author__name": "Ann", "books": 4}]
+
+        assert cache_info() == (1, 1)
+
+    def test_report_definition_changes_key(self, report):
+        cache_key = get_report_cache_key(report)
+
+        report.filters["children"][0]["value"] = "Germany"
+
+        assert get_report_cache_key(report) != cache_key
+        assert get_report_results(report) == [{"author__name": "Bob", "books": 4}]
+
+    def test_current_time_zone_changes_key(self, report, settings):
+        settings.USE_TZ = True
+
+        with timezone.override("Europe/Amsterdam"):
+            cache_key = get_report_cache_key(report)
+
+        with timezone.override("America/New_York"):
+            assert get_report_cache_key(report) != cache_key
+
+    @pytest.mark.parametrize(
+        "write",
+        [
+            lambda: Book.objects.first().save(),
+            lambda: Author.objects.filter(name="Cid").delete(),
+            lambda: Country.objects.create(name="Belgium"),
+        ],
+    )
+    def test_invalidated_by_read_models(self, report, write):
+        cache_key = get_report_cache_key(report)
+
+        write()
+
+        assert get_report_cache_key(report) != cache_key
+
+    @pytest.mark.parametrize(
+        "write",
+        [
+            lambda: Publisher.objects.first().save(),
+            lambda: Measurement.objects.create(sensor="a", value=1),
+        ],
+    )
+    def test_not_invalidated_by_other_models(self, report, write):
+        cache_key = get_report_cache_key(report)
+
+        write()
+
+        assert get_report_cache_key(report) == cache_key
+
+    def test_invalidate_model(self, report):
+        get_report_results(report)
+        Author.objects.filter(name="Ann").update(name="Anna")
+
+        assert get_report_results(report) == [{"author__name": "Ann", "books": 4}]
+
+        invalidate_model(Author)
+
+        assert get_report_results(report) == [{"author__name": "Anna", "books": 4}]
+        assert cache_info() == (1, 2)
+
+    def test_evicted_version(self, report):
+        cache_key = get_report_cache_key(report)
+        cache.delete("django_reports:version:tests.Author")
+
+        assert get_report_cache_key(report) != cache_key
+
+
+def test_disabled(report, django_assert_num_queries):
+    reset_cache_info()
+
+    with django_assert_num_queries(2):
+        get_report_results(report)
+        get_report_results(report)
+
+    assert cache_info() == (0, 0)
@@ -0,0 +1,205 @@
+"""Dashboard runner tests."""
+import threading
+import time
+from unittest import mock
+
+import pytest
+from django.db import OperationalError, connections
+
+from django_reports import dashboard
+from django_reports.dashboard import DashboardRunner, Status
+from django_reports.models import Report
+
+# Reports run on worker threads with their own connections, which only see committed data.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def make_author_report(make_report):
+    """Return a factory of charts counting the books of an author."""
+
+    def make_author_report(name, author_name="Ann", **kwargs):
+        return make_report(
+            name=name,
+            type=Report.Type.CHART,
+            filters={
+                "connector": "AND",
+                "children": [{"path": "author__name", "value": author_name}],
+            },
+            aggregations={
+                "columns": [{"path": "author__name"}],
+                "metrics": [{"name": "books", "function": "count"}],
+            },
+            **kwargs,
+        )
+
+    return make_author_report
+
+
+def slow_results(seconds):
+    """Return a `get_report_results` replacement that takes `seconds` for reports named slow."""
+    get_report_results = dashboard.get_report_results
+
+    def wrapper(report):
+        if report.name.startswith("slow"):
+            time.sleep(seconds)
+
+        return get_report_results(report)
+
+    return wrapper
+
+
+class TestDashboardRunner:
+    def test_run(self, books, make_author_report):
+        reports = [
+            make_author_report("Ann"),
+            make_author_report("Bob", author_name="Bob"),
+        ]
+
+        results = DashboardRunner(reports).run()
+
+        assert [result.report for result in results] == reports
+        assert [result.status for result in results] == [Status.DONE, Status.DONE]
+        assert [result.results for result in results] == [
+            [{"author__name": "Ann", "books": 4}],
+            [{"author__name": "Bob", "books": 4}],
+        ]
+
+    def test_record_runs(self, books, make_author_report):
+        report = make_author_report("Ann")
+        report.created_by.save()
+        report.save()
+
+        DashboardRunner([report, make_author_report("Bob", author_name="Bob")]).run()
+
+        report.refresh_from_db()
+        assert report.run_count == 1
+
+    def test_coalesce(self, books, make_author_report):
+        reports = [
+            make_author_report("Ann"),
+            make_author_report("Ann again", description="The same report."),
+            make_author_report("Bob", author_name="Bob"),
+        ]
+
+        with mock.patch.object(
+            dashboard, "get_report_results", wraps=dashboard.get_report_results
+        ) as get_report_results:
+            results = DashboardRunner(reports).run()
+
+        assert get_report_results.call_count == 2
+        assert results[0].results == results[1].results
+        assert results[1].report is reports[1]
+
+    def test_concurrent(self, books, make_author_report):
+        reports = [
+            make_author_report(f"slow {number}", author_name=name)
+            for number, name in enumerate(["Ann", "Bob", "Cid"])
+        ]
+
+        with mock.patch.object(dashboard, "get_report_results", slow_results(0.3)):
+            started = time.monotonic()
+            results = DashboardRunner(reports, max_workers=3).run()
+            elapsed = time.monotonic() - started
+
+        assert all(result.status == Status.DONE for result in results)
+        assert elapsed < 0.6
+
+    def test_timeout(self, books, make_author_report):
+        reports = [
+            make_author_report("Ann"),
+            make_author_report("slow", author_name="Bob"),
+        ]
+
+        with mock.patch.object(dashboard, "get_report_results", slow_results(1)):
+            started = time.monotonic()
+            results = DashboardRunner(reports, timeout=0.2).run()
+            elapsed = time.monotonic() - started
+
+        assert [result.status for result in results] == [Status.DONE, Status.TIMED_OUT]
+        assert results[1].results is None
+        assert elapsed < 0.8
+
+    def test_failed(self, books, make_author_report):
+        report = make_author_report("Invalid")
+        report.aggregations["columns"] = [{"path": "author__surname"}]
+
+        (result,) = DashboardRunner([report]).run()
+
+        assert result.status == Status.FAILED
+        assert result.error is not None
+
+    def test_cancel(self, books, make_author_report):
+        reports = [
+            make_author_report("slow", author_name=name)
+            for name in ("Ann", "Bob", "Cid")
+        ]
+        runner = DashboardRunner(reports, max_workers=1)
+
+        with mock.patch.object(dashboard, "get_report_results", slow_results(0.3)):
+            threading.Timer(0.1, runner.cancel).start()
+            results = runner.run()
+
+        # The running report completes, the pending reports are cancelled.
+        assert [result.status for result in results] == [
+            Status.DONE,
+            Status.CANCELLED,
+            Status.CANCELLED,
+        ]
+
+    def test_interrupt_query(self, db, make_author_report):
+        errors = []
+
+        def endless_query(report):
+            try:
+                with connections["default"].cursor() as cursor:
+                    cursor.execute(
+                        "WITH RECURSIVE numbers(number) AS "
+                        "(SELECT 1 UNION ALL SELECT number + 1 FROM numbers) "
+                        "SELECT COUNT(*) FROM numbers"
+                    )
+            except OperationalError as error:
+                errors.append(error)
+                raise
+
+        with mock.patch.object(dashboard, "get_report_results", endless_query):
+            (result,) = DashboardRunner(
+                [make_author_report("Endless")], timeout=0.2
+            ).run()
+
+        for _ in range(50):
+            if errors:
+                break
+
+            time.sleep(0.02)
+
+        assert result.status == Status.TIMED_OUT
+        assert "interrupted" in str(errors[0])
+
+    def test_interrupt_completing_report(self, books, make_author_report):
+        started, completed = threading.Event(), threading.Event()
+        raw_connections = []
+
+        def get_report_results(report):
+            started.set()
+            completed.wait(5)
+
+            return []
+
+        def interrupt_query(connection):
+            # The report completes while its query is interrupted.
+            completed.set()
+            time.sleep(0.1)
+            raw_connections.append(connection.connection)
+
+        runner = DashboardRunner([make_author_report("Ann")])
+        threading.Thread(target=lambda: started.wait(5) and runner.cancel()).start()
+
+        with mock.patch.object(
+            dashboard, "get_report_results", get_report_results
+        ), mock.patch.object(dashboard, "interrupt_query", interrupt_query):
+            (result,) = runner.run()
+
+        assert result.status == Status.DONE
+        assert len(raw_connections) == 1
+        assert raw_connections[0] is not None
@@ -0,0 +1,55 @@
+"""Report export encoder tests."""
+import datetime
+import decimal
+
+import pytest
+
+from django_reports.export import encode_csv, encode_ndjson, iter_batches
+
+ROWS = [
+    ("Ann's book", 1, decimal.Decimal("10.50"), datetime.date(2020, 1, 1)),
+    ('The "B" book, 2nd', 2, None, datetime.date(2021, 2, 1)),
+    ("Cid's book", 3, decimal.Decimal("12.00"), datetime.date(2022, 3, 1)),
+]
+COLUMNS = ["title", "edition", "price", "publication_date"]
+
+
+@pytest.mark.parametrize(
+    "row_count, batch_size, expected_sizes",
+    [(0, 2, []), (1, 2, [1]), (4, 2, [2, 2]), (5, 2, [2, 2, 1])],
+)
+def test_iter_batches(row_count, batch_size, expected_sizes):
+    rows = ((number,) for number in range(row_count))
+
+    batches = list(iter_batches(rows, batch_size))
+
+    assert [len(batch) for batch in batches] == expected_sizes
+    assert [row for batch in batches for row in batch] == [
+        (number,) for number in range(row_count)
+    ]
+
+
+def test_encode_csv():
+    chunks = list(encode_csv(COLUMNS, iter(ROWS), batch_size=2))
+
+    assert len(chunks) == 3
+    assert b"".join(chunks).decode() == (
+        "title,edition,price,publication_date\r\n"
+        "Ann's book,1,10.50,2020-01-01\r\n"
+        '"The ""B"" book, 2nd",2,,2021-02-01\r\n'
+        "Cid's book,3,12.00,2022-03-01\r\n"
+    )
+
+
+def test_encode_ndjson():
+    chunks = list(encode_ndjson(COLUMNS, iter(ROWS), batch_size=2))
+
+    assert len(chunks) == 2
+    assert b"".join(chunks).decode().splitlines() == [
+        '{"title": "Ann\'s book", "edition": 1, "price": "10.50", '
+        '"publication_date": "2020-01-01"}',
+        '{"title": "The \\"B\\" book, 2nd", "edition": 2, "price": null, '
+        '"publication_date": "2021-02-01"}',
+        '{"title": "Cid\'s book", "edition": 3, "price": "12.00", '
+        '"publication_date": "2022-03-01"}',
+    ]
@@ -1,18 +1,33 @@
+import datetime
 from unittest.mock import Mock, call, patch
 
 import pytest
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 from django_reports.filter import (
     SUPPORTS_XOR,
     Connector,
+    Filter,
     _validate_filter_connector_node,
     _validate_filter_leaf_node,
+    compile_query,
+    get_filter_key,
+    optimize_filter_data,
+    query_cache,
+    to_dict,
     to_query,
+    validate_filter,
     validate_filter_data,
+    validation_cache,
 )
+from django_reports.index.models import ModelIndex
 from tests.conftest import does_not_raise
+from tests.models import Book
+
+TITLE_LEAF = {"name": "title", "path": "title", "value": "A"}
+EDITION_LEAF = {"path": "edition", "lookup_expression": "gte", "value": 2}
 
 
 class TestToQuery:
@@ -158,7 +173,7 @@ class TestValidateFilterData:
         self, mock_validate_leaf_node, mock_validate_connector_node
     ):
         mock_field_index = Mock(find=Mock(return_value="field"))
-        filter_connector_data = {"children": ["child1", "child2"]}
+        filter_connector_data = {"children": [{"path": "child1"}, {"path": "child2"}]}
 
         validate_filter_data(filter_connector_data, mock_field_index)
 
@@ -166,8 +181,8 @@ class TestValidateFilterData:
             call(filter_connector_data)
         ]
         assert mock_validate_leaf_node.call_args_list == [
-            call("child1", mock_field_index),
-            call("child2", mock_field_index),
+            call({"path": "child1"}, mock_field_index),
+            call({"path": "child2"}, mock_field_index),
         ]
 
         mock_validate_connector_node.reset_mock()
@@ -251,7 +266,17 @@ class TestValidateFilterData:
                     find=Mock(
                         side_effect=(
                             lambda path: (
-                                (path == "field-path" and "field-index") or None
+                                (
+                                    path == "field-path"
+                                    and Mock(
+                                        field=Mock(
+                                            lookup_expressions=frozenset(
+                                                {"lookup-expression"}
+                                            )
+                                        )
+                                    )
+                                )
+                                or None
                             )
                         )
                     )
@@ -274,6 +299,25 @@ class TestValidateFilterData:
                     match="Field with path 'field-path' does not exist or is not supported.",
                 ),
             ),
+            (
+                {
+                    "name": "field-name",
+                    "path": "field-path",
+                    "lookup_expression": "unsupported",
+                    "value": "field-value",
+                },
+                Mock(
+                    find=Mock(
+                        return_value=Mock(
+                            field=Mock(lookup_expressions=frozenset({"exact"}))
+                        )
+                    )
+                ),
+                pytest.raises(
+                    ValidationError,
+                    match="'unsupported' is not a supported lookup of field 'field-path'.",
+                ),
+            ),
         ],
     )
     def test_validate_filter_leaf_node(
@@ -282,3 +326,606 @@ class TestValidateFilterData:
         """Test leaf node filter data validation."""
         with expectation:
             _validate_filter_leaf_node(filter_node_data, mock_field_index)
+
+
+class TestFilterCache:
+    @pytest.fixture(autouse=True)
+    def clear_caches(self):
+        query_cache.clear()
+        validation_cache.clear()
+
+    def test_filter_key_is_canonical(self):
+        key = get_filter_key(
+            {"connector": "AND", "children": [TITLE_LEAF, EDITION_LEAF]}
+        )
+
+        assert key == get_filter_key(
+            {"connector": "AND", "children": [EDITION_LEAF, TITLE_LEAF]}
+        )
+        assert key == get_filter_key(
+            {
+                "connector": "AND",
+                "negated": False,
+                "children": [EDITION_LEAF, {**TITLE_LEAF, "name": "Title"}],
+            }
+        )
+        assert key != get_filter_key(
+            {"connector": "OR", "children": [TITLE_LEAF, EDITION_LEAF]}
+        )
+        assert key != get_filter_key(
+            {
+                "connector": "AND",
+                "negated": True,
+                "children": [TITLE_LEAF, EDITION_LEAF],
+            }
+        )
+
+    @pytest.mark.parametrize(
+        "filter_node_data, other_filter_node_data",
+        [
+            (
+                {"children": [TITLE_LEAF]},
+                {"connector": "AND", "children": [TITLE_LEAF]},
+            ),
+            (
+                {"connector": "AND", "negated": "False", "children": [TITLE_LEAF]},
+                {"connector": "AND", "negated": False, "children": [TITLE_LEAF]},
+            ),
+            ({"path": "title"}, {"path": "title", "value": None}),
+            (
+                {"path": "title", "lookup_expression": "", "value": "A"},
+                {"path": "title", "lookup_expression": None, "value": "A"},
+            ),
+        ],
+    )
+    def test_filter_key_of_invalid_data(self, filter_node_data, other_filter_node_data):
+        assert get_filter_key(filter_node_data) != get_filter_key(
+            other_filter_node_data
+        )
+
+    def test_compile_query(self):
+        query = compile_query(
+            {"connector": "AND", "children": [TITLE_LEAF, EDITION_LEAF]}, "tests.Book"
+        )
+
+        assert query == models.Q(("title", "A"), ("edition__gte", 2))
+        assert (
+            compile_query(
+                {"connector": "AND", "children": [EDITION_LEAF, TITLE_LEAF]},
+                "tests.Book",
+            )
+            is query
+        )
+        assert (
+            compile_query(
+                {"connector": "AND", "children": [TITLE_LEAF, EDITION_LEAF]},
+                "tests.Author",
+            )
+            is not query
+        )
+        assert query_cache.info()[:2] == (1, 2)
+
+    def test_compile_query_coerces_values(self):
+        query = compile_query(
+            {
+                "connector": "OR",
+                "children": [
+                    leaf("edition", ["3", "1", 3], "in"),
+                    leaf("publication_date", "2020-02-01", "gte"),
+                ],
+            },
+            "tests.Book",
+            ModelIndex(Book).field_index,
+        )
+
+        assert query == models.Q(
+            ("edition__in", [1, 3]),
+            ("publication_date__gte", datetime.date(2020, 2, 1)),
+            _connector="OR",
+        )
+
+    def test_compile_query_with_and_without_field_index(self):
+        filter_node_data = leaf("edition", ["3", "1"], "in")
+
+        assert compile_query(filter_node_data, "tests.Book") == models.Q(
+            edition__in=["3", "1"]
+        )
+        assert compile_query(
+            filter_node_data, "tests.Book", ModelIndex(Book).field_index
+        ) == models.Q(edition__in=[1, 3])
+
+    def test_compile_query_field_index_callable(self):
+        get_field_index = Mock(return_value=ModelIndex(Book).field_index)
+
+        query = compile_query(leaf("edition", "2"), "tests.Book", get_field_index)
+
+        assert query == models.Q(edition=2)
+        assert (
+            compile_query(leaf("edition", "2"), "tests.Book", get_field_index) is query
+        )
+        get_field_index.assert_called_once_with()
+
+    def test_filter_does_not_build_cached_field_index(self):
+        Filter(leaf("edition", "2"), ModelIndex(Book))
+        model_index = ModelIndex(Book)
+
+        Filter(leaf("edition", "2"), model_index)
+
+        assert "field_index" not in model_index.__dict__
+
+    def test_compile_query_current_time_zone(self, settings):
+        settings.USE_TZ = True
+        filter_node_data = leaf("created_at", "2020-02-01T12:00", "gte")
+        field_index = ModelIndex(Book).field_index
+        queries = {}
+
+        for time_zone in ["Europe/Amsterdam", "America/New_York", "Europe/Amsterdam"]:
+            with timezone.override(time_zone):
+                queries.setdefault(time_zone, []).append(
+                    compile_query(filter_node_data, "tests.Book", field_index)
+                )
+
+        amsterdam_query, cached_amsterdam_query = queries["Europe/Amsterdam"]
+        assert cached_amsterdam_query is amsterdam_query
+        assert amsterdam_query.children[0][1] == datetime.datetime(
+            2020, 2, 1, 11, tzinfo=datetime.timezone.utc
+        )
+        assert queries["America/New_York"][0].children[0][1] == datetime.datetime(
+            2020, 2, 1, 17, tzinfo=datetime.timezone.utc
+        )
+
+    def test_validate_filter(self):
+        model_index = ModelIndex(Book)
+        valid_filter = {"connector": "AND", "children": [TITLE_LEAF]}
+        invalid_filter = {"connector": "AND", "children": [{"path": "subtitle"}]}
+
+        with patch(
+            "django_reports.filter._validate_filter_leaf_node",
+            wraps=_validate_filter_leaf_node,
+        ) as mock_validate_leaf_node:
+            for _ in range(2):
+                validate_filter(valid_filter, model_index)
+
+                with pytest.raises(ValidationError, match="'subtitle' does not exist"):
+                    validate_filter(invalid_filter, model_index)
+
+        # Valid filters are only validated once, invalid filters every time.
+        assert mock_validate_leaf_node.call_count == 3
+        assert validation_cache.info()[:2] == (1, 3)
+
+    def test_validate_filter_error_paths(self):
+        model_index = ModelIndex(Book)
+        invalid_leaf = {"path": "subtitle", "value": "A"}
+
+        with pytest.raises(ValidationError, match=r"\$\.children\[1\]: "):
+            validate_filter(
+                {"connector": "AND", "children": [TITLE_LEAF, invalid_leaf]},
+                model_index,
+            )
+
+        # The reordered filter has the same key, but the error points to its own child.
+        with pytest.raises(ValidationError, match=r"\$\.children\[0\]: "):
+            validate_filter(
+                {"connector": "AND", "children": [invalid_leaf, TITLE_LEAF]},
+                model_index,
+            )
+
+    def test_validate_filter_without_connector(self):
+        model_index = ModelIndex(Book)
+        validate_filter({"connector": "AND", "children": [TITLE_LEAF]}, model_index)
+
+        with pytest.raises(ValidationError, match="'connector' is required"):
+            validate_filter({"children": [TITLE_LEAF]}, model_index)
+
+
+def leaf(path, value, lookup_expression=None):
+    return {"path": path, "lookup_expression": lookup_expression, "value": value}
+
+
+def negated(*children, connector="AND"):
+    return {"connector": connector, "negated": True, "children": list(children)}
+
+
+class TestOptimizeFilterData:
+    @pytest.mark.parametrize(
+        "filter_node_data,expected_filter_node_data",
+        [
+            # Single child connectors are replaced by their child.
+            (
+                {"connector": "OR", "children": [leaf("title", "A")]},
+                leaf("title", "A"),
+            ),
+            # Same connector nesting is flattened.
+            (
+                {
+                    "connector": "AND",
+                    "children": [
+                        leaf("title", "A"),
+                        {
+                            "connector": "AND",
+                            "children": [
+                                leaf("edition", 2),
+                                leaf("format", "paperback"),
+                            ],
+                        },
+                    ],
+                },
+                {
+                    "connector": "AND",
+                    "negated": False,
+                    "children": [
+                        leaf("title", "A"),
+                        leaf("edition", 2),
+                        leaf("format", "paperback"),
+                    ],
+                },
+            ),
+            # Duplicate children are dropped.
+            (
+                {
+                    "connector": "AND",
+                    "children": [
+                        leaf("title", "A", "startswith"),
+                        {**leaf("title", "A", "startswith"), "name": "Title"},
+                        leaf("edition", 2),
+                    ],
+                },
+                {
+                    "connector": "AND",
+                    "negated": False,
+                    "children": [leaf("title", "A", "startswith"), leaf("edition", 2)],
+                },
+            ),
+            # OR'd exact leaves on one path are merged into an `in` leaf.
+            (
+                {
+                    "connector": "OR",
+                    "children": [
+                        leaf("edition", 1),
+                        leaf("title", "A", "startswith"),
+                        leaf("edition", 2, "exact"),
+                        leaf("edition", [2, 3], "in"),
+                    ],
+                },
+                {
+                    "connector": "OR",
+                    "negated": False,
+                    "children": [
+                        leaf("edition", [1, 2, 3], "in"),
+                        leaf("title", "A", "startswith"),
+                    ],
+                },
+            ),
+            # `None` values are `isnull` checks and are not merged.
+            (
+                {
+                    "connector": "OR",
+                    "children": [leaf("author", None), leaf("author", 1)],
+                },
+                {
+                    "connector": "OR",
+                    "negated": False,
+                    "children": [leaf("author", None), leaf("author", 1)],
+                },
+            ),
+            # Negations are kept where they are, their children are optimized.
+            (
+                negated(
+                    {
+                        "connector": "OR",
+                        "children": [leaf("edition", 1), leaf("edition", 2)],
+                    }
+                ),
+                negated(leaf("edition", [1, 2], "in")),
+            ),
+            (
+                negated(leaf("title", "A"), leaf("edition", 1, "gte")),
+                negated(leaf("title", "A"), leaf("edition", 1, "gte")),
+            ),
+            (
+                negated(negated(leaf("title", "A"))),
+                negated(negated(leaf("title", "A"))),
+            ),
+            # Negated exact leaves on one path are merged when AND'd.
+            (
+                {
+                    "connector": "AND",
+                    "children": [
+                        negated(leaf("author__name", "Ann")),
+                        negated(leaf("author__name", "Bob")),
+                    ],
+                },
+                negated(leaf("author__name", ["Ann", "Bob"], "in")),
+            ),
+            # XOR nodes are not restructured.
+            (
+                {
+                    "connector": "XOR",
+                    "children": [leaf("edition", 1), leaf("edition", 1)],
+                },
+                {
+                    "connector": "XOR",
+                    "negated": False,
+                    "children": [leaf("edition", 1), leaf("edition", 1)],
+                },
+            ),
+        ],
+    )
+    def test_optimize_filter_data(self, filter_node_data, expected_filter_node_data):
+        assert (
+            optimize_filter_data(filter_node_data, ModelIndex(Book).field_index)
+            == expected_filter_node_data
+        )
+
+    @pytest.mark.parametrize(
+        "filter_node_data",
+        [
+            {
+                "connector": "OR",
+                "children": [
+                    leaf("author__country__name", "Germany"),
+                    leaf("author__country__name", "Netherlands"),
+                ],
+            },
+            {
+                "connector": "AND",
+                "children": [
+                    {"connector": "AND", "children": [leaf("edition", 1)]},
+                    leaf("author__country", True, "isnull"),
+                ],
+            },
+        ],
+    )
+    def test_nullable_paths_are_not_optimized(self, filter_node_data):
+        assert (
+            optimize_filter_data(filter_node_data, ModelIndex(Book).field_index)
+            is filter_node_data
+        )
+
+    def test_without_field_index(self):
+        filter_node_data = {"connector": "OR", "children": [leaf("edition", 1)]}
+
+        assert optimize_filter_data(filter_node_data) is filter_node_data
+
+    @pytest.mark.parametrize(
+        "filter_node_data",
+        [
+            {
+                "connector": "OR",
+                "children": [
+                    leaf("edition", 1),
+                    {
+                        "connector": "OR",
+                        "children": [leaf("edition", 2), leaf("author__name", "Ann")],
+                    },
+                    leaf("edition", 1),
+                ],
+            },
+            negated(
+                {
+                    "connector": "AND",
+                    "children": [
+                        leaf("publisher__name", "Springer"),
+                        negated(leaf("edition", 2), leaf("edition", 3), connector="OR"),
+                    ],
+                },
+                leaf("format", "paperback"),
+                connector="OR",
+            ),
+            negated(leaf("author__country__name", "Netherlands")),
+            negated(
+                leaf("author__country", True, "isnull"),
+                {
+                    "connector": "AND",
+                    "children": [leaf("author__country__name", "Germany")],
+                },
+            ),
+            {
+                "connector": "OR",
+                "children": [
+                    {
+                        "connector": "OR",
+                        "children": [
+                            leaf("edition", 1),
+                            negated(
+                                leaf("author__name", "Ann"),
+                                leaf("author__country", None),
+                                connector="OR",
+                            ),
+                        ],
+                    },
+                    negated(
+                        leaf("author__country__name", "Netherlands"),
+                        negated(
+                            leaf("author__favourite_book__title", "Book 1"),
+                            leaf("author__country__name", "Netherlands"),
+                            connector="OR",
+                        ),
+                    ),
+                ],
+            },
+            {
+                "connector": "AND",
+                "children": [
+                    negated(leaf("author__name", "Ann")),
+                    negated(leaf("author__name", "Bob")),
+                    {
+                        "connector": "AND",
+                        "children": [leaf("publication_date", 2021, "year__gte")],
+                    },
+                ],
+            },
+            pytest.param(
+                {
+                    "connector": "XOR",
+                    "children": [
+                        negated(leaf("author__country__name", "Germany")),
+                        negated(
+                            negated(leaf("author__country", None)),
+                            negated(leaf("author__name", "Ann"), connector="OR"),
+                            {
+                                "connector": "AND",
+                                "children": [
+                                    {
+                                        "connector": "AND",
+                                        "children": [
+                                            leaf("format", "paperback"),
+                                            leaf("author__country", True, "isnull"),
+                                        ],
+                                    }
+                                ],
+                            },
+                            connector="XOR",
+                        ),
+                        {
+                            "connector": "OR",
+                            "children": [leaf("author__country", False, "isnull")],
+                        },
+                    ],
+                },
+                marks=pytest.mark.skipif(
+                    not SUPPORTS_XOR, reason="Unsupported operator '^'"
+                ),
+            ),
+        ],
+    )
+    def test_optimized_query_is_equivalent(self, filter_node_data, books):
+        query = to_query(filter_node_data)
+        optimized_query = models.Q(
+            to_query(
+                optimize_filter_data(filter_node_data, ModelIndex(Book).field_index)
+            )
+        )
+
+        assert set(Book.objects.filter(optimized_query)) == set(
+            Book.objects.filter(query)
+        )
+
+    def test_compile_query_optimizes(self):
+        query = compile_query(
+            {"connector": "OR", "children": [leaf("edition", 1), leaf("edition", 2)]},
+            "tests.Book",
+            ModelIndex(Book).field_index,
+        )
+
+        assert query == models.Q(edition__in=[1, 2])
+        assert " IN (1, 2)" in str(Book.objects.filter(query).query)
+
+
+def wide_filter_data(leaf_count):
+    return {
+        "connector": "OR",
+        "children": [leaf("edition", number) for number in range(leaf_count)],
+    }
+
+
+def deep_filter_data(depth):
+    filter_node_data = leaf("title", "A")
+
+    for number in range(depth):
+        filter_node_data = {
+            "connector": ("AND", "OR")[number % 2],
+            "negated": number % 3 == 0,
+            "children": [leaf("edition", number), filter_node_data],
+        }
+
+    return filter_node_data
+
+
+class TestLargeFilterData:
+    """Stress test the filter tree traversals with 100k node trees."""
+
+    NODE_COUNT = 100_000
+
+    @pytest.fixture(params=["wide", "deep"])
+    def filter_node_data(self, request):
+        if request.param == "wide":
+            return wide_filter_data(self.NODE_COUNT)
+
+        return deep_filter_data(self.NODE_COUNT // 2)
+
+    def test_to_query_and_to_dict(self, filter_node_data):
+        query = to_query(filter_node_data)
+        query_dict = to_dict(query)
+        node_count = 0
+        stack = [query_dict]
+
+        while stack:
+            node = stack.pop()
+            node_count += 1
+
+            if isinstance(node, dict):
+                stack.extend(node["children"])
+
+        assert node_count >= self.NODE_COUNT
+
+    def test_validate_filter_data(self, filter_node_data):
+        validate_filter_data(filter_node_data, ModelIndex(Book).field_index)
+
+    def test_get_filter_key(self, filter_node_data):
+        assert get_filter_key(filter_node_data) == get_filter_key(filter_node_data)
+
+    def test_coerce_in_values(self):
+        field = ModelIndex(Book).field_index.find("edition").field
+        values = [str(number) for number in reversed(range(self.NODE_COUNT))]
+
+        assert field.coerce_lookup_value("in", values * 2) == list(
+            range(self.NODE_COUNT)
+        )
+
+    def test_optimize_filter_data(self, filter_node_data):
+        optimized_filter_node_data = optimize_filter_data(
+            filter_node_data, ModelIndex(Book).field_index
+        )
+
+        if "children" in filter_node_data and len(filter_node_data["children"]) > 2:
+            assert optimized_filter_node_data == leaf(
+                "edition", list(range(self.NODE_COUNT)), "in"
+            )
+
+
+class TestValidationErrorPaths:
+    def test_all_errors_are_reported_with_their_path(self):
+        filter_node_data = {
+            "connector": "AND",
+            "children": [
+                leaf("title", "A"),
+                {"connector": "NAND", "children": [leaf("subtitle", "B")]},
+                {"connector": "OR", "children": []},
+                {"value": 1},
+                leaf("edition", [1, "x", "y"], "in"),
+            ],
+        }
+
+        with pytest.raises(ValidationError) as error:
+            validate_filter_data(filter_node_data, ModelIndex(Book).field_index)
+
+        assert error.value.messages == [
+            "$.children[1]: 'NAND' is not a valid connector.",
+            "$.children[1].children[0]: Field with path 'subtitle' does not exist "
+            "or is not supported.",
+            "$.children[2]: 'children' can not be empty.",
+            "$.children[3]: 'path' is required.",
+            "$.children[4]: Index 1: 'x' is not a valid integer.",
+            "$.children[4]: Index 2: 'y' is not a valid integer.",
+        ]
+
+    @pytest.mark.parametrize("child", ["x", 1, None, ["x"]])
+    def test_non_object_nodes_are_reported_with_their_path(self, child):
+        filter_node_data = {
+            "connector": "AND",
+            "children": [leaf("title", "A"), {"connector": "OR", "children": [child]}],
+        }
+
+        with pytest.raises(ValidationError) as error:
+            validate_filter(filter_node_data, ModelIndex(Book))
+
+        assert error.value.messages == [
+            "$.children[1].children[0]: Filter node must be an object."
+        ]
+
+    def test_non_object_root_node(self):
+        with pytest.raises(ValidationError) as error:
+            validate_filter_data("x", ModelIndex(Book).field_index)
+
+        assert error.value.messages == ["$: Filter node must be an object."]
@@ -0,0 +1,153 @@
+"""Query cost guard tests."""
+import pytest
+
+from django_reports.exceptions import QueryCostExceeded
+from django_reports.guard import (
+    QueryEstimate,
+    check_report_cost,
+    estimate_query,
+    get_budget_errors,
+    parse_postgresql_plan,
+    parse_sqlite_plan,
+)
+from django_reports.models import Report
+from tests.models import Author, Book
+
+POSTGRESQL_PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Hash Join",
+            "Total Cost": 2440.5,
+            "Plan Rows": 120,
+            "Plans": [
+                {
+                    "Node Type": "Seq Scan",
+                    "Relation Name": "tests_book",
+                    "Total Cost": 2200.0,
+                    "Plan Rows": 1200,
+                },
+                {
+                    "Node Type": "Hash",
+                    "Plans": [
+                        {
+                            "Node Type": "Index Scan",
+                            "Relation Name": "tests_author",
+                            "Plan Rows": 1,
+                        }
+                    ],
+                },
+            ],
+        }
+    }
+]
+
+
+@pytest.fixture
+def report(books, make_report):
+    return make_report(
+        name="books",
+        filters={
+            "connector": "AND",
+            "children": [
+                {"path": "title", "lookup_expression": "icontains", "value": "book"}
+            ],
+        },
+        aggregations={"columns": [{"path": "title"}]},
+    )
+
+
+def test_parse_postgresql_plan():
+    assert parse_postgresql_plan(POSTGRESQL_PLAN) == QueryEstimate(
+        2440.5, 120, ("tests_book",)
+    )
+
+
+@pytest.mark.parametrize(
+    "plan, expected",
+    [
+        ("2 0 0 SCAN tests_book", ("tests_book",)),
+        ("3 0 0 SCAN TABLE tests_book USING INDEX tests_book_title", ("tests_book",)),
+        (
+            "7 0 0 SCAN tests_book\n"
+            "9 0 0 SEARCH tests_author USING INTEGER PRIMARY KEY (rowid=?)\n"
+            "14 0 0 USE TEMP B-TREE FOR GROUP BY",
+            ("tests_book",),
+        ),
+        ("2 0 0 SCAN CONSTANT ROW", ()),
+        ("2 0 0 SEARCH tests_book USING INTEGER PRIMARY KEY (rowid=?)", ()),
+    ],
+)
+def test_parse_sqlite_plan(plan, expected):
+    assert parse_sqlite_plan(plan) == expected
+
+
+def test_estimate_query(books):
+    assert estimate_query(Book.objects.filter(title__icontains="book")) == (
+        QueryEstimate(None, 12, ("tests_book",))
+    )
+    assert estimate_query(Book.objects.filter(pk=1)) == QueryEstimate(None, 0, ())
+
+
+def test_estimate_query_table_alias(books):
+    estimate = estimate_query(
+        Author.objects.filter(favourite_book__author__country__name="Germany")
+    )
+
+    assert estimate == QueryEstimate(None, 3, ("tests_author",))
+
+
+def test_get_budget_errors():
+    estimate = QueryEstimate(2440.5, 120, ("tests_book",))
+
+    assert get_budget_errors(estimate, max_cost=5000, max_rows=1000) == []
+    assert get_budget_errors(estimate, max_cost=1000, max_rows=100) == [
+        {
+            "code": "max_cost",
+            "message": "The estimated query cost 2440.5 exceeds the budget of 1000. The query "
+            "reads all rows of tests_book.",
+            "estimate": 2440.5,
+            "budget": 1000,
+            "full_scans": ["tests_book"],
+        },
+        {
+            "code": "max_rows",
+            "message": "The estimated 120 query rows exceed the budget of 100. The query reads "
+            "all rows of tests_book.",
+            "estimate": 120,
+            "budget": 100,
+            "full_scans": ["tests_book"],
+        },
+    ]
+    # Budgets of estimates the database does not make are ignored.
+    assert get_budget_errors(QueryEstimate(None, None, ()), 1, 1) == []
+
+
+class TestCheckReportCost:
+    def test_no_budget(self, report, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert check_report_cost(report) is None
+
+    def test_within_budget(self, report):
+        assert check_report_cost(report, max_rows=12) == QueryEstimate(
+            None, 12, ("tests_book",)
+        )
+
+    def test_over_budget(self, report, settings):
+        settings.DJANGO_REPORTS = {"MAX_QUERY_ROWS": 10}
+
+        with pytest.raises(QueryCostExceeded) as exc_info:
+            check_report_cost(report)
+
+        assert exc_info.value.estimate == QueryEstimate(None, 12, ("tests_book",))
+        assert [error["code"] for error in exc_info.value.errors] == ["max_rows"]
+        assert str(exc_info.value) == (
+            "The estimated 12 query rows exceed the budget of 10. The query reads all rows "
+            "of tests_book."
+        )
+
+    def test_summary(self, report):
+        report.type = Report.Type.SUMMARY
+        report.aggregations = {"metrics": [{"name": "books", "function": "count"}]}
+
+        with pytest.raises(QueryCostExceeded):
+            check_report_cost(report, max_rows=10)
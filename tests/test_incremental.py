@@ -0,0 +1,198 @@
+"""Incremental report refresh tests."""
+import copy
+import datetime
+import decimal
+
+import pytest
+
+from django_reports.incremental import (
+    get_incremental_results,
+    get_watermark_field,
+    refresh_report,
+    supports_incremental_refresh,
+)
+from django_reports.index.models import ModelIndex
+from django_reports.models import Report
+from tests.models import Author, Book, Publisher, Reading
+
+METRICS = [
+    {"name": "books", "function": "count"},
+    {"name": "revenue", "function": "sum", "path": "price"},
+    {"name": "average_price", "function": "avg", "path": "price"},
+    {"name": "average_edition", "function": "avg", "path": "edition"},
+    {"name": "first_created", "function": "min", "path": "created_at"},
+    {"name": "last_published", "function": "max", "path": "publication_date"},
+]
+
+
+@pytest.fixture
+def make_hardcover_report(make_report):
+    """Return a factory of saved reports on hardcover books with all incremental metrics."""
+
+    def make_hardcover_report(report_type, **aggregations):
+        return make_report(
+            name=f"Books {report_type}",
+            type=report_type,
+            filters={
+                "connector": "AND",
+                "children": [{"path": "format", "value": Book.Format.HARDCOVER}],
+            },
+            aggregations={"metrics": copy.deepcopy(METRICS), **aggregations},
+            save=True,
+        )
+
+    return make_hardcover_report
+
+
+def add_books(count, created_at=datetime.datetime(2024, 1, 1)):
+    author = Author.objects.get(name="Ann")
+    publisher = Publisher.objects.first()
+
+    Book.objects.bulk_create(
+        Book(
+            title=f"New book {number}",
+            edition=number + 1,
+            price=decimal.Decimal("2.50") * (number + 1),
+            format=Book.Format.HARDCOVER,
+            publication_date=datetime.date(2024, 1, number + 1),
+            created_at=created_at,
+            author=author,
+            publisher=publisher,
+        )
+        for number in range(count)
+    )
+
+
+def test_get_watermark_field():
+    assert get_watermark_field(ModelIndex.for_model(Book)) == "id"
+
+
+def test_supports_incremental_refresh(books, make_hardcover_report):
+    assert supports_incremental_refresh(make_hardcover_report(Report.Type.SUMMARY))
+    assert not supports_incremental_refresh(make_hardcover_report(Report.Type.TABLE))
+
+    report = make_hardcover_report(Report.Type.CHART)
+    report.aggregations["metrics"][0]["distinct"] = True
+    assert not supports_incremental_refresh(report)
+
+
+@pytest.mark.parametrize(
+    "report_type, aggregations",
+    [
+        (Report.Type.SUMMARY, {}),
+        (
+            Report.Type.CHART,
+            {
+                "columns": [
+                    {"path": "author__name"},
+                    {"path": "created_at", "transform": "year"},
+                ]
+            },
+        ),
+        (Report.Type.CHART, {"columns": [{"path": "publication_date"}]}),
+    ],
+)
+def test_incremental_results_match_full_results(
+    books, report_type, aggregations, make_hardcover_report
+):
+    report = make_hardcover_report(report_type, **aggregations)
+
+    assert _evaluate(get_incremental_results(report)) == _evaluate(report.get_results())
+
+    add_books(3)
+
+    assert _evaluate(get_incremental_results(report)) == _evaluate(report.get_results())
+
+    add_books(2, created_at=datetime.datetime(2025, 6, 1))
+
+    assert _evaluate(get_incremental_results(report)) == _evaluate(report.get_results())
+
+
+def test_refresh_only_aggregates_new_rows(books, make_hardcover_report):
+    report = make_hardcover_report(Report.Type.SUMMARY)
+    refresh_report(report)
+    watermark = report.state.watermark
+
+    add_books(2)
+    report_state = refresh_report(report)
+
+    assert report_state.watermark == watermark + 2
+    assert get_incremental_results(report, refresh=False)["books"] == 8
+
+
+def test_full_rebuild(books, make_hardcover_report):
+    report = make_hardcover_report(Report.Type.SUMMARY)
+    refresh_report(report)
+
+    # Deleted rows are only noticed by a full rebuild.
+    Book.objects.filter(format=Book.Format.HARDCOVER).first().delete()
+    assert get_incremental_results(report)["books"] == 6
+
+    refresh_report(report, full=True)
+    assert get_incremental_results(report, refresh=False)["books"] == 5
+
+
+def test_report_change_rebuilds_state(books, make_hardcover_report):
+    report = make_hardcover_report(Report.Type.SUMMARY)
+    refresh_report(report)
+
+    report.filters = {}
+
+    assert get_incremental_results(report)["books"] == 12
+
+
+def test_empty_summary(db, make_hardcover_report):
+    report = make_hardcover_report(Report.Type.SUMMARY)
+
+    assert get_incremental_results(report) == report.get_results()
+
+
+def test_unsupported_report(books, make_hardcover_report):
+    with pytest.raises(ValueError):
+        refresh_report(make_hardcover_report(Report.Type.TABLE))
+
+
+def test_datetime_watermark(db, make_report):
+    report = make_report(
+        name="Readings",
+        model_label="tests.Reading",
+        type=Report.Type.CHART,
+        aggregations={
+            "columns": [{"path": "recorded_at"}],
+            "metrics": [
+                {"name": "readings", "function": "count"},
+                {"name": "last", "function": "max", "path": "recorded_at"},
+            ],
+        },
+        save=True,
+    )
+    recorded_at = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+    Reading.objects.create(id="a", sensor="a", value=1, recorded_at=recorded_at)
+
+    assert get_watermark_field(report.model_index) == "recorded_at"
+
+    for _ in range(2):
+        assert get_incremental_results(report) == [
+            {"recorded_at": recorded_at, "readings": 1, "last": recorded_at}
+        ]
+
+    Reading.objects.create(
+        id="b",
+        sensor="a",
+        value=2,
+        recorded_at=recorded_at + datetime.timedelta(microseconds=1),
+    )
+
+    assert get_incremental_results(report) == list(report.get_results())
+    assert refresh_report(report).watermark == "2024-01-01T12:00:00.123457"
+
+
+def _evaluate(results):
+    """Evaluate the results, rounding averages whose precision depends on the database."""
+    rows = [results] if isinstance(results, dict) else list(results)
+
+    for row in rows:
+        for name in ("average_price", "average_edition"):
+            row[name] = row[name] and round(row[name], 6)
+
+    return rows
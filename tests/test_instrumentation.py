@@ -0,0 +1,137 @@
+"""Instrumentation tests."""
+import pytest
+
+from django_reports.export import encode_csv
+from django_reports.filter import Filter, to_query, validate_filter_data
+from django_reports.index.models import ModelIndex
+from django_reports.instrumentation import (
+    Stage,
+    instrument,
+    is_enabled,
+    measure,
+    measure_iter,
+    stage_completed,
+    start,
+)
+from django_reports.runner import ReportRunner
+from tests.models import Book
+
+FILTER_DATA = {
+    "connector": "AND",
+    "children": [{"path": "author__name", "value": "Ann"}],
+}
+
+
+@pytest.fixture
+def stages():
+    metrics = []
+
+    def receiver(sender, **kwargs):
+        metrics.append(kwargs["metrics"])
+
+    stage_completed.connect(receiver)
+    yield metrics
+    stage_completed.disconnect(receiver)
+
+
+@pytest.fixture
+def report(books, make_report):
+    return make_report(
+        name="books",
+        filters=FILTER_DATA,
+        aggregations={"columns": [{"path": "title"}, {"path": "edition"}]},
+        save=True,
+    )
+
+
+def test_disabled():
+    rows = iter([(1,), (2,)])
+
+    assert not is_enabled()
+    assert start(Stage.EXECUTION) is None
+    assert measure_iter(Stage.EXECUTION, rows) is rows
+
+    with measure(Stage.EXECUTION) as measurement:
+        assert measurement is None
+
+
+def test_measure(stages, db):
+    with measure(Stage.EXECUTION, "books"):
+        list(Book.objects.all())
+        list(Book.objects.all())
+
+    assert is_enabled()
+    assert len(stages) == 1
+    assert stages[0].stage == Stage.EXECUTION
+    assert stages[0].label == "books"
+    assert stages[0].query_count == 2
+    assert 0 < stages[0].query_duration <= stages[0].duration
+    assert stages[0].row_count is None
+
+
+def test_measure_iter(stages, books):
+    def rows():
+        yield from Book.objects.values_list("pk")
+        yield from Book.objects.values_list("pk")
+
+    rows = measure_iter(Stage.EXECUTION, rows())
+    next(rows)
+    # Queries between rows are not part of the stage.
+    list(Book.objects.all())
+    list(rows)
+
+    assert len(stages) == 1
+    assert stages[0].query_count == 2
+    assert stages[0].row_count == 24
+
+
+def test_instrument(stages):
+    @instrument(Stage.VALIDATION)
+    def validate(value):
+        return value
+
+    assert validate(1) == 1
+    assert [metrics.stage for metrics in stages] == [Stage.VALIDATION]
+    assert stages[0].query_count == 0
+
+
+def test_filter_stages(stages):
+    model_index = ModelIndex(Book)
+    filter_ = Filter(FILTER_DATA, model_index)
+
+    assert (stages[0].stage, stages[0].label) == (Stage.FIELD_INDEX, "tests.Book")
+
+    # Compiling the filter may build its query, depending on the query cache.
+    stages.clear()
+    validate_filter_data(FILTER_DATA, model_index.field_index)
+    to_query(FILTER_DATA)
+    filter_(Book.objects.all())
+
+    assert [(metrics.stage, metrics.label) for metrics in stages] == [
+        (Stage.VALIDATION, None),
+        (Stage.QUERY_BUILD, None),
+        (Stage.FILTER, None),
+    ]
+
+
+def test_report_stages(stages, report):
+    runner = ReportRunner(report)
+
+    content = b"".join(encode_csv(runner.columns, runner, batch_size=3))
+
+    assert content.decode().splitlines()[1:] == [
+        "Ann's book 0,1",
+        "Ann's book 3,1",
+        "Ann's book 6,1",
+        "Ann's book 9,1",
+    ]
+    execution, serialization = (
+        metrics
+        for metrics in stages
+        if metrics.stage in (Stage.EXECUTION, Stage.SERIALIZATION)
+    )
+    assert execution.label == "books"
+    assert execution.query_count == 1
+    assert execution.row_count == 4
+    assert serialization.query_count == 0
+    assert serialization.row_count == 4
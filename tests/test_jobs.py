@@ -0,0 +1,170 @@
+"""Report job tests."""
+import datetime
+import io
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from django_reports.jobs import claim_job, run_job, run_pending_jobs, submit_job
+from django_reports.models import Report, ReportJob
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+@pytest.fixture
+def user(db):
+    return get_user_model().objects.create(username="reporter")
+
+
+@pytest.fixture
+def report(books, user, make_report):
+    return make_report(
+        name="books",
+        aggregations={"columns": [{"path": "title"}, {"path": "edition"}]},
+        created_by=user,
+        save=True,
+    )
+
+
+@pytest.fixture
+def summary_report(books, user, make_report):
+    return make_report(
+        name="summary",
+        type=Report.Type.SUMMARY,
+        aggregations={"metrics": [{"name": "books", "function": "count"}]},
+        created_by=user,
+        save=True,
+    )
+
+
+def test_submit_job(report, user):
+    job = submit_job(report, format="ndjson", created_by=user)
+
+    assert job.status == ReportJob.Status.PENDING
+    assert job.format == "ndjson"
+    assert job.created_by == user
+    assert job.progress is None
+    assert job.duration is None
+
+
+def test_claim_job(report):
+    first_job = submit_job(report)
+    second_job = submit_job(report)
+
+    assert claim_job() == first_job
+    assert claim_job() == second_job
+    assert claim_job() is None
+
+    first_job.refresh_from_db()
+    assert first_job.status == ReportJob.Status.RUNNING
+    assert first_job.started_at is not None
+    assert first_job.heartbeat_at == first_job.started_at
+
+
+@pytest.mark.parametrize(
+    "timeout, heartbeat_age, is_claimed",
+    [(60, 61, True), (60, 59, False), (None, 61, False)],
+)
+def test_claim_abandoned_job(report, settings, timeout, heartbeat_age, is_claimed):
+    settings.DJANGO_REPORTS = {"JOB_TIMEOUT": timeout}
+    submit_job(report)
+    job = claim_job()
+    ReportJob.objects.filter(pk=job.pk).update(
+        heartbeat_at=timezone.now() - datetime.timedelta(seconds=heartbeat_age),
+        total_rows=12,
+        row_count=5,
+    )
+
+    assert (claim_job() == job) is is_claimed
+
+    job.refresh_from_db()
+    assert job.status == ReportJob.Status.RUNNING
+    assert (job.total_rows, job.row_count) == ((None, 0) if is_claimed else (12, 5))
+
+
+def test_run_job(report):
+    submit_job(report)
+    job = claim_job()
+
+    run_job(job)
+
+    job.refresh_from_db()
+    assert job.status == ReportJob.Status.DONE
+    assert job.total_rows == 12
+    assert job.row_count == 12
+    assert job.progress == 1.0
+    assert job.duration.total_seconds() >= 0
+    assert job.result.name.startswith("django_reports/jobs/books-")
+
+    with job.result.open("rb") as file:
+        lines = file.read().decode().splitlines()
+
+    assert lines[0] == "title,edition"
+    assert len(lines) == 13
+    report.refresh_from_db()
+    assert report.run_count == 1
+
+
+def test_run_job_progress(report, settings, django_assert_num_queries):
+    settings.DJANGO_REPORTS = {"RUNNER_CHUNK_SIZE": 5}
+    submit_job(report)
+    job = claim_job()
+
+    # The run count update, the row count, the total rows update, the rows, 2 chunk progress
+    # updates, the final progress update and the status update.
+    with django_assert_num_queries(8):
+        run_job(job)
+
+    assert job.row_count == 12
+
+
+def test_run_summary_job(summary_report):
+    submit_job(summary_report, format="ndjson")
+    job = run_job(claim_job())
+
+    assert job.total_rows == 1
+    assert job.row_count == 1
+
+    with job.result.open("rb") as file:
+        assert [json.loads(line) for line in file] == [{"books": 12}]
+
+
+def test_run_failed_job(report):
+    report.aggregations = {"columns": [{"path": "unknown"}]}
+    report.save()
+    submit_job(report)
+
+    job = run_job(claim_job())
+
+    job.refresh_from_db()
+    assert job.status == ReportJob.Status.FAILED
+    assert job.error.startswith("FieldError")
+    assert not job.result
+    assert job.finished_at is not None
+
+
+def test_run_pending_jobs(report, summary_report):
+    jobs = [submit_job(report), submit_job(summary_report), submit_job(report)]
+
+    assert run_pending_jobs(max_jobs=2) == 2
+    assert run_pending_jobs() == 1
+    assert run_pending_jobs() == 0
+    assert {
+        job.status for job in ReportJob.objects.filter(pk__in=[job.pk for job in jobs])
+    } == {ReportJob.Status.DONE}
+
+
+def test_run_report_jobs_command(report):
+    submit_job(report)
+    stdout = io.StringIO()
+
+    call_command("run_report_jobs", "--once", stdout=stdout)
+
+    assert stdout.getvalue() == "Ran 1 report jobs.\n"
+    assert ReportJob.objects.get().status == ReportJob.Status.DONE
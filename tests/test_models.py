@@ -0,0 +1,139 @@
+"""Django report model tests."""
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ValidationError
+
+from django_reports.models import Report
+from tests.models import Book
+
+
+@pytest.fixture
+def report(make_report):
+    return make_report(name="Books")
+
+
+class TestReport(object):
+    def test_model(self, report):
+        assert report.model is Book
+        assert report.model_index.label == "tests.Book"
+
+    def test_clean_filters(self, report):
+        report.filters = {
+            "connector": "AND",
+            "children": [{"path": "author__name", "value": "Ann"}],
+        }
+        report.clean()
+
+        report.filters = {
+            "connector": "AND",
+            "children": [{"path": "author__surname", "value": "Ann"}],
+        }
+        with pytest.raises(ValidationError) as error:
+            report.clean()
+
+        assert "filters" in error.value.message_dict
+
+        report.filters = {"connector": "AND", "children": ["x"]}
+        with pytest.raises(ValidationError) as error:
+            report.clean()
+
+        assert error.value.message_dict["filters"] == [
+            "$.children[0]: Filter node must be an object."
+        ]
+
+    def test_clean_invalid_model_label(self, report):
+        report.model_label = "tests.Magazine"
+        report.filters = {"connector": "AND", "children": [{"path": "title"}]}
+
+        report.clean()
+
+        with pytest.raises(ValidationError):
+            report.clean_fields(exclude=["created_by"])
+
+    def test_clean_aggregations(self, report):
+        report.aggregations = {
+            "columns": [{"path": "author__name"}],
+            "metrics": [{"name": "books", "function": "count"}],
+        }
+        report.clean()
+
+        report.aggregations = {
+            "columns": [{"path": "author__name"}],
+            "metrics": [{"name": "total", "function": "sum", "path": "title"}],
+        }
+        with pytest.raises(ValidationError) as error:
+            report.clean()
+
+        assert "aggregations" in error.value.message_dict
+
+    @pytest.mark.parametrize(
+        "report_type, filters, expected",
+        [
+            (
+                Report.Type.TABLE,
+                {},
+                [
+                    {"author__name": "Ann", "books": 4},
+                    {"author__name": "Bob", "books": 4},
+                    {"author__name": "Cid", "books": 4},
+                ],
+            ),
+            (
+                Report.Type.CHART,
+                {
+                    "connector": "AND",
+                    "children": [{"path": "author__name", "value": "Bob"}],
+                },
+                [{"author__name": "Bob", "books": 4}],
+            ),
+            (Report.Type.SUMMARY, {}, {"books": 12}),
+        ],
+    )
+    def test_get_results(
+        self, books, report, report_type, filters, expected, django_assert_num_queries
+    ):
+        report.type = report_type
+        report.filters = filters
+        report.aggregations = {
+            "columns": [{"path": "author__name"}],
+            "metrics": [{"name": "books", "function": "count"}],
+        }
+
+        with django_assert_num_queries(1):
+            results = report.get_results()
+            assert (
+                list(results) if report_type != Report.Type.SUMMARY else results
+            ) == expected
+
+    @pytest.mark.parametrize(
+        "report_type, expected",
+        [
+            (
+                Report.Type.TABLE,
+                [
+                    {"author__name": "Ann", "books": 4},
+                    {"author__name": "Bob", "books": 4},
+                    {"author__name": "Cid", "books": 4},
+                ],
+            ),
+            (Report.Type.SUMMARY, {"books": 12}),
+        ],
+    )
+    def test_aget_results(self, books, report, report_type, expected):
+        report.type = report_type
+        report.aggregations = {
+            "columns": [{"path": "author__name"}],
+            "metrics": [{"name": "books", "function": "count"}],
+        }
+
+        assert async_to_sync(report.aget_results)() == expected
+
+    def test_record_run(self, books, report):
+        report.created_by.save()
+        report.save()
+
+        report.record_run()
+        report.record_run()
+
+        report.refresh_from_db()
+        assert report.run_count == 2
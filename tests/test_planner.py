@@ -0,0 +1,91 @@
+"""Query planner tests."""
+import pytest
+
+from django_reports.index.models import ModelIndex
+from django_reports.planner import QueryPlan, apply_query_plan, get_query_plan
+from tests.models import Book
+
+COLUMN_PATHS = ["title", "author__country__name", "author__name", "publisher"]
+
+
+@pytest.fixture
+def field_index():
+    return ModelIndex(Book).field_index
+
+
+def test_get_query_plan(field_index):
+    assert get_query_plan(field_index, COLUMN_PATHS) == QueryPlan(
+        select_related=("author__country",),
+        only=("author__country__name", "author__name", "publisher", "title"),
+    )
+
+
+def test_get_query_plan_without_relations(field_index):
+    assert get_query_plan(field_index, ["title", "edition"]) == QueryPlan(
+        select_related=(), only=("edition", "title")
+    )
+
+
+@pytest.mark.parametrize("path", ["author__unknown", "title__author"])
+def test_get_query_plan_unknown_path(field_index, path):
+    with pytest.raises(ValueError, match="does not exist or is not supported"):
+        get_query_plan(field_index, ["title", path])
+
+
+def test_apply_query_plan(field_index, books, django_assert_num_queries):
+    queryset = apply_query_plan(
+        Book.objects.order_by("pk"), get_query_plan(field_index, COLUMN_PATHS)
+    )
+
+    with django_assert_num_queries(1):
+        rows = [
+            (
+                book.title,
+                book.author.country and book.author.country.name,
+                book.author.name,
+                book.publisher_id,
+            )
+            for book in queryset
+        ]
+
+    assert rows[:3] == [
+        ("Ann's book 0", "Netherlands", "Ann", books[0].publisher_id),
+        ("Bob's book 1", "Germany", "Bob", books[1].publisher_id),
+        ("Cid's book 2", None, "Cid", books[2].publisher_id),
+    ]
+    assert queryset[0].get_deferred_fields() == {
+        "created_at",
+        "edition",
+        "format",
+        "price",
+        "publication_date",
+    }
+
+
+def test_apply_empty_query_plan(books):
+    queryset = Book.objects.all()
+
+    assert apply_query_plan(queryset, QueryPlan((), ())) is queryset
+
+
+def test_report_get_planned_queryset(books, make_report, django_assert_num_queries):
+    report = make_report(
+        name="books",
+        filters={
+            "connector": "AND",
+            "children": [{"path": "author__country__name", "value": "Germany"}],
+        },
+        aggregations={
+            "columns": [{"path": "title"}, {"path": "author__country__name"}]
+        },
+    )
+
+    with django_assert_num_queries(1) as context:
+        rows = [
+            (book.title, book.author.country.name)
+            for book in report.get_planned_queryset().order_by("pk")
+        ]
+
+    assert rows == [(f"Bob's book {number}", "Germany") for number in (1, 4, 7, 10)]
+    # The filter joins are reused by `select_related`.
+    assert context.captured_queries[0]["sql"].count("JOIN") == 2
@@ -0,0 +1,243 @@
+"""Rollup table tests."""
+import datetime
+import decimal
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from django_reports.models import Report
+from django_reports.rollup import (
+    Rollup,
+    drop_rollup_table,
+    get_rollup_results,
+    refresh_rollup,
+)
+from tests.models import Book
+
+METRICS = [
+    {"name": "books", "function": "count"},
+    {"name": "revenue", "function": "sum", "path": "price"},
+    {"name": "average_edition", "function": "avg", "path": "edition"},
+    {"name": "last_published", "function": "max", "path": "publication_date"},
+]
+
+# Rollup tables are created outside of a transaction, which SQLite requires for schema changes.
+pytestmark = pytest.mark.django_db(transaction=True)
+
+FILTERS = {
+    "connector": "AND",
+    "children": [{"path": "publisher__name", "value": "Springer"}],
+}
+
+
+@pytest.fixture
+def make_springer_report(make_report):
+    """Return a factory of reports on Springer books, materialized when saved."""
+
+    def make_springer_report(
+        columns=(),
+        metrics=METRICS,
+        report_type=Report.Type.CHART,
+        filters=FILTERS,
+        save=False,
+    ):
+        return make_report(
+            name=f"Report {columns} {metrics}",
+            type=report_type,
+            filters=filters,
+            aggregations={"columns": list(columns), "metrics": list(metrics)},
+            materialized=save,
+            save=save,
+        )
+
+    return make_springer_report
+
+
+@pytest.fixture(autouse=True)
+def drop_rollup_tables():
+    yield
+
+    for table_name in table_names():
+        drop_rollup_table(table_name)
+
+
+@pytest.fixture
+def rollup_report(books, make_springer_report):
+    report = make_springer_report(
+        columns=[
+            {"path": "created_at", "transform": "date"},
+            {"path": "author__name"},
+        ],
+        save=True,
+    )
+    refresh_rollup(report)
+
+    return report
+
+
+def table_names():
+    return {
+        table_name
+        for table_name in connection.introspection.table_names()
+        if table_name.startswith("django_reports_rollup")
+    }
+
+
+def evaluate(results):
+    return results if isinstance(results, dict) else list(results)
+
+
+class TestRollup:
+    def test_refresh(self, rollup_report):
+        rollup = Rollup(rollup_report)
+
+        assert rollup.is_current
+        assert table_names() == {rollup.rollup_model._meta.db_table}
+        assert rollup.rollup_model._default_manager.count() == 6
+
+    def test_refresh_changed_definition(self, rollup_report):
+        previous_table_names = table_names()
+
+        rollup_report.filters = {}
+        assert not Rollup(rollup_report).is_current
+
+        assert refresh_rollup(rollup_report) == 12
+        assert Rollup(rollup_report).is_current
+        assert table_names().isdisjoint(previous_table_names)
+        assert len(table_names()) == 1
+
+    def test_refresh_summary(self, books, make_springer_report):
+        report = make_springer_report(report_type=Report.Type.SUMMARY, save=True)
+
+        assert refresh_rollup(report) == 1
+        assert Rollup(report).get_results(report) == report.get_results()
+
+    @pytest.mark.parametrize(
+        "columns, metrics",
+        [
+            # The rollup report itself.
+            (
+                [{"path": "created_at", "transform": "date"}, {"path": "author__name"}],
+                METRICS,
+            ),
+            # Fewer columns and metrics.
+            ([{"path": "author__name"}], METRICS[:2]),
+            # Coarser time buckets.
+            ([{"path": "created_at", "transform": "month"}], METRICS),
+            (
+                [
+                    {"path": "author__name"},
+                    {"path": "created_at", "transform": "year"},
+                ],
+                METRICS[2:],
+            ),
+        ],
+    )
+    def test_answers(
+        self,
+        rollup_report,
+        columns,
+        metrics,
+        django_assert_num_queries,
+        make_springer_report,
+    ):
+        report = make_springer_report(columns, metrics)
+        rollup = Rollup(rollup_report)
+
+        assert rollup.answers(report)
+
+        with django_assert_num_queries(1):
+            results = rollup.get_results(report)
+
+        assert results == evaluate(report.get_results())
+
+    def test_answers_summary(self, rollup_report, make_springer_report):
+        report = make_springer_report(report_type=Report.Type.SUMMARY)
+
+        assert Rollup(rollup_report).get_results(report) == {
+            "books": 6,
+            "revenue": decimal.Decimal(90),
+            "average_edition": 2.0,
+            "last_published": datetime.date(2022, 11, 1),
+        }
+
+    @pytest.mark.parametrize(
+        "report",
+        [
+            # Other filters.
+            lambda make: make(filters={}),
+            # Columns missing from the rollup.
+            lambda make: make([{"path": "title"}]),
+            # Buckets finer than the rollup.
+            lambda make: make([{"path": "created_at", "transform": "hour"}]),
+            # Metrics missing from the rollup.
+            lambda make: make(
+                metrics=[{"name": "first", "function": "min", "path": "price"}]
+            ),
+            lambda make: make(
+                metrics=[{"name": "authors", "function": "count", "distinct": True}]
+            ),
+            # Chart reports without columns.
+            lambda make: make(),
+            # Table reports.
+            lambda make: make(report_type=Report.Type.TABLE),
+        ],
+    )
+    def test_does_not_answer(self, rollup_report, report, make_springer_report):
+        assert not Rollup(rollup_report).answers(report(make_springer_report))
+
+    def test_stale_definition(self, rollup_report, make_springer_report):
+        rollup_report.aggregations["metrics"] = METRICS[:1]
+
+        assert not Rollup(rollup_report).answers(
+            make_springer_report(metrics=METRICS[:1])
+        )
+
+
+def test_get_rollup_results(rollup_report, make_springer_report):
+    report = make_springer_report([{"path": "created_at", "transform": "year"}])
+
+    assert get_rollup_results(report) == [
+        {
+            "created_at__year": 2023,
+            "books": 6,
+            "revenue": decimal.Decimal(90),
+            "average_edition": 2.0,
+            "last_published": datetime.date(2022, 11, 1),
+        }
+    ]
+    assert get_rollup_results(make_springer_report([{"path": "title"}])) is None
+
+
+def test_report_uses_rollups(
+    rollup_report, settings, django_assert_num_queries, make_springer_report
+):
+    report = make_springer_report([{"path": "created_at", "transform": "year"}])
+    expected = evaluate(report.get_results())
+    Book.objects.all().delete()
+
+    settings.DJANGO_REPORTS = {"USE_ROLLUPS": True}
+
+    # Matching rollups are looked up and answer the report, until they are refreshed.
+    with django_assert_num_queries(2):
+        assert report.get_results() == expected
+
+    refresh_rollup(rollup_report)
+    assert report.get_results() == []
+
+
+def test_refresh_rollups_command(books, make_springer_report):
+    materialized_report = make_springer_report(save=True)
+    report = make_springer_report([{"path": "author__name"}], save=True)
+    refresh_rollup(report)
+    report.materialized = False
+    report.save()
+
+    call_command("refresh_rollups")
+
+    materialized_report.refresh_from_db()
+    report.refresh_from_db()
+    assert Rollup(materialized_report).is_current
+    assert report.rollup_key == ""
+    assert table_names() == {Rollup(materialized_report).rollup_model._meta.db_table}
@@ -0,0 +1,158 @@
+"""Report runner tests."""
+import tracemalloc
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.db import connection
+
+from django_reports.models import Report
+from django_reports.runner import ReportRunner
+from tests.models import Book, Measurement
+
+MEASUREMENT_COUNT = 1_000_000
+
+# Peak memory allowed while streaming all measurements. Materialising the rows takes well over
+# a hundred megabytes.
+MEMORY_CEILING = 10 * 1024 * 1024
+
+
+@pytest.fixture
+def measurements(db):
+    """Generate a table of one million measurements."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {Measurement._meta.db_table} (sensor, value) "
+            "WITH RECURSIVE numbers(number) AS "
+            "(SELECT 0 UNION ALL SELECT number + 1 FROM numbers WHERE number < %s) "
+            "SELECT 'sensor ' || (number % 100), number FROM numbers",
+            [MEASUREMENT_COUNT - 1],
+        )
+
+
+class TestReportRunner:
+    def test_table(self, books, make_report, django_assert_num_queries):
+        runner = ReportRunner(
+            make_report(
+                filters={
+                    "connector": "AND",
+                    "children": [{"path": "author__name", "value": "Ann"}],
+                },
+                aggregations={"columns": [{"path": "title"}, {"path": "edition"}]},
+            ),
+            chunk_size=2,
+        )
+
+        with django_assert_num_queries(1):
+            rows = sorted(runner)
+
+        assert runner.columns == ["title", "edition"]
+        assert rows == [
+            ("Ann's book 0", 1),
+            ("Ann's book 3", 1),
+            ("Ann's book 6", 1),
+            ("Ann's book 9", 1),
+        ]
+
+    def test_table_without_columns(self, books, make_report):
+        runner = ReportRunner(
+            make_report(
+                filters={
+                    "connector": "AND",
+                    "children": [{"path": "title", "value": "Ann's book 0"}],
+                },
+                aggregations={},
+            )
+        )
+        book = Book.objects.get(title="Ann's book 0")
+
+        assert runner.columns == [field.attname for field in Book._meta.concrete_fields]
+        assert list(runner) == [
+            tuple(getattr(book, column) for column in runner.columns)
+        ]
+
+    def test_grouped(self, books, make_report):
+        runner = ReportRunner(
+            make_report(
+                type=Report.Type.CHART,
+                aggregations={
+                    "columns": [{"path": "author__name"}],
+                    "metrics": [
+                        {"name": "books", "function": "count"},
+                        {"name": "editions", "function": "max", "path": "edition"},
+                    ],
+                },
+            )
+        )
+
+        assert runner.columns == ["author__name", "books", "editions"]
+        assert list(runner) == [("Ann", 4, 1), ("Bob", 4, 2), ("Cid", 4, 3)]
+
+    def test_summary(self, books, make_report):
+        runner = ReportRunner(
+            make_report(
+                type=Report.Type.SUMMARY,
+                aggregations={
+                    "metrics": [
+                        {"name": "books", "function": "count"},
+                        {"name": "first", "function": "min", "path": "title"},
+                    ],
+                },
+            )
+        )
+
+        assert runner.columns == ["books", "first"]
+        assert list(runner) == [(12, "Ann's book 0")]
+
+    @pytest.mark.parametrize(
+        "report_type, aggregations, expected",
+        [
+            (
+                Report.Type.TABLE,
+                {"columns": [{"path": "title"}]},
+                [(f"Ann's book {number}",) for number in (0, 3, 6, 9)],
+            ),
+            (
+                Report.Type.SUMMARY,
+                {"metrics": [{"name": "books", "function": "count"}]},
+                [(4,)],
+            ),
+        ],
+    )
+    def test_async_iteration(
+        self, books, make_report, report_type, aggregations, expected
+    ):
+        runner = ReportRunner(
+            make_report(
+                type=report_type,
+                filters={
+                    "connector": "AND",
+                    "children": [{"path": "author__name", "value": "Ann"}],
+                },
+                aggregations=aggregations,
+            ),
+            chunk_size=3,
+        )
+
+        async def collect():
+            return [row async for row in runner]
+
+        assert sorted(async_to_sync(collect)()) == expected
+
+    def test_memory_ceiling(self, measurements, make_report):
+        runner = ReportRunner(
+            make_report(
+                model_label="tests.Measurement",
+                aggregations={"columns": [{"path": "sensor"}, {"path": "value"}]},
+            )
+        )
+
+        tracemalloc.start()
+
+        try:
+            row_count = sum(1 for _ in runner)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert row_count == MEASUREMENT_COUNT
+        assert peak < MEMORY_CEILING
@@ -0,0 +1,34 @@
+"""Collection and structure tests."""
+from django_reports.structs import LRUCache
+
+
+class TestLRUCache(object):
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("b", "default") == "default"
+        assert cache.info() == (1, 2, 0, 1, 2)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.info().evictions == 1
+        assert len(cache) == 2
+
+    def test_clear(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.clear()
+
+        assert cache.info() == (0, 0, 0, 0, 2)
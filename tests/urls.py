@@ -0,0 +1,6 @@
+"""URLs used by the test suite."""
+from django.urls import include, path
+
+urlpatterns = [
+    path("", include("django_reports.rest_framework.urls")),
+]